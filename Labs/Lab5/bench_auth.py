@@ -0,0 +1,58 @@
+"""Пропускная способность входа (логинов в секунду) при разной стоимости KDF
+
+Запуск: python bench_auth.py [--logins 64] [--workers 1 4 8]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from models.user import User
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService
+from services.password_hasher import PasswordHasher
+from services.session_store import MemorySessionBackend
+
+COSTS = [
+    ('scrypt n=2^12', dict(algorithm=PasswordHasher.SCRYPT, n=2 ** 12)),
+    ('scrypt n=2^14', dict(algorithm=PasswordHasher.SCRYPT, n=2 ** 14)),
+    ('scrypt n=2^15', dict(algorithm=PasswordHasher.SCRYPT, n=2 ** 15)),
+    ('pbkdf2 100k', dict(algorithm=PasswordHasher.PBKDF2, iterations=100_000)),
+    ('pbkdf2 600k', dict(algorithm=PasswordHasher.PBKDF2, iterations=600_000)),
+]
+
+
+async def _login_burst(auth_service: AuthService, logins: int) -> float:
+    started = time.perf_counter()
+    tokens = await asyncio.gather(*(auth_service.authenticate('bench', 'secret') for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    assert all(tokens), "Проверка пароля не прошла"
+    return logins / elapsed
+
+
+def run(logins: int, workers_list):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'cost':<16}" + ''.join(f"{f'{w} workers':>14}" for w in workers_list))
+        for number, (title, options) in enumerate(COSTS):
+            user_repo = UserRepository(os.path.join(directory, f'users_{number}.json'))
+            hasher = PasswordHasher(**options)
+            row = f"{title:<16}"
+            for workers in workers_list:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    auth_service = AuthService(user_repo, backend=MemorySessionBackend(),
+                                               password_hasher=hasher, verify_executor=pool)
+                    if user_repo.get_by_login('bench') is None:
+                        auth_service.register(User(id=1, name='Bench', login='bench', password='secret'))
+                    rate = asyncio.run(_login_burst(auth_service, logins))
+                row += f"{rate:>10.1f} l/s"
+            print(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+    run(args.logins, args.workers)
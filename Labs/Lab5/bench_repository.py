@@ -0,0 +1,163 @@
+"""Нагрузочный тест репозитория пользователей на синтетических данных
+
+Для каждого размера набора данных выводит операции в секунду по каждой операции
+и сводку метрик (задержки, байты, просмотренные записи, попадания в кэш).
+С --codecs вместо этого сравнивает форматы файла: размер, время записи и чтения.
+
+Запуск: python bench_repository.py [--sizes 1000 10000 100000] [--ops 200] [--codecs] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict
+
+from models.user import User
+from repositories.codec import StorageCodec
+from repositories.instrumentation import RepositoryMetrics
+from repositories.user_repository import UserRepository
+
+
+def generate_users(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    first_names = ['Alice', 'Bob', 'Carol', 'Dave', 'Eve', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy']
+    return [
+        {
+            'id': i,
+            'name': f"{rng.choice(first_names)} {rng.randrange(10 ** 6)}",
+            'login': f"user{i}",
+            'password': f"pbkdf2_sha256$600000${rng.randrange(10 ** 9)}${rng.randrange(10 ** 12)}",
+            'email': f"user{i}@example.com" if rng.random() < 0.8 else None,
+            'address': f"{rng.randrange(1, 999)} Main St" if rng.random() < 0.5 else None,
+            'version': 1,
+        }
+        for i in range(count)
+    ]
+
+
+def _rate(operation: Callable[[int], None], repeats: int) -> float:
+    started = time.perf_counter()
+    for i in range(repeats):
+        operation(i)
+    elapsed = time.perf_counter() - started
+    return repeats / elapsed if elapsed else float('inf')
+
+
+def bench_size(directory: str, size: int, ops: int) -> Dict[str, object]:
+    path = os.path.join(directory, f'users_{size}.json')
+    with open(path, 'w') as f:
+        json.dump(generate_users(size), f, indent=2)
+
+    metrics = RepositoryMetrics(slow_threshold=None, name=f'users[{size}]')
+    rng = random.Random(size)
+    ids = [rng.randrange(size) for _ in range(ops)]
+
+    results: Dict[str, float] = {}
+    cold = UserRepository(path)
+    results['cold_load'] = _rate(lambda i: cold._load_state(), 1)
+
+    repo = UserRepository(path, metrics=metrics)
+    repo.get_by_id(0)
+    results['get_by_id'] = _rate(lambda i: repo.get_by_id(ids[i]), ops)
+    results['get_by_login'] = _rate(lambda i: repo.get_by_login(f"user{ids[i]}"), ops)
+    results['where_name_prefix'] = _rate(
+        lambda i: repo.where('name', lambda name: name.startswith('Eve 1')).select('id').all(), max(ops // 20, 1))
+    results['order_by_name_top10'] = _rate(lambda i: repo.order_by('name').limit(10).all(), max(ops // 20, 1))
+    results['get_all'] = _rate(lambda i: repo.get_all(), max(ops // 50, 1))
+
+    # Запись переписывает весь файл, поэтому операций меньше
+    write_ops = max(ops // 10, 1)
+    new_users = [User(id=size + i, name=f"New {i}", login=f"new{i}", password='x') for i in range(write_ops)]
+    results['add'] = _rate(lambda i: repo.add(new_users[i]), write_ops)
+    results['update'] = _rate(lambda i: _touch(repo, ids[i]), write_ops)
+    results['delete'] = _rate(lambda i: repo.delete(new_users[i]), write_ops)
+
+    return {'size': size, 'ops_per_second': results, 'metrics': metrics.report()}
+
+
+CODECS = {
+    'indent2': StorageCodec(indent=2),
+    'compact': StorageCodec(),
+    'compact+crc': StorageCodec(checksums=True),
+    'zlib': StorageCodec(compression='zlib'),
+    'gzip': StorageCodec(compression='gzip'),
+    'lzma': StorageCodec(compression='lzma'),
+    'zlib+crc': StorageCodec(compression='zlib', checksums=True),
+}
+
+
+def bench_codecs(size: int, repeats: int = 3) -> Dict[str, object]:
+    """Размер файла и лучшее время encode/decode из repeats прогонов для каждого формата"""
+    records = generate_users(size)
+    results = {}
+    for name, codec in CODECS.items():
+        encode, decode = float('inf'), float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            payload = codec.encode(records)
+            encode = min(encode, time.perf_counter() - started)
+            started = time.perf_counter()
+            codec.decode(payload)
+            decode = min(decode, time.perf_counter() - started)
+        results[name] = {'bytes': len(payload), 'encode_ms': encode * 1000, 'decode_ms': decode * 1000}
+    return {'size': size, 'codecs': results}
+
+
+def _print_codecs(reports: list) -> None:
+    for report in reports:
+        baseline = report['codecs']['indent2']['bytes']
+        print(f"\n{report['size']} записей")
+        print(f"  {'codec':<14}{'bytes':>12}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+        for name, result in report['codecs'].items():
+            print(f"  {name:<14}{result['bytes']:>12}{result['bytes'] / baseline:>8.2f}"
+                  f"{result['encode_ms']:>12.1f}{result['decode_ms']:>12.1f}")
+
+
+def _touch(repo: UserRepository, id: int) -> None:
+    user = repo.get_by_id(id)
+    user.address = 'Updated'
+    repo.update(user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--ops', type=int, default=200, help="операций чтения на замер")
+    parser.add_argument('--codecs', action='store_true', help="сравнить форматы файла вместо операций")
+    parser.add_argument('--json', action='store_true', help="вывести результаты в JSON")
+    args = parser.parse_args()
+
+    if args.codecs:
+        reports = [bench_codecs(size) for size in args.sizes]
+        if args.json:
+            print(json.dumps(reports, indent=2))
+        else:
+            _print_codecs(reports)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        reports = [bench_size(directory, size, args.ops) for size in args.sizes]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    operations = list(reports[0]['ops_per_second'])
+    print(f"{'operation':<22}" + ''.join(f"{report['size']:>14}" for report in reports))
+    for operation in operations:
+        print(f"{operation:<22}" + ''.join(f"{report['ops_per_second'][operation]:>14.1f}" for report in reports))
+
+    for report in reports:
+        metrics = report['metrics']
+        print(f"\n{report['size']} записей: прочитано {metrics['bytes_read']} Б, записано {metrics['bytes_written']} Б, "
+              f"попаданий в кэш {metrics['cache_hit_ratio']:.1%}")
+        for name, summary in metrics['operations'].items():
+            scanned = f", просмотрено {summary['scanned_per_op']:.1f}/оп" if 'scanned_per_op' in summary else ''
+            print(f"  {name:<14} n={summary['count']:<6} p50={summary['p50_ms']:.3f} мс "
+                  f"p99={summary['p99_ms']:.3f} мс max={summary['max_ms']:.3f} мс{scanned}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+import asyncio
+
 from models.user import User
 from repositories.user_repository import UserRepository
 from services.auth_service import AuthService
@@ -10,21 +12,26 @@ def demo():
     print("1. Добавление пользователей")
     user1 = User(id=1, name="Alice", login="alice", password="pass123", email="alice@example.com")
     user2 = User(id=2, name="Bob", login="bob", password="bobpass", address="123 Main St")
-    user_repo.add(user1)
-    user_repo.add(user2)
+    auth_service.register(user1)
+    auth_service.register(user2)
 
     print("\nВсе пользователи (отсортировано по имени):")
-    for user in sorted(user_repo.get_all()):
+    for user in user_repo.order_by("name"):
         print(user)
 
     print("\n2. Авторизация пользователя")
     auth_service.sign_in(user1)
     print(f"Текущий пользователь: {auth_service.current_user}")
     print(f"Авторизован: {auth_service.is_authorized}")
+    token = asyncio.run(auth_service.authenticate("alice", "pass123"))
+    print(f"Проверка пароля alice: {'успешно' if token else 'неверный пароль'}")
+    print(f"Неверный пароль: {asyncio.run(auth_service.authenticate('alice', 'wrong')) is None}")
 
     print("\n3. Обновление пользователя")
-    updated_user = User(id=1, name="Alice Smith", login="alice", password="newpass", email="alice.smith@example.com")
-    user_repo.update(updated_user)
+    updated_user = user_repo.get_by_id(1)
+    updated_user.name = "Alice Smith"
+    updated_user.email = "alice.smith@example.com"
+    auth_service.change_password(updated_user, "newpass")
     print(f"Обновленный пользователь: {user_repo.get_by_id(1)}")
 
     print("\n4. Смена пользователя")
@@ -41,6 +48,9 @@ def demo():
     print(f"Авторизован автоматически: {new_auth_service.is_authorized}")
     print(f"Текущий пользователь: {new_auth_service.current_user}")
 
+    auth_service.close()
+    new_auth_service.close()
+
 
 if __name__ == "__main__":
     demo()
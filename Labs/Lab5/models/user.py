@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import Optional
 from functools import total_ordering
 
-@dataclass
+@dataclass(slots=True)
 @total_ordering
 class User:
     id: int
@@ -11,6 +11,7 @@ class User:
     password: str = field(repr=False)
     email: Optional[str] = None
     address: Optional[str] = None
+    version: int = field(default=0, repr=False, compare=False)
 
     def __lt__(self, other):
         return self.name.lower() < other.name.lower()
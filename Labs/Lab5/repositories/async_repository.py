@@ -0,0 +1,131 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+from .base_repository import JsonDataRepository, _DataState
+from .change_feed import Subscriber
+
+T = TypeVar('T')
+
+
+class AsyncDataRepository(ABC, Generic[T]):
+    @abstractmethod
+    async def aget_by_id(self, id: int) -> Optional[T]:
+        pass
+
+    @abstractmethod
+    async def aadd(self, item: T) -> None:
+        pass
+
+    @abstractmethod
+    async def aupdate(self, item: T) -> None:
+        pass
+
+    @abstractmethod
+    async def adelete(self, item: T) -> None:
+        pass
+
+    @abstractmethod
+    def aiter_all(self) -> AsyncIterator[T]:
+        pass
+
+    @abstractmethod
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Подписка на события add/update/delete; возвращает функцию отписки"""
+        pass
+
+
+class AsyncJsonDataRepository(AsyncDataRepository[T]):
+    """Асинхронный фасад над JsonDataRepository с общим кэшем и индексами
+
+    Все обращения к диску выполняются в отдельном потоке ввода-вывода. Пока кэш считается
+    свежим (stale_after секунд с последней проверки файла), чтение обслуживается прямо
+    в цикле событий. Одновременные запросы одного и того же ключа объединяются в одну загрузку.
+    """
+
+    def __init__(self, repository: JsonDataRepository[T], io_executor: Optional[Executor] = None,
+                 stale_after: float = 0.5, yield_every: int = 1000):
+        self.repository = repository
+        self._io = io_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='repo-io')
+        self._owns_io = io_executor is None
+        self._stale_after = stale_after
+        self._yield_every = yield_every
+        self._validated_at = float('-inf')
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def aget_by_id(self, id: int) -> Optional[T]:
+        return self._first_item(await self._lookup('id', id))
+
+    async def aadd(self, item: T) -> None:
+        await self._run_io(self._write, self.repository.add, item)
+
+    async def aupdate(self, item: T) -> None:
+        await self._run_io(self._write, self.repository.update, item)
+
+    async def adelete(self, item: T) -> None:
+        await self._run_io(self._write, self.repository.delete, item)
+
+    async def aiter_all(self) -> AsyncIterator[T]:
+        state = await self._state()
+        to_item = self.repository._dict_to_item
+        for position, record in enumerate(state.records, 1):
+            yield to_item(record)
+            if position % self._yield_every == 0:
+                await asyncio.sleep(0)
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """События публикует синхронный репозиторий, поэтому они приходят из потока ввода-вывода"""
+        return self.repository.subscribe(callback)
+
+    def close(self) -> None:
+        if self._owns_io:
+            self._io.shutdown()
+
+    def _first_item(self, records: List[dict]) -> Optional[T]:
+        # Каждый вызывающий получает собственный объект, общими остаются только сырые записи
+        return self.repository._dict_to_item(records[0]) if records else None
+
+    async def _lookup(self, field: str, value: Any) -> List[dict]:
+        state = self._cached_state()
+        if state is not None:
+            return state.find(field, value)
+        return await self._single_flight((field, value), self._load_and_find, field, value)
+
+    async def _state(self) -> _DataState:
+        state = self._cached_state()
+        if state is not None:
+            return state
+        return await self._single_flight('state', self._load_state)
+
+    def _cached_state(self) -> Optional[_DataState]:
+        state = self.repository._state
+        if state is None or time.monotonic() - self._validated_at > self._stale_after:
+            return None
+        return state
+
+    def _load_state(self) -> _DataState:
+        state = self.repository._load_state()
+        self._validated_at = time.monotonic()
+        return state
+
+    def _write(self, operation: Callable[[T], None], item: T) -> None:
+        # Запись идет под блокировкой файла и перечитывает его, после нее кэш заведомо свежий
+        operation(item)
+        self._validated_at = time.monotonic()
+
+    def _load_and_find(self, field: str, value: Any) -> List[dict]:
+        return self._load_state().find(field, value)
+
+    async def _single_flight(self, key: Hashable, func: Callable, *args) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run_io(func, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(future)
+
+    def _run_io(self, func: Callable, *args) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._io, func, *args)
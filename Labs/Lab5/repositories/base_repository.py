@@ -1,12 +1,27 @@
-import json
 import os
 from abc import ABC, abstractmethod
-from typing import Sequence, Optional, List, TypeVar, Generic
+from typing import Sequence, Optional, List, TypeVar, Generic, Any, Callable, Dict, Iterable, Iterator, Tuple
+
+from .change_feed import ADD, DELETE, UPDATE, ChangeEvent, ChangeFeed, ChangePublisher, Subscriber
+from .codec import DEFAULT_CODEC, StorageCodec
+from .file_utils import FileLock, atomic_write
+from .hydration import LazyRecord, hydrator_for
+from .instrumentation import NULL_METRICS, RepositoryMetrics
+from .query import Query
+from .snapshot import SnapshotRecords, read_snapshot, write_snapshot
+from .transaction import Transaction, UniqueConstraintError
 
 T = TypeVar('T')
 
 
+class ConcurrencyError(Exception):
+    """Запись была изменена другим процессом или потоком после того, как ее прочитали"""
+
+
 class IDataRepository(ABC, Generic[T]):
+    _sort_keys: Dict[str, Callable[[Any], Any]] = {}
+    metrics = NULL_METRICS
+
     @abstractmethod
     def get_all(self) -> Sequence[T]:
         pass
@@ -27,55 +42,399 @@ class IDataRepository(ABC, Generic[T]):
     def delete(self, item: T) -> None:
         pass
 
+    def restore(self, item: T) -> None:
+        """Добавляет запись, перенесенную из другого хранилища; хранилища с версиями ее сохраняют"""
+        self.add(item)
+
+    def iter_all(self) -> Iterator[T]:
+        return iter(self.get_all())
+
+    @abstractmethod
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Подписка на события add/update/delete; возвращает функцию отписки"""
+        pass
+
+    def export_snapshot(self, path: str) -> int:
+        """Выгружает записи в столбцовый снимок, возвращает размер файла в байтах"""
+        return write_snapshot(path, self._iter_records())
+
+    def import_snapshot(self, path: str) -> int:
+        with read_snapshot(path) as records:
+            items = [self._dict_to_item(record) for record in records]
+        for item in items:
+            self.add(item)
+        return len(items)
+
+    def query(self) -> Query[T]:
+        return Query(self)
+
+    def where(self, field: str, predicate: Any) -> Query[T]:
+        return self.query().where(field, predicate)
+
+    def order_by(self, field: str, reverse: bool = False) -> Query[T]:
+        return self.query().order_by(field, reverse)
+
+    def limit(self, count: int) -> Query[T]:
+        return self.query().limit(count)
+
+    def select(self, *fields: str) -> Query[T]:
+        return self.query().select(*fields)
+
+    def _iter_records(self) -> Iterable[dict]:
+        return (self._item_to_dict(item) for item in self.get_all())
+
+    def _lookup_records(self, field: str, value: Any) -> Optional[Iterable[dict]]:
+        return None
+
+    def _item_to_dict(self, item: T) -> dict:
+        return hydrator_for(type(item)).to_dict(item)
+
+    @abstractmethod
+    def _dict_to_item(self, data: dict) -> T:
+        pass
+
+
+class _DataState:
+    """Разобранное содержимое файла и индексы поле -> позиции записей"""
+
+    __slots__ = ('records', 'indexes', 'stamp')
+
+    def __init__(self, records: Sequence[dict], indexed_fields: Tuple[str, ...], stamp):
+        self.records = records
+        self.stamp = stamp
+        self.indexes: Dict[str, Dict[Any, List[int]]] = {}
+        for field in indexed_fields:
+            # Для снимка индекс строится по одному столбцу, не трогая остальные
+            if isinstance(records, SnapshotRecords):
+                values = records.column(field)
+            else:
+                values = (record.get(field) for record in records)
+            index: Dict[Any, List[int]] = {}
+            for position, value in enumerate(values):
+                index.setdefault(value, []).append(position)
+            self.indexes[field] = index
+
+    def find(self, field: str, value: Any) -> List[dict]:
+        positions = self.indexes[field].get(value, ())
+        return [self.records[position] for position in positions]
+
+
+ConflictResolver = Callable[[dict, dict], dict]
+
 
 class JsonDataRepository(IDataRepository[T]):
-    def __init__(self, file_path: str, item_class: type[T]):
+    _indexed_fields: Tuple[str, ...] = ('id',)
+    _unique_fields: Tuple[str, ...] = ('id',)
+    _version_field = 'version'
+
+    def __init__(self, file_path: str, item_class: type[T],
+                 conflict_resolver: Optional[ConflictResolver] = None, change_feed: bool = False,
+                 snapshot: bool = False, metrics: Optional[RepositoryMetrics] = None,
+                 codec: Optional[StorageCodec] = None):
+        """conflict_resolver(current, incoming) -> merged вызывается вместо ConcurrencyError
+
+        change_feed - дополнительно писать события в журнал <file_path>.changes
+        snapshot - после каждой записи обновлять столбцовый снимок <file_path>.snap;
+        снимок, снятый ровно с текущего JSON, используется при загрузке независимо от этого флага
+        codec - формат записи файла (сжатие, контрольные суммы); при чтении формат определяется сам
+        """
         self.file_path = file_path
+        self.codec = codec or DEFAULT_CODEC
+        self.metrics = metrics or NULL_METRICS
+        self.snapshot_path = file_path + '.snap'
+        self._write_snapshot = snapshot
+        self._publisher = ChangePublisher()
+        self._feed = ChangeFeed(file_path + '.changes') if change_feed else None
+        self._file_lock = FileLock(file_path + '.lock')
         self._ensure_file_exists()
         self._item_class = item_class
+        self._hydrator = hydrator_for(item_class)
+        self._conflict_resolver = conflict_resolver
+        self._state: Optional[_DataState] = None
 
     def _ensure_file_exists(self):
         if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as f:
-                json.dump([], f)
+            os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+            with self._file_lock:
+                if not os.path.exists(self.file_path):
+                    atomic_write(self.file_path, self.codec.encode([]))
+
+    def _file_stamp(self):
+        # Атомарная запись заменяет файл, поэтому inode меняется при каждом сохранении
+        stat = os.stat(self.file_path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_state(self) -> _DataState:
+        # Файл перечитывается только если он изменился с момента последнего чтения
+        stamp = self._file_stamp()
+        state = self._state
+        if state is None or state.stamp != stamp:
+            self.metrics.cache_miss()
+            with self.metrics.operation('load'):
+                state = _DataState(self._read_records(stamp), self._indexed_fields, stamp)
+            self._replace_state(state)
+        else:
+            self.metrics.cache_hit()
+        return state
+
+    def _read_records(self, stamp) -> Sequence[dict]:
+        records = self._open_fresh_snapshot(stamp)
+        if records is not None:
+            self.metrics.record_read(records.reader.mapped_size)
+            return records
+        with open(self.file_path, 'rb') as f:
+            payload = f.read()
+        self.metrics.record_read(len(payload))
+        return self.codec.decode(payload)
+
+    def _open_fresh_snapshot(self, stamp) -> Optional[SnapshotRecords]:
+        # Снимок годится, только если снят ровно с этой версии JSON: сравнение времени
+        # изменения ненадежно на файловых системах с грубым разрешением mtime
+        try:
+            records = read_snapshot(self.snapshot_path)
+        except (OSError, ValueError):
+            return None
+        if records.reader.source != tuple(stamp):
+            records.close(keep_records=False)
+            return None
+        return records
+
+    def _replace_state(self, state: _DataState) -> None:
+        old, self._state = self._state, state
+        if old is not None and old is not state and isinstance(old.records, SnapshotRecords):
+            # Старое состояние может еще читать транзакция или iter_lazy: close разбирает
+            # оставшиеся столбцы, поэтому они продолжат работать и без mmap
+            old.records.close()
+
+    def close(self) -> None:
+        """Закрывает отображенный в память снимок текущего состояния"""
+        state = self._state
+        if state is not None and isinstance(state.records, SnapshotRecords):
+            state.records.close()
 
     def _read_data(self) -> List[dict]:
-        with open(self.file_path, 'r') as f:
-            return json.load(f)
+        return list(self._load_state().records)
 
     def _write_data(self, data: List[dict]):
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        data = [record if type(record) is dict else dict(record) for record in data]
+        payload = self.codec.encode(data)
+        atomic_write(self.file_path, payload)
+        self.metrics.record_write(len(payload))
+        stamp = self._file_stamp()
+        if self._write_snapshot:
+            self.metrics.record_write(write_snapshot(self.snapshot_path, data, source=stamp))
+        self._replace_state(_DataState(data, self._indexed_fields, stamp))
+
+    def _iter_records(self) -> Iterable[dict]:
+        return iter(self._load_state().records)
+
+    def _lookup_records(self, field: str, value: Any) -> Optional[Iterable[dict]]:
+        state = self._load_state()
+        if field not in state.indexes:
+            return None
+        try:
+            return state.find(field, value)
+        except TypeError:
+            return None
 
     def get_all(self) -> Sequence[T]:
-        return [self._dict_to_item(item) for item in self._read_data()]
+        with self.metrics.operation('get_all'):
+            records = self._load_state().records
+            self.metrics.record_scan('get_all', len(records))
+            return [self._dict_to_item(item) for item in records]
+
+    def iter_all(self) -> Iterator[T]:
+        to_item = self._dict_to_item
+        records = self._load_state().records
+        self.metrics.record_scan('iter_all', len(records))
+        return (to_item(record) for record in records)
+
+    def iter_lazy(self) -> Iterator[T]:
+        hydrator = self._hydrator
+        return (LazyRecord(record, hydrator) for record in self._load_state().records)
 
     def get_by_id(self, id: int) -> Optional[T]:
-        for item in self._read_data():
-            if item['id'] == id:
-                return self._dict_to_item(item)
-        return None
+        return self._get_one('get_by_id', 'id', id)
+
+    def _get_one(self, operation: str, field: str, value: Any) -> Optional[T]:
+        with self.metrics.operation(operation):
+            records = self._load_state().find(field, value)
+            self.metrics.record_scan(operation, len(records))
+            return self._dict_to_item(records[0]) if records else None
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        return self._publisher.subscribe(callback)
+
+    def transaction(self, read_only: bool = False) -> Transaction[T]:
+        """with repo.transaction() as tx: ... - изменения сохраняются одной записью при выходе"""
+        return Transaction(self, read_only)
+
+    def export_snapshot(self, path: Optional[str] = None) -> int:
+        with self._file_lock, self.metrics.operation('export_snapshot'):
+            state = self._load_state()
+            return write_snapshot(path or self.snapshot_path, state.records, source=state.stamp)
+
+    def import_snapshot(self, path: str) -> int:
+        """Добавляет записи снимка одной записью файла вместо add() на каждую"""
+        with read_snapshot(path) as records:
+            imported = [dict(record) for record in records]
+        with self._file_lock, self.metrics.operation('import_snapshot'):
+            data = self._read_data()
+            data.extend(imported)
+            self._write_data(data)
+            events = self._record_changes([(ADD, record.get('id'), None, record) for record in imported])
+        self._publish(events)
+        return len(imported)
+
+    def read_changes(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[ChangeEvent], int]:
+        if self._feed is None:
+            raise ValueError("Журнал изменений не включен (change_feed=False)")
+        return self._feed.read(offset, limit)
 
     def add(self, item: T) -> None:
-        data = self._read_data()
-        data.append(self._item_to_dict(item))
-        self._write_data(data)
+        self._insert(item, 'add')
+
+    def restore(self, item: T) -> None:
+        # Версия переносится как есть, чтобы держатели объекта могли обновить его после переноса
+        self._insert(item, 'restore')
+
+    def _insert(self, item: T, operation: str) -> None:
+        with self._file_lock, self.metrics.operation(operation):
+            data = self._read_data()
+            record = self._item_to_dict(item)
+            if self._version_field in record and (operation == 'add' or not record[self._version_field]):
+                record[self._version_field] = 1
+            data.append(record)
+            self._write_data(data)
+            events = self._record_changes([(ADD, record.get('id'), None, record)])
+        self._sync_version(item, record)
+        self._publish(events)
 
     def update(self, item: T) -> None:
-        data = self._read_data()
-        for i, existing_item in enumerate(data):
-            if existing_item['id'] == item.id:
-                data[i] = self._item_to_dict(item)
-                break
-        self._write_data(data)
+        # Чтение-изменение-запись под блокировкой: состояние перечитывается, если файл менялся
+        with self._file_lock, self.metrics.operation('update'):
+            state = self._load_state()
+            positions = state.indexes['id'].get(item.id)
+            if not positions:
+                return
+            before = state.records[positions[0]]
+            record = self._check_version(before, self._item_to_dict(item))
+            data = list(state.records)
+            data[positions[0]] = record
+            self._write_data(data)
+            events = self._record_changes([(UPDATE, item.id, before, record)])
+        self._sync_version(item, record)
+        self._publish(events)
 
     def delete(self, item: T) -> None:
-        data = self._read_data()
-        data = [i for i in data if i['id'] != item.id]
-        self._write_data(data)
+        with self._file_lock, self.metrics.operation('delete'):
+            state = self._load_state()
+            removed = state.find('id', item.id)
+            for current in removed:
+                self._check_version(current, self._item_to_dict(item), merge=False)
+            data = [i for i in state.records if i['id'] != item.id]
+            self._write_data(data)
+            events = self._record_changes([(DELETE, item.id, before, None) for before in removed])
+        self._publish(events)
+
+    def _record_changes(self, changes: List[tuple]) -> List[ChangeEvent]:
+        """Вызывается под блокировкой файла сразу после записи данных"""
+        if self._feed is None and not self._publisher.has_subscribers:
+            return []
+        # Копии: подписчики не должны менять записи, лежащие в кэше
+        events = [ChangeEvent(op, id, dict(before) if before else None, dict(after) if after else None)
+                  for op, id, before, after in changes]
+        if self._feed is not None:
+            self._feed.append(events)
+        return events
+
+    def _publish(self, events: List[ChangeEvent]) -> None:
+        if events:
+            self._publisher.publish(events)
+
+    def _commit_transaction(self, snapshot: _DataState, writes: List[Tuple[Any, Tuple[str, dict]]],
+                            items: Dict[Any, T]) -> None:
+        with self._file_lock, self.metrics.operation('commit'):
+            state = self._load_state()
+            data = list(state.records)
+            removed = set()
+            changes, written = [], []
+
+            for id, (op, record) in writes:
+                current = state.find('id', id)
+                if self._conflict_resolver is None or op != UPDATE:
+                    seen = snapshot.find('id', id)
+                    if [dict(r) for r in seen] != [dict(r) for r in current]:
+                        raise ConcurrencyError(f"Запись id={id} изменена после начала транзакции")
+
+                if op == ADD:
+                    if current:
+                        raise UniqueConstraintError(f"Запись с id={id} уже существует")
+                    if self._version_field in record:
+                        record[self._version_field] = 1
+                    data.append(record)
+                    changes.append((ADD, id, None, record))
+                    written.append((id, record))
+                elif not current:
+                    continue
+                elif op == UPDATE:
+                    record = self._check_version(current[0], record)
+                    data[state.indexes['id'][id][0]] = record
+                    changes.append((UPDATE, id, current[0], record))
+                    written.append((id, record))
+                else:
+                    self._check_version(current[0], record, merge=False)
+                    removed.add(id)
+                    changes.append((DELETE, id, current[0], None))
+
+            if removed:
+                data = [record for record in data if record.get('id') not in removed]
+            self._validate_unique(data, [record for _, record in written])
+            self._write_data(data)
+            events = self._record_changes(changes)
+
+        for id, record in written:
+            self._sync_version(items[id], record)
+        self._publish(events)
+
+    def _validate_unique(self, data: List[dict], written: List[dict]) -> None:
+        # Проверяются только значения, записанные транзакцией: старые дубликаты не блокируют работу
+        for field in self._unique_fields:
+            values = {record.get(field) for record in written} - {None}
+            if not values:
+                continue
+            seen = set()
+            for record in data:
+                value = record.get(field)
+                if value in values:
+                    if value in seen:
+                        raise UniqueConstraintError(f"Значение {field}={value!r} уже используется")
+                    seen.add(value)
+
+    def _check_version(self, current: dict, incoming: dict, merge: bool = True) -> dict:
+        """Оптимистическая блокировка: версия 0 означает объект, созданный в обход репозитория"""
+        field = self._version_field
+        if field not in incoming:
+            return incoming
+
+        expected = incoming[field]
+        actual = current.get(field, 0)
+        if expected and expected != actual:
+            if not merge or self._conflict_resolver is None:
+                raise ConcurrencyError(
+                    f"Запись id={current.get('id')} изменена: ожидалась версия {expected}, в хранилище {actual}"
+                )
+            incoming = dict(self._conflict_resolver(dict(current), incoming))
+
+        incoming[field] = actual + 1
+        return incoming
+
+    def _sync_version(self, item: T, record: dict) -> None:
+        if self._version_field in record:
+            setattr(item, self._version_field, record[self._version_field])
 
     def _item_to_dict(self, item: T) -> dict:
-        return item.__dict__
+        return self._hydrator.to_dict(item)
 
     def _dict_to_item(self, data: dict) -> T:
-        return self._item_class(**data)
+        return self._hydrator.to_item(data)
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADD = 'add'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+@dataclass(slots=True)
+class ChangeEvent:
+    op: str
+    id: Any
+    before: Optional[dict]
+    after: Optional[dict]
+    timestamp: float = field(default_factory=time.time)
+    # Смещение в журнале сразу после события - курсор для продолжения чтения
+    offset: Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps({'op': self.op, 'id': self.id, 'before': self.before,
+                           'after': self.after, 'ts': self.timestamp})
+
+    @classmethod
+    def from_json(cls, line: bytes, offset: int) -> 'ChangeEvent':
+        data = json.loads(line)
+        return cls(data['op'], data['id'], data['before'], data['after'], data['ts'], offset)
+
+
+Subscriber = Callable[[ChangeEvent], None]
+
+
+class ChangePublisher:
+    """Внутрипроцессная рассылка событий изменения подписчикам"""
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not callback]
+
+        return unsubscribe
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, events: List[ChangeEvent]) -> None:
+        for callback in self._subscribers:
+            for event in events:
+                try:
+                    callback(event)
+                except Exception:
+                    # Ошибка одного подписчика не должна влиять на запись и других подписчиков
+                    logger.exception("Подписчик %r не обработал событие %s id=%s", callback, event.op, event.id)
+
+
+class ChangeFeed:
+    """Устойчивый журнал изменений рядом с файлом данных (JSON lines), читается с любого смещения"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def append(self, events: List[ChangeEvent]) -> None:
+        """Вызывается под блокировкой файла данных, поэтому порядок строк совпадает с порядком записей"""
+        if not events:
+            return
+        lines = [(event.to_json() + '\n').encode('utf-8') for event in events]
+        with open(self.file_path, 'ab') as f:
+            offset = os.fstat(f.fileno()).st_size
+            f.write(b''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        for event, line in zip(events, lines):
+            offset += len(line)
+            event.offset = offset
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[ChangeEvent], int]:
+        """Возвращает события после offset и смещение, с которого продолжать чтение"""
+        events: List[ChangeEvent] = []
+        if not os.path.exists(self.file_path):
+            return events, offset
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n') or (limit is not None and len(events) >= limit):
+                    break
+                offset += len(line)
+                events.append(ChangeEvent.from_json(line, offset))
+        return events, offset
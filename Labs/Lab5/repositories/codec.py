@@ -0,0 +1,108 @@
+import gzip
+import json
+import lzma
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+CHECKSUM_MAGIC = b'#rcodec crc32'
+_COMPACT = (',', ':')
+# Один экземпляр на модуль: json.dumps с нестандартными separators создает кодировщик на каждый вызов
+_encode_record = json.JSONEncoder(separators=_COMPACT).encode
+
+_Compress = Callable[[bytes, Optional[int]], bytes]
+
+_COMPRESSION: Dict[str, Tuple[_Compress, Callable[[bytes], bytes]]] = {
+    'zlib': (lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress),
+    'gzip': (lambda data, level: gzip.compress(data, 6 if level is None else level, mtime=0), gzip.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+# JSON всегда начинается с '[' или пробела, поэтому сигнатуры не пересекаются с несжатыми файлами
+_SIGNATURES = ((b'\x1f\x8b', 'gzip'), (b'\xfd7zXZ\x00', 'lzma'), (b'\x78', 'zlib'))
+
+
+class ChecksumError(ValueError):
+    """Контрольная сумма записи не совпала или файл обрезан"""
+
+
+def detect_compression(payload: bytes) -> Optional[str]:
+    for signature, name in _SIGNATURES:
+        if payload.startswith(signature):
+            return name
+    return None
+
+
+class StorageCodec:
+    """Формат файла данных JsonDataRepository
+
+    Записи сохраняются компактным JSON (indent=None) или, с checksums=True, построчно
+    с CRC32 каждой записи: '#rcodec crc32 <число записей>' и строки '<crc32> <json>'.
+    Результат при необходимости сжимается zlib/gzip/lzma. decode() определяет сжатие
+    и формат по первым байтам, поэтому любой кодек читает файлы, записанные другим,
+    включая старые файлы с indent=2.
+    """
+
+    def __init__(self, compression: Optional[str] = None, level: Optional[int] = None,
+                 checksums: bool = False, indent: Optional[int] = None):
+        if compression is not None and compression not in _COMPRESSION:
+            raise ValueError(f"Неизвестное сжатие {compression!r}, доступны: {', '.join(_COMPRESSION)}")
+        self.compression = compression
+        self.level = level
+        self.checksums = checksums
+        self.indent = indent
+
+    def encode(self, records: Sequence[Any]) -> bytes:
+        if self.checksums:
+            payload = self._encode_checksummed(records)
+        elif self.indent is None:
+            payload = json.dumps(records, separators=_COMPACT).encode('utf-8')
+        else:
+            payload = json.dumps(records, indent=self.indent).encode('utf-8')
+        if self.compression is not None:
+            compress, _ = _COMPRESSION[self.compression]
+            payload = compress(payload, self.level)
+        return payload
+
+    def decode(self, payload: bytes) -> List[dict]:
+        compression = detect_compression(payload)
+        if compression is not None:
+            _, decompress = _COMPRESSION[compression]
+            payload = decompress(payload)
+        if payload.startswith(CHECKSUM_MAGIC):
+            return self._decode_checksummed(payload)
+        return json.loads(payload)
+
+    @staticmethod
+    def _encode_checksummed(records: Sequence[Any]) -> bytes:
+        lines = [b'%s %d\n' % (CHECKSUM_MAGIC, len(records))]
+        for record in records:
+            body = _encode_record(record).encode('utf-8')
+            lines.append(b'%08x %s\n' % (zlib.crc32(body), body))
+        return b''.join(lines)
+
+    @staticmethod
+    def _decode_checksummed(payload: bytes) -> List[dict]:
+        header, _, rest = payload.partition(b'\n')
+        expected = int(header[len(CHECKSUM_MAGIC):])
+        bodies = []
+        for number, line in enumerate(rest.split(b'\n'), 2):
+            if not line:
+                continue
+            body = line[9:]
+            if int(line[:8], 16) != zlib.crc32(body):
+                raise ChecksumError(f"Строка {number}: контрольная сумма записи не совпадает")
+            bodies.append(body)
+        if len(bodies) != expected:
+            raise ChecksumError(f"Ожидалось {expected} записей, прочитано {len(bodies)}: файл обрезан")
+        # Суммы проверены построчно, а разбор JSON остается одним вызовом на весь файл
+        return json.loads(b'[' + b','.join(bodies) + b']')
+
+    def __repr__(self) -> str:
+        options = [f"compression={self.compression!r}"] if self.compression else []
+        if self.checksums:
+            options.append('checksums=True')
+        if self.indent is not None:
+            options.append(f"indent={self.indent}")
+        return f"StorageCodec({', '.join(options)})"
+
+
+DEFAULT_CODEC = StorageCodec()
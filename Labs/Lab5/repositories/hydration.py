@@ -0,0 +1,135 @@
+from dataclasses import MISSING, fields, is_dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar('T')
+
+_REQUIRED = object()
+
+
+class Hydrator(Generic[T]):
+    """Преобразование запись <-> объект через функции, сгенерированные один раз на класс
+
+    Как и dataclasses, собирает исходный код конвертеров под конкретный набор полей:
+    поля передаются в __init__ позиционно, без разбора **kwargs на каждую строку.
+    """
+
+    def __init__(self, item_class: type[T]):
+        self.item_class = item_class
+        if not is_dataclass(item_class):
+            self.field_names: Tuple[str, ...] = ()
+            self._defaults: Dict[str, Any] = {}
+            self.to_item = self._construct
+            self.to_dict = self._vars
+            return
+
+        class_fields = fields(item_class)
+        self.field_names = tuple(f.name for f in class_fields)
+        self._defaults = {f.name: self._default_of(f) for f in class_fields}
+        self.to_item = self._compile_to_item(class_fields)
+        self.to_dict = self._compile_to_dict(class_fields)
+
+    @staticmethod
+    def _default_of(f) -> Any:
+        if f.default is not MISSING:
+            return f.default
+        if f.default_factory is not MISSING:
+            return f.default_factory
+        return _REQUIRED
+
+    def default(self, name: str) -> Any:
+        f = self.item_class.__dataclass_fields__.get(name)
+        if f is None or self._defaults[name] is _REQUIRED:
+            raise AttributeError(name)
+        return f.default_factory() if f.default_factory is not MISSING else f.default
+
+    def _compile_to_item(self, class_fields) -> Callable[[dict], T]:
+        namespace: Dict[str, Any] = {'_cls': self.item_class}
+        positional, keyword = [], []
+        for i, f in enumerate(class_fields):
+            if not f.init:
+                continue
+            if f.default is not MISSING:
+                namespace[f'_d{i}'] = f.default
+                expression = f"data.get({f.name!r}, _d{i})"
+            elif f.default_factory is not MISSING:
+                namespace[f'_f{i}'] = f.default_factory
+                expression = f"data[{f.name!r}] if {f.name!r} in data else _f{i}()"
+            else:
+                expression = f"data[{f.name!r}]"
+            if f.kw_only:
+                keyword.append(f"{f.name}=({expression})")
+            else:
+                positional.append(f"({expression})")
+        source = f"def to_item(data):\n    return _cls({', '.join(positional + keyword)})\n"
+        exec(source, namespace)
+        return namespace['to_item']
+
+    def _compile_to_dict(self, class_fields) -> Callable[[T], dict]:
+        items = ', '.join(f"{f.name!r}: item.{f.name}" for f in class_fields)
+        namespace: Dict[str, Any] = {}
+        exec(f"def to_dict(item):\n    return {{{items}}}\n", namespace)
+        return namespace['to_dict']
+
+    def _construct(self, data: dict) -> T:
+        return self.item_class(**data)
+
+    @staticmethod
+    def _vars(item: T) -> dict:
+        return dict(vars(item))
+
+
+@lru_cache(maxsize=None)
+def hydrator_for(item_class: type) -> Hydrator:
+    return Hydrator(item_class)
+
+
+class LazyRecord:
+    """Прокси над сырой записью: поля читаются из dict, полный объект создается по требованию"""
+
+    __slots__ = ('_record', '_hydrator', '_item')
+
+    def __init__(self, record: dict, hydrator: Hydrator):
+        object.__setattr__(self, '_record', record)
+        object.__setattr__(self, '_hydrator', hydrator)
+        object.__setattr__(self, '_item', None)
+
+    def materialize(self) -> Any:
+        if self._item is None:
+            object.__setattr__(self, '_item', self._hydrator.to_item(self._record))
+        return self._item
+
+    def __getattr__(self, name: str) -> Any:
+        if self._item is None and name in self._hydrator.field_names:
+            try:
+                return self._record[name]
+            except KeyError:
+                return self._hydrator.default(name)
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.materialize(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self.materialize())
+
+    def __eq__(self, other: Any) -> bool:
+        return self.materialize() == _unwrap(other)
+
+    def __lt__(self, other: Any) -> bool:
+        return self.materialize() < _unwrap(other)
+
+    def __le__(self, other: Any) -> bool:
+        return self.materialize() <= _unwrap(other)
+
+    def __gt__(self, other: Any) -> bool:
+        return self.materialize() > _unwrap(other)
+
+    def __ge__(self, other: Any) -> bool:
+        return self.materialize() >= _unwrap(other)
+
+    __hash__ = None
+
+
+def _unwrap(value: Any) -> Any:
+    return value.materialize() if isinstance(value, LazyRecord) else value
@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+slow_logger = logging.getLogger('repositories.slow')
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с корзинами по степеням двойки (в микросекундах)"""
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = int(seconds * 1_000_000)
+        self.counts[min(micros.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль, в секундах"""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class _Operation:
+    __slots__ = ('_metrics', '_name', '_started')
+
+    def __init__(self, metrics: 'RepositoryMetrics', name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._metrics.record_latency(self._name, time.perf_counter() - self._started)
+        return False
+
+
+class RepositoryMetrics:
+    """Счетчики репозитория: задержки по операциям, байты, просмотренные записи, попадания в кэш
+
+    Операции дольше slow_threshold секунд пишутся в лог 'repositories.slow'.
+    """
+
+    enabled = True
+
+    def __init__(self, slow_threshold: Optional[float] = 0.1, name: str = 'repository'):
+        self.name = name
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.scanned: Dict[str, int] = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def operation(self, name: str) -> _Operation:
+        return _Operation(self, name)
+
+    def record_latency(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = LatencyHistogram()
+            histogram.record(seconds)
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            slow_logger.warning("%s.%s заняла %.1f мс", self.name, name, seconds * 1000)
+
+    def record_scan(self, name: str, records: int) -> None:
+        with self._lock:
+            self.scanned[name] = self.scanned.get(name, 0) + records
+
+    def record_read(self, size: int) -> None:
+        with self._lock:
+            self.bytes_read += size
+
+    def record_write(self, size: int) -> None:
+        with self._lock:
+            self.bytes_written += size
+
+    def cache_hit(self) -> None:
+        self.cache_hits += 1
+
+    def cache_miss(self) -> None:
+        self.cache_misses += 1
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else 0.0
+
+    def report(self) -> dict:
+        with self._lock:
+            operations = {}
+            for name, histogram in self.latency.items():
+                summary = histogram.summary()
+                if name in self.scanned:
+                    summary['scanned_per_op'] = self.scanned[name] / max(histogram.count, 1)
+                operations[name] = summary
+            return {
+                'operations': operations,
+                'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written,
+                'cache_hit_ratio': self.cache_hit_ratio,
+            }
+
+
+class _NullOperation:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class NullMetrics:
+    """Метрики по умолчанию: ничего не считают и почти ничего не стоят"""
+
+    enabled = False
+    _operation = _NullOperation()
+
+    def operation(self, name: str) -> _NullOperation:
+        return self._operation
+
+    def record_latency(self, name: str, seconds: float) -> None:
+        pass
+
+    def record_scan(self, name: str, records: int) -> None:
+        pass
+
+    def record_read(self, size: int) -> None:
+        pass
+
+    def record_write(self, size: int) -> None:
+        pass
+
+    def cache_hit(self) -> None:
+        pass
+
+    def cache_miss(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
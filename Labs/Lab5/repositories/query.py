@@ -0,0 +1,149 @@
+import heapq
+import time
+from itertools import islice
+from typing import Any, Callable, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _equals(expected: Any) -> Callable[[Any], bool]:
+    return lambda value: value == expected
+
+
+class Query(Generic[T]):
+    """Ленивый запрос к репозиторию: фильтры, сортировка, лимит и проекция над сырыми записями"""
+
+    def __init__(self, repository):
+        self._repository = repository
+        self._filters: List[Tuple[str, Any]] = []
+        self._ordering: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._fields: Optional[Tuple[str, ...]] = None
+        self._scanned = 0
+
+    def where(self, field: str, predicate: Any) -> 'Query[T]':
+        """predicate - функция от значения поля либо значение для сравнения на равенство"""
+        self._filters.append((field, predicate))
+        return self
+
+    def order_by(self, field: str, reverse: bool = False) -> 'Query[T]':
+        self._ordering.append((field, reverse))
+        return self
+
+    def limit(self, count: int) -> 'Query[T]':
+        if count < 0:
+            raise ValueError("Лимит не может быть отрицательным")
+        self._limit = count
+        return self
+
+    def select(self, *fields: str) -> 'Query[T]':
+        self._fields = fields
+        return self
+
+    def all(self) -> List[Any]:
+        return list(self)
+
+    def first(self) -> Optional[Any]:
+        # Лимит передается в обход self._limit: first() не меняет сам запрос
+        limit = 1 if self._limit is None else min(self._limit, 1)
+        return next(self._iterate(limit), None)
+
+    def count(self) -> int:
+        return sum(1 for _ in self._filtered())
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._iterate(self._limit)
+
+    def _iterate(self, limit: Optional[int]) -> Iterator[Any]:
+        records = self._ordered(self._filtered(), limit)
+        if limit is not None and not self._ordering:
+            records = islice(records, limit)
+
+        if self._fields is not None:
+            fields = self._fields
+            results = ({name: record.get(name) for name in fields} for record in records)
+        else:
+            to_item = self._repository._dict_to_item
+            results = (to_item(record) for record in records)
+
+        metrics = self._repository.metrics
+        return self._measured(results, metrics) if metrics.enabled else results
+
+    def _measured(self, results: Iterator[Any], metrics) -> Iterator[Any]:
+        started = time.perf_counter()
+        yield from results
+        metrics.record_latency('query', time.perf_counter() - started)
+        metrics.record_scan('query', self._scanned)
+
+    def _filtered(self) -> Iterable[dict]:
+        self._scanned = 0
+        filters = list(self._filters)
+        records = None
+
+        # Первое равенство по индексированному полю сужает выборку без полного прохода
+        for i, (field, predicate) in enumerate(filters):
+            if callable(predicate):
+                continue
+            candidates = self._repository._lookup_records(field, predicate)
+            if candidates is not None:
+                records = candidates
+                del filters[i]
+                break
+
+        if records is None:
+            records = self._repository._iter_records()
+        if self._repository.metrics.enabled:
+            records = self._counted(records)
+
+        if not filters:
+            return records
+
+        checks = [(field, predicate if callable(predicate) else _equals(predicate))
+                  for field, predicate in filters]
+        return (record for record in records
+                if all(check(record.get(field)) for field, check in checks))
+
+    def _counted(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            self._scanned += 1
+            yield record
+
+    def _ordered(self, records: Iterable[dict], limit: Optional[int]) -> Iterable[dict]:
+        if not self._ordering:
+            return records
+
+        directions = {reverse for _, reverse in self._ordering}
+        if len(directions) == 1:
+            reverse = directions.pop()
+            key = self._composite_key([field for field, _ in self._ordering], reverse)
+            if limit is not None:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(limit, records, key=key)
+            return sorted(records, key=key, reverse=reverse)
+
+        # Разные направления: устойчивая сортировка с последнего ключа к первому
+        result = list(records)
+        for field, reverse in reversed(self._ordering):
+            result.sort(key=self._composite_key([field], reverse), reverse=reverse)
+        return result[:limit] if limit is not None else result
+
+    def _composite_key(self, fields: List[str], reverse: bool) -> Callable[[dict], tuple]:
+        transforms = [(field, self._repository._sort_keys.get(field, _identity)) for field in fields]
+
+        def key(record: dict) -> tuple:
+            parts = []
+            for field, transform in transforms:
+                value = record.get(field)
+                # None не сравнивается с остальными значениями и идет в конце в обоих
+                # направлениях: при reverse=True признак инвертирован, потому что
+                # сортировка переворачивает весь ключ
+                parts.append((value is None if not reverse else value is not None,
+                              0 if value is None else transform(value)))
+            return tuple(parts)
+
+        return key
+
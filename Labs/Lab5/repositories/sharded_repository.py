@@ -0,0 +1,313 @@
+import bisect
+import hashlib
+import threading
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .base_repository import IDataRepository
+from .instrumentation import NULL_METRICS, RepositoryMetrics
+
+T = TypeVar('T')
+
+
+def _hash(key: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Консистентное хэширование с виртуальными узлами: при смене числа шардов переезжает ~1/N записей"""
+
+    def __init__(self, shard_count: int, replicas: int = 64):
+        if shard_count < 1:
+            raise ValueError("Нужен хотя бы один шард")
+        points = sorted((_hash(f"{shard}:{replica}"), shard)
+                        for shard in range(shard_count) for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: Any) -> int:
+        position = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[position]
+
+
+class _WriteGate:
+    """Разделяемая блокировка записей: записи идут параллельно, решардинг ждет их и не пускает новые"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._writers = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writers -= 1
+                if not self._writers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            # Новые записи ждут уже сейчас, поэтому решардинг не голодает
+            self._exclusive = True
+            while self._writers:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class ShardedRepository(IDataRepository[T]):
+    """Маршрутизирует записи по консистентному хэшу id между несколькими репозиториями
+
+    Поиск по остальным полям идет через подсказку глобального индекса (поле -> шард)
+    с проверкой, а при промахе - параллельным опросом всех шардов.
+    """
+
+    def __init__(self, shards: Sequence[IDataRepository[T]], replicas: int = 64,
+                 global_index_fields: Tuple[str, ...] = (), max_workers: Optional[int] = None,
+                 metrics: Optional[RepositoryMetrics] = None):
+        self.metrics = metrics or NULL_METRICS
+        self._replicas = replicas
+        shards = list(shards)
+        # Шарды и кольцо публикуются одним кортежем: номер шарда всегда берется из того же кольца
+        self._layout: Tuple[List[IDataRepository[T]], HashRing] = (shards, HashRing(len(shards), replicas))
+        self._global_index_fields = global_index_fields
+        self._global_index: Dict[str, Dict[Any, int]] = {field: {} for field in global_index_fields}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or len(shards),
+                                        thread_name_prefix='shard')
+        # Во время решардинга: (старые шарды, старое кольцо) и блокировка переноса записей
+        self._migration: Optional[Tuple[List[IDataRepository[T]], HashRing]] = None
+        self._migration_lock = threading.RLock()
+        # Записи держат разделяемую блокировку, решардинг берет ее монопольно на время смены шардов
+        self._write_gate = _WriteGate()
+
+    @property
+    def shards(self) -> List[IDataRepository[T]]:
+        return list(self._layout[0])
+
+    def shard_for(self, id: Any) -> IDataRepository[T]:
+        return self._route(id)[1]
+
+    def _route(self, id: Any) -> Tuple[int, IDataRepository[T]]:
+        shards, ring = self._layout
+        shard_number = ring.shard_for(id)
+        return shard_number, shards[shard_number]
+
+    def get_all(self) -> Sequence[T]:
+        with self.metrics.operation('get_all'):
+            migrating = self._migration is not None
+            items = chain.from_iterable(self._fan_out(lambda shard: shard.get_all()))
+            return list(self._unique(items, lambda item: item.id) if migrating else items)
+
+    def iter_all(self) -> Iterator[T]:
+        if self._migration is not None:
+            # Прерванный перенос мог оставить копию записи и в старом шарде: новые шарды идут первыми
+            yield from self._unique(chain.from_iterable(shard.get_all() for shard in self._all_shards()),
+                                    lambda item: item.id)
+            return
+        # Записи отдаются по мере готовности шардов, без ожидания самого медленного
+        futures = [self._pool.submit(shard.get_all) for shard in self._all_shards()]
+        for future in as_completed(futures):
+            yield from future.result()
+
+    def get_by_id(self, id: int) -> Optional[T]:
+        with self.metrics.operation('get_by_id'):
+            while True:
+                # Шарды читаются раньше состояния переноса: решардинг меняет их в обратном порядке
+                layout = self._layout
+                migration = self._migration
+                shards, ring = layout
+                item = shards[ring.shard_for(id)].get_by_id(id)
+                if item is None and migration is not None:
+                    old_shards, old_ring = migration
+                    item = old_shards[old_ring.shard_for(id)].get_by_id(id)
+                # Решардинг начался во время поиска: запись могла успеть переехать
+                if item is not None or self._layout is layout:
+                    return item
+
+    def add(self, item: T) -> None:
+        with self._write_guard(), self.metrics.operation('add'):
+            shard_number, shard = self._route(item.id)
+            shard.add(item)
+            self._remember(self._item_to_dict(item), shard_number)
+
+    def restore(self, item: T) -> None:
+        with self._write_guard(), self.metrics.operation('restore'):
+            shard_number, shard = self._route(item.id)
+            shard.restore(item)
+            self._remember(self._item_to_dict(item), shard_number)
+
+    def update(self, item: T) -> None:
+        with self._write_guard(), self.metrics.operation('update'):
+            if self._migration is not None:
+                # Перенос сохраняет версию, поэтому проверка идет по копии в новом шарде
+                self._move_record(item.id)
+            shard_number, shard = self._route(item.id)
+            shard.update(item)
+            self._remember(self._item_to_dict(item), shard_number)
+
+    def delete(self, item: T) -> None:
+        with self._write_guard(), self.metrics.operation('delete'):
+            if self._migration is not None:
+                old_shards, old_ring = self._migration
+                old_shards[old_ring.shard_for(item.id)].delete(item)
+            self.shard_for(item.id).delete(item)
+
+    def subscribe(self, callback) -> Callable[[], None]:
+        """Подписка на все шарды; при решардинге перенос записи виден как delete + add"""
+        unsubscribers = [shard.subscribe(callback) for shard in self._all_shards()]
+
+        def unsubscribe():
+            for unsubscribe_shard in unsubscribers:
+                unsubscribe_shard()
+
+        return unsubscribe
+
+    def find_one(self, field: str, value: Any) -> Optional[T]:
+        with self.metrics.operation(f'find_by_{field}'):
+            records = self._lookup_records(field, value)
+            if records is None:
+                records = (r for r in self._iter_records() if r.get(field) == value)
+            for record in records:
+                return self._dict_to_item(record)
+            return None
+
+    def reshard(self, new_shards: Sequence[IDataRepository[T]],
+                progress: Optional[Callable[[int], None]] = None) -> int:
+        """Онлайн-перенос записей на новый набор шардов; чтение и запись продолжают работать
+
+        Новые записи сразу идут по новому кольцу, чтение при промахе заглядывает в старое.
+        Возвращает число перенесенных записей. Если перенос прервался ошибкой, старые шарды
+        остаются видны, а закончить перенос можно через resume_reshard().
+        """
+        new_shards = list(new_shards)
+        new_ring = HashRing(len(new_shards), self._replicas)
+        # Начатые записи успевают закончиться в старых шардах до их обхода, новые ждут смены
+        with self._write_gate.exclusive(), self._migration_lock:
+            if self._migration is not None:
+                raise ValueError("Решардинг уже идет; прерванный перенос продолжает resume_reshard()")
+            old_shards = self._all_shards()
+            # Сначала состояние переноса, потом новые шарды: увидевший новые шарды видит и старые
+            self._migration = (old_shards, self._layout[1])
+            self._layout = (new_shards, new_ring)
+            old_pool, self._pool = self._pool, ThreadPoolExecutor(
+                max_workers=max(len(new_shards), len(old_shards)), thread_name_prefix='shard')
+            old_pool.shutdown(wait=False)
+            for index in self._global_index.values():
+                index.clear()
+        return self.resume_reshard(progress)
+
+    def resume_reshard(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Переносит записи, оставшиеся в старых шардах; повторный вызов после сбоя безопасен"""
+        migration = self._migration
+        if migration is None:
+            return 0
+        moved = 0
+        for shard in migration[0]:
+            for item in shard.get_all():
+                with self._migration_lock:
+                    if self._move_record(item.id, shard):
+                        moved += 1
+                        if progress is not None:
+                            progress(moved)
+        # Состояние переноса снимается только после успешного прохода: при ошибке
+        # записи в старых шардах должны оставаться видимыми
+        with self._migration_lock:
+            self._migration = None
+        return moved
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def _move_record(self, id: Any, source: Optional[IDataRepository[T]] = None) -> bool:
+        old_shards, old_ring = self._migration
+        source = source or old_shards[old_ring.shard_for(id)]
+        target = self.shard_for(id)
+        if source is target:
+            return False
+        item = source.get_by_id(id)
+        if item is None:
+            return False
+        if target.get_by_id(id) is None:
+            # Отдельная копия: хранилище может поменять версию объекта при добавлении,
+            # а удалять из источника нужно по его собственной версии
+            target.restore(source.get_by_id(id))
+        source.delete(item)
+        return True
+
+    @contextmanager
+    def _write_guard(self):
+        # Состояние переноса читается под разделяемой блокировкой: решардинг не начнется,
+        # пока запись не закончится, а во время переноса записи идут под его блокировкой
+        with self._write_gate.shared():
+            with self._migration_lock if self._migration is not None else nullcontext():
+                yield
+
+    def _all_shards(self) -> List[IDataRepository[T]]:
+        migration = self._migration
+        shards = list(self._layout[0])
+        if migration is not None:
+            shards += [shard for shard in migration[0] if shard not in shards]
+        return shards
+
+    def _fan_out(self, call: Callable[[IDataRepository[T]], Any]) -> List[Any]:
+        return list(self._pool.map(call, self._all_shards()))
+
+    def _remember(self, record: dict, shard_number: int) -> None:
+        for field in self._global_index_fields:
+            self._global_index[field][record.get(field)] = shard_number
+
+    def _iter_records(self) -> Iterable[dict]:
+        records = chain.from_iterable(shard._iter_records() for shard in self._all_shards())
+        return self._unique(records, lambda record: record.get('id')) if self._migration is not None else records
+
+    def _lookup_records(self, field: str, value: Any) -> Optional[Iterable[dict]]:
+        if field == 'id' and self._migration is None:
+            return self.shard_for(value)._lookup_records(field, value)
+
+        shards, ring = self._layout
+        hint = self._global_index.get(field, {}).get(value)
+        if hint is not None and hint < len(shards):
+            records = shards[hint]._lookup_records(field, value)
+            if records:
+                return records
+
+        results = self._fan_out(lambda shard: shard._lookup_records(field, value))
+        if any(result is None for result in results):
+            return None
+        records = [record for result in results for record in result]
+        if self._migration is not None:
+            records = list(self._unique(records, lambda record: record.get('id')))
+        if field in self._global_index and records:
+            owner = ring.shard_for(records[0].get('id'))
+            self._global_index[field][value] = owner
+        return records
+
+    @staticmethod
+    def _unique(items: Iterable[Any], key: Callable[[Any], Any]) -> Iterator[Any]:
+        """Первое вхождение каждого id; _all_shards перечисляет новые шарды раньше старых"""
+        seen = set()
+        for item in items:
+            id = key(item)
+            if id not in seen:
+                seen.add(id)
+                yield item
+
+    def _dict_to_item(self, data: dict) -> T:
+        return self._layout[0][0]._dict_to_item(data)
+
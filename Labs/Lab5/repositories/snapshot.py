@@ -0,0 +1,234 @@
+import json
+import mmap
+import struct
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .file_utils import atomic_write
+
+MAGIC = b'RSNAP\x00\x01\x00'
+_HEADER_SIZE = struct.Struct('<I')
+_BLOCK_SIZE = struct.Struct('<Q')
+_ROW_OFFSETS = 'row_offsets'
+_ROW_DATA = 'row_data'
+
+
+def write_snapshot(path: str, records: Iterable[Any], source: Optional[Sequence[int]] = None) -> int:
+    """Сохраняет записи по столбцам: [MAGIC][len][заголовок JSON]([len][блок])...
+
+    Каждый столбец - отдельный блок с префиксом длины (JSON-массив значений), поэтому
+    читатель разбирает только нужные столбцы. Дополнительно пишутся строки целиком
+    и их смещения, чтобы одну запись можно было собрать, не разбирая остальные столбцы.
+    source - отметка исходного JSON (inode, mtime_ns, размер), с которого снят снимок.
+    """
+    records = list(records)
+    names: Dict[str, None] = {}
+    for record in records:
+        for name in record:
+            names.setdefault(name)
+
+    compact = (',', ':')
+    blocks = [json.dumps([record.get(name) for record in records], separators=compact).encode('utf-8')
+              for name in names]
+
+    rows = [json.dumps([record.get(name) for name in names], separators=compact).encode('utf-8')
+            for record in records]
+    row_offsets, position = [], 0
+    for row in rows:
+        row_offsets.append(position)
+        position += len(row)
+    row_offsets.append(position)
+    blocks.append(json.dumps(row_offsets, separators=compact).encode('utf-8'))
+    blocks.append(b''.join(rows))
+
+    directory, offset = [], 0
+    for name, block in zip(list(names) + [_ROW_OFFSETS, _ROW_DATA], blocks):
+        directory.append({'name': name, 'offset': offset, 'length': len(block)})
+        offset += _BLOCK_SIZE.size + len(block)
+    header = json.dumps({'rows': len(records), 'columns': directory[:-2], 'row_blocks': directory[-2:],
+                         'source': list(source) if source is not None else None})
+    header = header.encode('utf-8')
+
+    parts = [MAGIC, _HEADER_SIZE.pack(len(header)), header]
+    for block in blocks:
+        parts += [_BLOCK_SIZE.pack(len(block)), block]
+    payload = b''.join(parts)
+    atomic_write(path, payload)
+    return len(payload)
+
+
+class SnapshotReader:
+    """Читает снимок через mmap; столбцы разбираются при первом обращении
+
+    close() закрывает отображение явно; разобранные столбцы остаются, поэтому после
+    materialize() и close() уже выданные строки продолжают работать.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: не является снимком репозитория")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._mapped_size = len(self._mm)
+        start = len(MAGIC)
+        header_size, = _HEADER_SIZE.unpack_from(self._mm, start)
+        start += _HEADER_SIZE.size
+        header = json.loads(self._mm[start:start + header_size])
+        data_start = start + header_size
+        source = header.get('source')
+        self.source: Optional[Tuple[int, ...]] = tuple(source) if source else None
+
+        def locate(block):
+            return data_start + block['offset'] + _BLOCK_SIZE.size, block['length']
+
+        self.rows: int = header['rows']
+        self._directory: Dict[str, Tuple[int, int]] = {
+            column['name']: locate(column) for column in header['columns']
+        }
+        self._positions = {name: i for i, name in enumerate(self._directory)}
+        self._row_blocks = {block['name']: locate(block) for block in header['row_blocks']}
+        self._row_offsets: Optional[List[int]] = None
+        self._columns: Dict[str, list] = {}
+
+    @property
+    def mapped_size(self) -> int:
+        return self._mapped_size
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._directory)
+
+    def has_column(self, name: str) -> bool:
+        return name in self._directory
+
+    def column(self, name: str) -> list:
+        values = self._columns.get(name)
+        if values is None:
+            with self._lock:
+                values = self._columns.get(name)
+                if values is None:
+                    if self._closed:
+                        raise ValueError(f"{self.path}: снимок закрыт")
+                    start, length = self._directory[name]
+                    values = json.loads(self._mm[start:start + length])
+                    self._columns[name] = values
+        return values
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._columns
+
+    def column_position(self, name: str) -> int:
+        return self._positions[name]
+
+    def row(self, position: int) -> list:
+        """Значения одной записи в порядке column_names без разбора столбцов"""
+        with self._lock:
+            if not self._closed:
+                if self._row_offsets is None:
+                    start, length = self._row_blocks[_ROW_OFFSETS]
+                    self._row_offsets = json.loads(self._mm[start:start + length])
+                start = self._row_blocks[_ROW_DATA][0]
+                return json.loads(
+                    self._mm[start + self._row_offsets[position]:start + self._row_offsets[position + 1]])
+        # Закрытый снимок: строку собирают разобранные до закрытия столбцы
+        return [self.column(name)[position] for name in self._directory]
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._mm.close()
+
+
+class SnapshotRow(Mapping):
+    """Строка снимка: берет значения из уже разобранных столбцов, остальное - из своей строки"""
+
+    __slots__ = ('_reader', '_position', '_values')
+
+    def __init__(self, reader: SnapshotReader, position: int):
+        self._reader = reader
+        self._position = position
+        self._values: Optional[list] = None
+
+    def __getitem__(self, name: str) -> Any:
+        reader = self._reader
+        if not reader.has_column(name):
+            raise KeyError(name)
+        if reader.is_loaded(name):
+            return reader.column(name)[self._position]
+        if self._values is None:
+            self._values = reader.row(self._position)
+        return self._values[reader.column_position(name)]
+
+    def __contains__(self, name: object) -> bool:
+        return self._reader.has_column(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._reader.column_names)
+
+    def __len__(self) -> int:
+        return len(self._reader.column_names)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class SnapshotRecords(Sequence):
+    """Записи снимка: точечный доступ через SnapshotRow, полный проход собирает dict один раз"""
+
+    def __init__(self, reader: SnapshotReader):
+        self.reader = reader
+        self._materialized: Optional[List[dict]] = None
+
+    def column(self, name: str) -> list:
+        if not self.reader.has_column(name):
+            return [None] * len(self)
+        return self.reader.column(name)
+
+    def materialize(self) -> List[dict]:
+        if self._materialized is None:
+            names = self.reader.column_names
+            columns = [self.reader.column(name) for name in names]
+            self._materialized = [dict(zip(names, values)) for values in zip(*columns)]
+        return self._materialized
+
+    def __getitem__(self, position):
+        if self._materialized is not None or isinstance(position, slice):
+            return self.materialize()[position]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return SnapshotRow(self.reader, position)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return self.reader.rows
+
+    def close(self, keep_records: bool = True) -> None:
+        """Закрывает mmap; keep_records - сначала разобрать все, чтобы выданные строки остались рабочими"""
+        if keep_records and not self.reader.closed:
+            self.materialize()
+        self.reader.close()
+
+    def __enter__(self) -> 'SnapshotRecords':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close(keep_records=False)
+
+
+def read_snapshot(path: str) -> SnapshotRecords:
+    return SnapshotRecords(SnapshotReader(path))
@@ -0,0 +1,115 @@
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .change_feed import ADD, DELETE, UPDATE
+
+T = TypeVar('T')
+
+
+class UniqueConstraintError(Exception):
+    """Значение уникального поля (id, login) уже занято другой записью"""
+
+
+class TransactionError(Exception):
+    pass
+
+
+class Transaction(Generic[T]):
+    """Транзакция над JsonDataRepository со снимковой изоляцией
+
+    Чтение идет из состояния, зафиксированного при открытии транзакции, плюс собственные
+    изменения; чужие коммиты не видны. Запись буферизуется и применяется одним сохранением
+    файла в commit(), где проверяются уникальные поля и конфликты записи (побеждает первый
+    зафиксировавший: если запись изменилась после начала транзакции - ConcurrencyError).
+    """
+
+    def __init__(self, repository, read_only: bool = False):
+        self._repository = repository
+        self._snapshot = repository._load_state()
+        self._read_only = read_only
+        self._writes: Dict[Any, Tuple[str, dict]] = {}
+        self._items: Dict[Any, T] = {}
+        self._on_commit: List[Callable[[], None]] = []
+        self._finished = False
+
+    def __enter__(self) -> 'Transaction[T]':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._finished:
+            return False
+        if exc_type is None and not self._read_only:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def get_by_id(self, id: int) -> Optional[T]:
+        record = self._visible_record(id)
+        return self._repository._dict_to_item(record) if record is not None else None
+
+    def iter_all(self) -> Iterator[T]:
+        to_item = self._repository._dict_to_item
+        for record in self._snapshot.records:
+            if record.get('id') in self._writes:
+                continue
+            yield to_item(record)
+        for op, record in self._writes.values():
+            if op != DELETE:
+                yield to_item(record)
+
+    def get_all(self) -> Sequence[T]:
+        return list(self.iter_all())
+
+    def add(self, item: T) -> None:
+        self._buffer(ADD, item)
+
+    def update(self, item: T) -> None:
+        self._buffer(UPDATE, item)
+
+    def delete(self, item: T) -> None:
+        self._buffer(DELETE, item)
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Действие после успешной фиксации, например запись сессии"""
+        self._on_commit.append(callback)
+
+    def rollback(self) -> None:
+        self._writes.clear()
+        self._items.clear()
+        self._finished = True
+
+    def commit(self) -> None:
+        self._ensure_active()
+        self._finished = True
+        if self._writes:
+            self._repository._commit_transaction(self._snapshot, list(self._writes.items()), self._items)
+        for callback in self._on_commit:
+            callback()
+
+    def _visible_record(self, id: Any) -> Optional[dict]:
+        if id in self._writes:
+            op, record = self._writes[id]
+            return None if op == DELETE else record
+        records = self._snapshot.find('id', id)
+        return records[0] if records else None
+
+    def _buffer(self, op: str, item: T) -> None:
+        self._ensure_active()
+        if self._read_only:
+            raise TransactionError("Транзакция открыта только для чтения")
+        record = self._repository._item_to_dict(item)
+        id = record.get('id')
+        previous = self._writes.get(id)
+        # add + update внутри одной транзакции остается добавлением, add + delete - ничем
+        if previous is not None and previous[0] == ADD:
+            if op == DELETE:
+                del self._writes[id]
+                self._items.pop(id, None)
+                return
+            op = ADD
+        self._writes[id] = (op, record)
+        self._items[id] = item
+
+    def _ensure_active(self) -> None:
+        if self._finished:
+            raise TransactionError("Транзакция уже завершена")
@@ -1,8 +1,12 @@
-from typing import Optional
+from typing import Optional, Sequence
 from abc import ABC, abstractmethod
 from models.user import User
 
-from .base_repository import JsonDataRepository, IDataRepository
+from .async_repository import AsyncDataRepository, AsyncJsonDataRepository
+from .base_repository import JsonDataRepository, IDataRepository, ConflictResolver
+from .codec import StorageCodec
+from .instrumentation import RepositoryMetrics
+from .sharded_repository import ShardedRepository
 
 
 class IUserRepository(IDataRepository[User]):
@@ -12,11 +16,40 @@ class IUserRepository(IDataRepository[User]):
 
 
 class UserRepository(JsonDataRepository[User], IUserRepository):
-    def __init__(self, file_path: str):
-        super().__init__(file_path, User)
+    _indexed_fields = ('id', 'login')
+    _unique_fields = ('id', 'login')
+    # Те же ключи, что и в User.__lt__, но вычисляются один раз на запись
+    _sort_keys = {'name': str.lower}
+
+    def __init__(self, file_path: str, conflict_resolver: Optional[ConflictResolver] = None,
+                 change_feed: bool = False, snapshot: bool = False,
+                 metrics: Optional[RepositoryMetrics] = None, codec: Optional[StorageCodec] = None):
+        super().__init__(file_path, User, conflict_resolver, change_feed, snapshot, metrics, codec)
 
     def get_by_login(self, login: str) -> Optional[User]:
-        for item in self._read_data():
-            if item['login'] == login:
-                return self._dict_to_item(item)
-        return None
+        return self._get_one('get_by_login', 'login', login)
+
+
+class ShardedUserRepository(ShardedRepository[User], IUserRepository):
+    _sort_keys = UserRepository._sort_keys
+
+    def __init__(self, shards: Sequence[IUserRepository], **options):
+        options.setdefault('global_index_fields', ('login',))
+        super().__init__(shards, **options)
+
+    def get_by_login(self, login: str) -> Optional[User]:
+        return self.find_one('login', login)
+
+
+class IAsyncUserRepository(AsyncDataRepository[User]):
+    @abstractmethod
+    async def aget_by_login(self, login: str) -> Optional[User]:
+        pass
+
+
+class AsyncUserRepository(AsyncJsonDataRepository[User], IAsyncUserRepository):
+    def __init__(self, repository: UserRepository, **options):
+        super().__init__(repository, **options)
+
+    async def aget_by_login(self, login: str) -> Optional[User]:
+        return self._first_item(await self._lookup('login', login))
@@ -0,0 +1,33 @@
+"""Перенос пользователей между наборами файлов-шардов
+
+Пример: python reshard.py --source storage/users.json --target storage/users_0.json storage/users_1.json
+"""
+import argparse
+
+from repositories.user_repository import ShardedUserRepository, UserRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', nargs='+', required=True, help="текущие файлы шардов")
+    parser.add_argument('--target', nargs='+', required=True, help="новые файлы шардов")
+    parser.add_argument('--replicas', type=int, default=64, help="виртуальных узлов на шард")
+    args = parser.parse_args()
+
+    # Файлы, присутствующие в обоих списках, остаются теми же объектами-шардами
+    repositories = {path: UserRepository(path) for path in args.source + args.target}
+    sharded = ShardedUserRepository([repositories[path] for path in args.source], replicas=args.replicas)
+
+    def progress(moved: int):
+        if moved % 1000 == 0:
+            print(f"Перенесено записей: {moved}")
+
+    moved = sharded.reshard([repositories[path] for path in args.target], progress=progress)
+    for path in args.target:
+        print(f"{path}: {len(repositories[path].get_all())} записей")
+    print(f"Готово, перенесено записей: {moved}")
+    sharded.close()
+
+
+if __name__ == '__main__':
+    main()
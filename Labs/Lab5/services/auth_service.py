@@ -1,10 +1,15 @@
-import json
-import os
+import asyncio
+import secrets
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
 from typing import Optional
 
 from models.user import User
 from repositories.user_repository import IUserRepository
+from repositories.base_repository import ConcurrencyError
+from services.password_hasher import PasswordHasher
+from services.session_store import ISessionBackend, JournalSessionBackend, Session, SessionCache
 
 
 class IAuthService(ABC):
@@ -18,6 +23,14 @@ class IAuthService(ABC):
     def current_user(self) -> Optional[User]:
         pass
 
+    @abstractmethod
+    def register(self, user: User) -> None:
+        pass
+
+    @abstractmethod
+    async def authenticate(self, login: str, password: str) -> Optional[str]:
+        pass
+
     @abstractmethod
     def sign_in(self, user: User) -> None:
         pass
@@ -28,10 +41,23 @@ class IAuthService(ABC):
 
 
 class AuthService(IAuthService):
-    SESSION_FILE = 'storage/session.json'
-
-    def __init__(self, user_repo: IUserRepository):
+    SESSIONS_JOURNAL = 'storage/sessions.jsonl'
+    SESSION_TTL = 7 * 24 * 3600
+
+    def __init__(self, user_repo: IUserRepository, backend: Optional[ISessionBackend] = None,
+                 session_ttl: float = SESSION_TTL, cache_size: int = 10000,
+                 password_hasher: Optional[PasswordHasher] = None,
+                 verify_executor: Optional[Executor] = None):
+        """verify_executor - пул для проверки паролей; KDF отпускает GIL, поэтому достаточно потоков"""
         self.user_repo = user_repo
+        self._hasher = password_hasher or PasswordHasher()
+        self._verify_executor = verify_executor
+        self._owns_executor = verify_executor is None
+        self._dummy_hash: Optional[str] = None
+        self._backend = backend if backend is not None else JournalSessionBackend(self.SESSIONS_JOURNAL)
+        self._cache = SessionCache(cache_size)
+        self._session_ttl = session_ttl
+        self._token: Optional[str] = None
         self._current_user = None
         self._load_session()
 
@@ -43,31 +69,98 @@ class AuthService(IAuthService):
     def current_user(self) -> Optional[User]:
         return self._current_user
 
+    @property
+    def token(self) -> Optional[str]:
+        return self._token
+
+    def create_session(self, user: User) -> str:
+        session = Session(secrets.token_urlsafe(32), user.id, time.time() + self._session_ttl)
+        self._backend.save(session)
+        self._cache.put(session, self._backend.revision())
+        return session.token
+
+    def validate(self, token: str) -> Optional[User]:
+        # Кэш верен, пока хранилище не менялось; после любой записи (например, выхода
+        # в другом процессе) сессия один раз перепроверяется по хранилищу
+        revision = self._backend.revision()
+        session = self._cache.get(token, revision)
+        if session is None:
+            session = self._backend.load(token)
+            if session is None or session.is_expired():
+                self._cache.pop(token)
+                return None
+            self._cache.put(session, revision)
+        return self.user_repo.get_by_id(session.user_id)
+
+    def end_session(self, token: str) -> None:
+        self._cache.pop(token)
+        self._backend.delete(token)
+
+    def register(self, user: User) -> None:
+        user.password = self._hasher.hash(user.password)
+        self.user_repo.add(user)
+
+    def change_password(self, user: User, new_password: str) -> None:
+        user.password = self._hasher.hash(new_password)
+        self.user_repo.update(user)
+
+    def verify_credentials(self, login: str, password: str) -> Optional[User]:
+        user = self.user_repo.get_by_login(login)
+        if user is None:
+            # Тратим столько же времени, чтобы не выдавать существование логина
+            self._hasher.verify(password, self._get_dummy_hash())
+            return None
+        if not self._hasher.verify(password, user.password):
+            return None
+        if self._hasher.needs_rehash(user.password):
+            try:
+                self.change_password(user, password)
+            except ConcurrencyError:
+                pass
+        return user
+
+    async def authenticate(self, login: str, password: str) -> Optional[str]:
+        """Проверяет пароль в пуле и при успехе возвращает токен новой сессии"""
+        loop = asyncio.get_running_loop()
+        user = await loop.run_in_executor(self._get_executor(), self.verify_credentials, login, password)
+        if user is None:
+            return None
+        return self.create_session(user)
+
+    def close(self) -> None:
+        if self._owns_executor and self._verify_executor is not None:
+            self._verify_executor.shutdown()
+            self._verify_executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._verify_executor is None:
+            self._verify_executor = ThreadPoolExecutor(thread_name_prefix='auth-verify')
+        return self._verify_executor
+
+    def _get_dummy_hash(self) -> str:
+        if self._dummy_hash is None:
+            self._dummy_hash = self._hasher.hash(secrets.token_urlsafe(16))
+        return self._dummy_hash
+
     def sign_in(self, user: User) -> None:
+        if self._token is not None:
+            self.end_session(self._token)
+        self._token = self.create_session(user)
         self._current_user = user
-        self._save_session()
+        self._backend.set_current(self._token)
 
     def sign_out(self) -> None:
+        if self._token is not None:
+            self.end_session(self._token)
+        self._token = None
         self._current_user = None
-        self._clear_session()
-
-    def _save_session(self):
-        os.makedirs('storage', exist_ok=True)
-        if self._current_user:
-            with open(self.SESSION_FILE, 'w') as f:
-                json.dump({'user_id': self._current_user.id}, f)
 
     def _load_session(self):
-        if os.path.exists(self.SESSION_FILE):
-            try:
-                with open(self.SESSION_FILE, 'r') as f:
-                    session = json.load(f)
-                    user = self.user_repo.get_by_id(session['user_id'])
-                    if user:
-                        self._current_user = user
-            except (json.JSONDecodeError, KeyError):
-                self._clear_session()
-
-    def _clear_session(self):
-        if os.path.exists(self.SESSION_FILE):
-            os.remove(self.SESSION_FILE)
+        # Токен текущей сессии хранит бэкенд, поэтому вход не переписывает отдельный файл
+        token = self._backend.get_current()
+        if token is None:
+            return
+        user = self.validate(token)
+        if user:
+            self._token = token
+            self._current_user = user
@@ -0,0 +1,108 @@
+import base64
+import hashlib
+import hmac
+import secrets
+from typing import Optional, Tuple
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4), validate=True)
+
+
+class PasswordHasher:
+    """Хэширование паролей через scrypt (или PBKDF2) с индивидуальной солью и настраиваемой стоимостью
+
+    Формат хранения: scrypt$n$r$p$соль$хэш или pbkdf2_sha256$итерации$соль$хэш,
+    поэтому старые хэши проверяются со своими параметрами после смены стоимости.
+    """
+
+    SCRYPT = 'scrypt'
+    PBKDF2 = 'pbkdf2_sha256'
+
+    def __init__(self, algorithm: str = SCRYPT, n: int = 2 ** 14, r: int = 8, p: int = 1,
+                 iterations: int = 600_000, salt_size: int = 16, key_size: int = 32):
+        if algorithm == self.SCRYPT and not hasattr(hashlib, 'scrypt'):
+            algorithm = self.PBKDF2
+        if algorithm not in (self.SCRYPT, self.PBKDF2):
+            raise ValueError(f"Неизвестный алгоритм хэширования: {algorithm}")
+        self.algorithm = algorithm
+        self.n, self.r, self.p = n, r, p
+        self.iterations = iterations
+        self.salt_size = salt_size
+        self.key_size = key_size
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(self.salt_size)
+        if self.algorithm == self.SCRYPT:
+            key = self._scrypt(password, salt, self.n, self.r, self.p, self.key_size)
+            return f"{self.SCRYPT}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}"
+        key = self._pbkdf2(password, salt, self.iterations, self.key_size)
+        return f"{self.PBKDF2}${self.iterations}${_b64encode(salt)}${_b64encode(key)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        parsed = self._parse(encoded)
+        if parsed is None:
+            if encoded.split('$', 1)[0] in (self.SCRYPT, self.PBKDF2):
+                # Поврежденный хэш не сравнивается как открытый пароль
+                return False
+            # Пароли, сохраненные до появления хэширования
+            return hmac.compare_digest(password.encode('utf-8'), encoded.encode('utf-8'))
+
+        algorithm, params, salt, expected = parsed
+        try:
+            if algorithm == self.SCRYPT:
+                key = self._scrypt(password, salt, *params, len(expected))
+            else:
+                key = self._pbkdf2(password, salt, *params, len(expected))
+        except (ValueError, MemoryError):
+            # Параметры разобрались, но KDF их не принимает (например, n не степень двойки)
+            return False
+        return hmac.compare_digest(key, expected)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        parsed = self._parse(encoded)
+        if parsed is None or parsed[0] != self.algorithm:
+            return True
+        if self.algorithm == self.SCRYPT:
+            return parsed[1] != (self.n, self.r, self.p)
+        return parsed[1] != (self.iterations,)
+
+    @classmethod
+    def is_hashed(cls, value: str) -> bool:
+        return cls._parse(value) is not None
+
+    @classmethod
+    def _parse(cls, value: str) -> Optional[Tuple[str, Tuple[int, ...], bytes, bytes]]:
+        """(алгоритм, параметры, соль, хэш) или None, если строка не в формате хранения"""
+        parts = value.split('$')
+        if parts[0] == cls.SCRYPT and len(parts) == 6:
+            raw_params, raw_salt, raw_key = parts[1:4], parts[4], parts[5]
+        elif parts[0] == cls.PBKDF2 and len(parts) == 4:
+            raw_params, raw_salt, raw_key = parts[1:2], parts[2], parts[3]
+        else:
+            return None
+        if not all(param.isdigit() for param in raw_params):
+            return None
+        params = tuple(int(param) for param in raw_params)
+        try:
+            salt, key = _b64decode(raw_salt), _b64decode(raw_key)
+        except ValueError:
+            return None
+        # Пустой хэш совпал бы с любым паролем
+        if not key or not all(params):
+            return None
+        return parts[0], params, salt, key
+
+    @staticmethod
+    def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, size: int) -> bytes:
+        # maxmem с запасом: scrypt требует ~128 * n * r байт
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p + 1024 * 1024, dklen=size)
+
+    @staticmethod
+    def _pbkdf2(password: str, salt: bytes, iterations: int, size: int) -> bytes:
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, size)
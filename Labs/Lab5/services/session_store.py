@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Hashable, Optional, Tuple
+
+from repositories.file_utils import FileLock, atomic_write
+
+
+@dataclass(slots=True)
+class Session:
+    token: str
+    user_id: int
+    expires_at: float
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires_at
+
+
+class ISessionBackend(ABC):
+    @abstractmethod
+    def load(self, token: str) -> Optional[Session]:
+        pass
+
+    @abstractmethod
+    def save(self, session: Session) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, token: str) -> None:
+        pass
+
+    @abstractmethod
+    def get_current(self) -> Optional[str]:
+        """Токен сессии для автоматической авторизации при запуске"""
+        pass
+
+    @abstractmethod
+    def set_current(self, token: Optional[str]) -> None:
+        pass
+
+    @abstractmethod
+    def revision(self) -> Hashable:
+        """Дешевая отметка состояния: меняется после любой записи, в том числе чужой"""
+        pass
+
+
+class MemorySessionBackend(ISessionBackend):
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+        self._current: Optional[str] = None
+        self._revision = 0
+
+    def load(self, token: str) -> Optional[Session]:
+        return self._sessions.get(token)
+
+    def save(self, session: Session) -> None:
+        self._sessions[session.token] = session
+        self._revision += 1
+
+    def delete(self, token: str) -> None:
+        self._sessions.pop(token, None)
+        if self._current == token:
+            self._current = None
+        self._revision += 1
+
+    def revision(self) -> Hashable:
+        return self._revision
+
+    def get_current(self) -> Optional[str]:
+        return self._current
+
+    def set_current(self, token: Optional[str]) -> None:
+        self._current = token
+
+
+class JournalSessionBackend(ISessionBackend):
+    """Сессии в append-only журнале: вход и выход дописывают одну строку, а не переписывают файл
+
+    Несколько процессов могут делить один журнал: запись идет под FileLock, а чужие строки
+    дочитываются с последнего прочитанного смещения перед каждым чтением. Токен текущей
+    сессии (для автоматической авторизации) тоже хранится в журнале строкой 'current'.
+    """
+
+    def __init__(self, file_path: str, compact_ratio: int = 4):
+        self.file_path = file_path
+        self._compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(file_path + '.lock')
+        self._sessions: Dict[str, Session] = {}
+        self._current: Optional[str] = None
+        self._inode = None
+        self._offset = 0
+        self._journal_lines = 0
+
+    def load(self, token: str) -> Optional[Session]:
+        with self._lock:
+            # Дочитываем всегда: сессию мог завершить другой процесс
+            self._catch_up()
+            return self._sessions.get(token)
+
+    def save(self, session: Session) -> None:
+        with self._lock:
+            self._sessions[session.token] = session
+            self._append({'op': 'put', **asdict(session)})
+
+    def delete(self, token: str) -> None:
+        # Отметка пишется, даже если сессия известна только другому процессу
+        with self._lock:
+            self._sessions.pop(token, None)
+            if self._current == token:
+                self._current = None
+            self._append({'op': 'del', 'token': token})
+
+    def get_current(self) -> Optional[str]:
+        with self._lock:
+            self._catch_up()
+            return self._current
+
+    def set_current(self, token: Optional[str]) -> None:
+        with self._lock:
+            self._current = token
+            self._append({'op': 'current', 'token': token})
+
+    def revision(self) -> Hashable:
+        # Журнал только дописывается или заменяется целиком, поэтому хватает одного stat
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _catch_up(self, allow_compact: bool = True) -> None:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode:
+            # Журнал был сжат (заменен) - перечитываем с начала
+            self._sessions.clear()
+            self._current = None
+            self._inode, self._offset, self._journal_lines = stat.st_ino, 0, 0
+        if stat.st_size <= self._offset:
+            return
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Строка еще дописывается другим процессом
+                    break
+                self._offset += len(line)
+                self._journal_lines += 1
+                self._apply(line)
+
+        if allow_compact and self._journal_lines > self._compact_ratio * max(len(self._sessions), 1) + 100:
+            self._compact()
+
+    def _apply(self, line: bytes) -> None:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        op = entry.get('op')
+        if op == 'put':
+            if entry['expires_at'] > time.time():
+                self._sessions[entry['token']] = Session(entry['token'], entry['user_id'], entry['expires_at'])
+        elif op == 'current':
+            self._current = entry['token']
+        else:
+            self._sessions.pop(entry.get('token'), None)
+            if self._current == entry.get('token'):
+                self._current = None
+
+    def _compact(self) -> None:
+        with self._file_lock:
+            self._catch_up(allow_compact=False)
+            lines = [json.dumps({'op': 'put', **asdict(s)}) + '\n' for s in self._sessions.values()]
+            if self._current in self._sessions:
+                lines.append(json.dumps({'op': 'current', 'token': self._current}) + '\n')
+            payload = ''.join(lines).encode('utf-8')
+            atomic_write(self.file_path, payload)
+            stat = os.stat(self.file_path)
+            self._inode, self._offset, self._journal_lines = stat.st_ino, len(payload), len(lines)
+
+    def _append(self, entry: dict) -> None:
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        with self._file_lock:
+            with open(self.file_path, 'ab') as f:
+                f.write(json.dumps(entry).encode('utf-8') + b'\n')
+
+
+class SessionCache:
+    """LRU-кэш сессий с TTL: проверка токена - один поиск в словаре
+
+    Запись помнит ревизию хранилища, при которой сессия была проверена; get() с другой
+    ревизией считает запись промахом, и сессия перепроверяется по хранилищу.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._sessions: 'OrderedDict[str, Tuple[Session, Hashable]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str, revision: Hashable = None) -> Optional[Session]:
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            session, seen = entry
+            if session.is_expired():
+                del self._sessions[token]
+                return None
+            if seen != revision:
+                return None
+            self._sessions.move_to_end(token)
+            return session
+
+    def put(self, session: Session, revision: Hashable = None) -> None:
+        with self._lock:
+            self._sessions[session.token] = (session, revision)
+            self._sessions.move_to_end(session.token)
+            while len(self._sessions) > self.capacity:
+                self._sessions.popitem(last=False)
+
+    def pop(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
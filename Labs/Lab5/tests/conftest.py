@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули лабораторной импортируются от ее корня, как в demo.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from models.user import User
+from repositories.change_feed import ADD, DELETE
+from repositories.user_repository import AsyncUserRepository, UserRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = AsyncUserRepository(UserRepository(str(tmp_path / 'users.json')), yield_every=2)
+    yield repository
+    repository.close()
+
+
+def test_crud(repository):
+    async def scenario():
+        alice = User(1, 'Alice', 'alice', 'pw')
+        await repository.aadd(alice)
+        await repository.aadd(User(2, 'Bob', 'bob', 'pw'))
+        alice.name = 'Alice A'
+        await repository.aupdate(alice)
+        assert (await repository.aget_by_id(1)).name == 'Alice A'
+        assert (await repository.aget_by_login('bob')).id == 2
+        await repository.adelete(alice)
+        assert await repository.aget_by_id(1) is None
+        return [user.id async for user in repository.aiter_all()]
+
+    assert asyncio.run(scenario()) == [2]
+
+
+def test_callers_get_own_objects(repository):
+    async def scenario():
+        await repository.aadd(User(1, 'Alice', 'alice', 'pw'))
+        return await asyncio.gather(repository.aget_by_id(1), repository.aget_by_id(1))
+
+    first, second = asyncio.run(scenario())
+    assert first is not second and first.id == second.id == 1
+
+
+def test_concurrent_lookups_share_one_load(repository, monkeypatch):
+    loads = []
+    load_state = repository.repository._load_state
+
+    def counted():
+        loads.append(1)
+        return load_state()
+
+    monkeypatch.setattr(repository.repository, '_load_state', counted)
+
+    async def scenario():
+        return await asyncio.gather(*(repository.aget_by_id(1) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [None] * 10
+    assert len(loads) == 1
+
+
+def test_sees_writes_from_other_instance(tmp_path, repository):
+    other = UserRepository(str(tmp_path / 'users.json'))
+    repository._stale_after = 0
+
+    async def scenario():
+        await repository.aadd(User(1, 'Alice', 'alice', 'pw'))
+        other.add(User(2, 'Bob', 'bob', 'pw'))
+        return await repository.aget_by_id(2)
+
+    assert asyncio.run(scenario()).login == 'bob'
+
+
+def test_subscribe_receives_async_writes(repository):
+    events = []
+    unsubscribe = repository.subscribe(events.append)
+
+    async def scenario():
+        alice = User(1, 'Alice', 'alice', 'pw')
+        await repository.aadd(alice)
+        await repository.adelete(alice)
+        unsubscribe()
+        await repository.aadd(User(2, 'Bob', 'bob', 'pw'))
+
+    asyncio.run(scenario())
+    assert [(event.op, event.id) for event in events] == [(ADD, 1), (DELETE, 1)]
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from models.user import User
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService, IAuthService
+from services.password_hasher import PasswordHasher
+from services.session_store import JournalSessionBackend, MemorySessionBackend
+
+
+@pytest.fixture
+def hasher():
+    # Минимальная стоимость KDF, чтобы тесты шли быстро
+    return PasswordHasher(n=2 ** 4, iterations=10)
+
+
+@pytest.fixture
+def auth(tmp_path, hasher):
+    repo = UserRepository(str(tmp_path / 'users.json'))
+    service = AuthService(repo, backend=MemorySessionBackend(), password_hasher=hasher)
+    yield service
+    service.close()
+
+
+def test_interface_methods_are_abstract():
+    assert IAuthService.__abstractmethods__ == {
+        'is_authorized', 'current_user', 'register', 'authenticate', 'sign_in', 'sign_out'}
+    assert not AuthService.__abstractmethods__
+
+
+def test_register_stores_hash_not_password(auth):
+    auth.register(User(1, 'Alice', 'alice', 'secret'))
+    stored = auth.user_repo.get_by_login('alice').password
+    assert stored != 'secret' and PasswordHasher.is_hashed(stored)
+
+
+def test_verify_credentials(auth):
+    auth.register(User(1, 'Alice', 'alice', 'secret'))
+    assert auth.verify_credentials('alice', 'secret').id == 1
+    assert auth.verify_credentials('alice', 'wrong') is None
+    assert auth.verify_credentials('nobody', 'secret') is None
+
+
+def test_legacy_plaintext_password_is_rehashed(auth):
+    auth.user_repo.add(User(1, 'Alice', 'alice', 'secret'))
+    assert auth.verify_credentials('alice', 'secret') is not None
+    assert PasswordHasher.is_hashed(auth.user_repo.get_by_login('alice').password)
+
+
+@pytest.mark.parametrize('encoded', [
+    'scrypt$abc$def$ghi',
+    'scrypt$16$8$1$c2FsdA$',
+    'pbkdf2_sha256$10$c2FsdA',
+    'pbkdf2_sha256$-1$c2FsdA$a2V5',
+    'pbkdf2_sha256$10$c2F*dA$a2V5',
+])
+def test_corrupt_hash_fails_verification(auth, hasher, encoded):
+    assert not hasher.verify('secret', encoded)
+    assert not hasher.verify(encoded, encoded)
+    assert not PasswordHasher.is_hashed(encoded)
+    assert hasher.needs_rehash(encoded)
+    auth.user_repo.add(User(1, 'Alice', 'alice', encoded))
+    assert auth.verify_credentials('alice', 'secret') is None
+    assert asyncio.run(auth.authenticate('alice', encoded)) is None
+
+
+def test_hash_with_params_rejected_by_kdf_fails_verification(hasher):
+    # n не степень двойки: формат верный, но scrypt его не принимает
+    assert not hasher.verify('secret', 'scrypt$15$8$1$c2FsdA$a2V5')
+
+
+def test_authenticate_returns_valid_token(auth):
+    auth.register(User(1, 'Alice', 'alice', 'secret'))
+    token = asyncio.run(auth.authenticate('alice', 'secret'))
+    assert auth.validate(token).login == 'alice'
+    assert asyncio.run(auth.authenticate('alice', 'wrong')) is None
+
+
+@pytest.mark.parametrize('shared_backend', [True, False], ids=['one backend', 'two processes'])
+def test_session_ended_elsewhere_is_not_served_from_cache(tmp_path, hasher, shared_backend):
+    repo = UserRepository(str(tmp_path / 'users.json'))
+    path = str(tmp_path / 'sessions.jsonl')
+    first_backend = JournalSessionBackend(path)
+    second_backend = first_backend if shared_backend else JournalSessionBackend(path)
+    first = AuthService(repo, backend=first_backend, password_hasher=hasher)
+    second = AuthService(repo, backend=second_backend, password_hasher=hasher)
+    first.register(User(1, 'Alice', 'alice', 'secret'))
+    token = first.create_session(repo.get_by_id(1))
+    assert second.validate(token).id == 1
+    assert second.validate(token).id == 1
+
+    first.end_session(token)
+    assert second.validate(token) is None
+    first.close()
+    second.close()
+
+
+def test_memory_backend_revocation_is_seen_by_other_service(tmp_path, hasher):
+    repo = UserRepository(str(tmp_path / 'users.json'))
+    backend = MemorySessionBackend()
+    first = AuthService(repo, backend=backend, password_hasher=hasher)
+    second = AuthService(repo, backend=backend, password_hasher=hasher)
+    first.register(User(1, 'Alice', 'alice', 'secret'))
+    token = first.create_session(repo.get_by_id(1))
+    assert second.validate(token) is not None
+    first.end_session(token)
+    assert second.validate(token) is None
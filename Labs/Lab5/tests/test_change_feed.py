@@ -0,0 +1,96 @@
+import pytest
+
+from models.user import User
+from repositories.base_repository import IDataRepository
+from repositories.change_feed import ADD, DELETE, UPDATE
+from repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return UserRepository(str(tmp_path / 'users.json'), change_feed=True)
+
+
+def _write(repository):
+    alice = User(1, 'Alice', 'alice', 'pw')
+    repository.add(alice)
+    alice.name = 'Alice A'
+    repository.update(alice)
+    repository.delete(alice)
+
+
+def test_subscribers_receive_events_in_order(repository):
+    events = []
+    repository.subscribe(events.append)
+    _write(repository)
+    assert [(event.op, event.id) for event in events] == [(ADD, 1), (UPDATE, 1), (DELETE, 1)]
+    assert events[1].before['name'] == 'Alice' and events[1].after['name'] == 'Alice A'
+    assert events[2].after is None
+
+
+def test_unsubscribe_stops_delivery(repository):
+    events = []
+    unsubscribe = repository.subscribe(events.append)
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    unsubscribe()
+    repository.add(User(2, 'Bob', 'bob', 'pw'))
+    assert [event.id for event in events] == [1]
+
+
+def test_failing_subscriber_does_not_break_writes(repository):
+    events = []
+
+    def broken(event):
+        raise RuntimeError
+
+    repository.subscribe(broken)
+    repository.subscribe(events.append)
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    assert repository.get_by_id(1) is not None
+    assert len(events) == 1
+
+
+def test_events_are_copies(repository):
+    repository.subscribe(lambda event: event.after.update(name='Changed'))
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    assert repository.get_by_id(1).name == 'Alice'
+
+
+def test_feed_is_read_from_offset(repository):
+    _write(repository)
+    events, offset = repository.read_changes(limit=2)
+    assert [event.op for event in events] == [ADD, UPDATE]
+    assert events[-1].offset == offset
+    rest, end = repository.read_changes(offset)
+    assert [event.op for event in rest] == [DELETE]
+    assert repository.read_changes(end) == ([], end)
+
+
+def test_feed_survives_reopen_and_records_transactions(tmp_path, repository):
+    with repository.transaction() as transaction:
+        transaction.add(User(1, 'Alice', 'alice', 'pw'))
+        transaction.add(User(2, 'Bob', 'bob', 'pw'))
+    reopened = UserRepository(str(tmp_path / 'users.json'), change_feed=True)
+    events, _ = reopened.read_changes()
+    assert sorted(event.id for event in events) == [1, 2]
+
+
+def test_feed_skips_partial_last_line(tmp_path, repository):
+    _write(repository)
+    with open(str(tmp_path / 'users.json.changes'), 'ab') as f:
+        f.write(b'{"op": "add"')
+    events, _ = repository.read_changes()
+    assert len(events) == 3
+
+
+def test_read_changes_without_feed_raises(tmp_path):
+    with pytest.raises(ValueError):
+        UserRepository(str(tmp_path / 'plain.json')).read_changes()
+
+
+def test_repository_without_publisher_cannot_be_created():
+    class ReadOnlyRepository(IDataRepository[User]):
+        get_all = get_by_id = add = update = delete = _dict_to_item = lambda self, *args: None
+
+    with pytest.raises(TypeError, match='subscribe'):
+        ReadOnlyRepository()
@@ -0,0 +1,57 @@
+import pytest
+
+from models.user import User
+from repositories.codec import ChecksumError, StorageCodec, detect_compression
+from repositories.user_repository import UserRepository
+
+RECORDS = [{'id': i, 'name': f'User {i}', 'tags': ['a', 'b']} for i in range(50)]
+
+
+@pytest.mark.parametrize('codec', [
+    StorageCodec(),
+    StorageCodec(indent=2),
+    StorageCodec(checksums=True),
+    StorageCodec('zlib'),
+    StorageCodec('gzip', checksums=True),
+    StorageCodec('lzma', level=1),
+], ids=repr)
+def test_round_trip_and_any_codec_reads_it(codec):
+    payload = codec.encode(RECORDS)
+    assert codec.decode(payload) == RECORDS
+    assert StorageCodec().decode(payload) == RECORDS
+    assert detect_compression(payload) == codec.compression
+
+
+def test_compression_shrinks_payload():
+    assert len(StorageCodec('zlib').encode(RECORDS)) < len(StorageCodec().encode(RECORDS))
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        StorageCodec('brotli')
+
+
+def test_corrupted_record_is_detected():
+    payload = StorageCodec(checksums=True).encode(RECORDS)
+    corrupted = payload.replace(b'User 7"', b'User 8"')
+    with pytest.raises(ChecksumError):
+        StorageCodec().decode(corrupted)
+
+
+def test_truncated_file_is_detected():
+    payload = StorageCodec(checksums=True).encode(RECORDS)
+    truncated = payload[:payload.rindex(b'\n', 0, len(payload) - 1) + 1]
+    with pytest.raises(ChecksumError):
+        StorageCodec().decode(truncated)
+
+
+def test_repository_reads_file_written_with_other_codec(tmp_path):
+    path = str(tmp_path / 'users.json')
+    compressed = UserRepository(path, codec=StorageCodec('gzip', checksums=True))
+    compressed.add(User(1, 'Alice', 'alice', 'pw'))
+    with open(path, 'rb') as f:
+        assert detect_compression(f.read()) == 'gzip'
+    plain = UserRepository(path)
+    assert plain.get_by_login('alice').id == 1
+    plain.add(User(2, 'Bob', 'bob', 'pw'))
+    assert [user.id for user in compressed.get_all()] == [1, 2]
@@ -0,0 +1,97 @@
+import os
+import threading
+
+import pytest
+
+from models.user import User
+from repositories.base_repository import ConcurrencyError
+from repositories.file_utils import atomic_write
+from repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'users.json')
+
+
+def test_versions_increase_with_each_write(path):
+    repository = UserRepository(path)
+    alice = User(1, 'Alice', 'alice', 'pw')
+    repository.add(alice)
+    assert alice.version == 1
+    alice.name = 'Alice A'
+    repository.update(alice)
+    assert alice.version == 2
+    assert repository.get_by_id(1).version == 2
+
+
+def test_stale_update_raises(path):
+    first, second = UserRepository(path), UserRepository(path)
+    first.add(User(1, 'Alice', 'alice', 'pw'))
+    mine, theirs = first.get_by_id(1), second.get_by_id(1)
+    theirs.name = 'Theirs'
+    second.update(theirs)
+    mine.name = 'Mine'
+    with pytest.raises(ConcurrencyError):
+        first.update(mine)
+    assert first.get_by_id(1).name == 'Theirs'
+
+
+def test_stale_delete_raises(path):
+    repository = UserRepository(path)
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    stale = repository.get_by_id(1)
+    fresh = repository.get_by_id(1)
+    fresh.name = 'Fresh'
+    repository.update(fresh)
+    with pytest.raises(ConcurrencyError):
+        repository.delete(stale)
+    assert repository.get_by_id(1) is not None
+
+
+def test_conflict_resolver_merges(path):
+    def resolver(current, incoming):
+        merged = dict(current)
+        merged['email'] = incoming['email']
+        return merged
+
+    first, second = UserRepository(path, conflict_resolver=resolver), UserRepository(path)
+    first.add(User(1, 'Alice', 'alice', 'pw'))
+    mine, theirs = first.get_by_id(1), second.get_by_id(1)
+    theirs.name = 'Theirs'
+    second.update(theirs)
+    mine.email = 'alice@example.com'
+    first.update(mine)
+    stored = second.get_by_id(1)
+    assert (stored.name, stored.email, stored.version) == ('Theirs', 'alice@example.com', 3)
+
+
+def test_concurrent_adds_from_two_instances_are_not_lost(path):
+    repositories = [UserRepository(path), UserRepository(path)]
+
+    def add(repository, start):
+        for i in range(start, start + 20):
+            repository.add(User(i, f'User {i}', f'user{i}', 'pw'))
+
+    threads = [threading.Thread(target=add, args=(repository, start))
+               for repository, start in zip(repositories, (0, 100))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(UserRepository(path).get_all()) == 40
+
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path, monkeypatch):
+    target = str(tmp_path / 'data.json')
+    atomic_write(target, b'old')
+
+    def fail(*args):
+        raise OSError("диск полон")
+
+    monkeypatch.setattr(os, 'replace', fail)
+    with pytest.raises(OSError):
+        atomic_write(target, b'new')
+    with open(target, 'rb') as f:
+        assert f.read() == b'old'
+    assert os.listdir(tmp_path) == ['data.json']
@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from models.user import User
+from repositories.hydration import Hydrator, LazyRecord, hydrator_for
+from repositories.user_repository import UserRepository
+
+
+@dataclass
+class Item:
+    id: int
+    tags: List[str] = field(default_factory=list)
+    label: str = 'item'
+    key: str = field(default='', kw_only=True)
+
+
+class Plain:
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+def test_round_trip_with_defaults():
+    hydrator = Hydrator(Item)
+    item = hydrator.to_item({'id': 1, 'key': 'k'})
+    assert (item.id, item.tags, item.label, item.key) == (1, [], 'item', 'k')
+    assert hydrator.to_item({'id': 2}).tags is not item.tags
+    assert hydrator.to_dict(item) == {'id': 1, 'tags': [], 'label': 'item', 'key': 'k'}
+
+
+def test_plain_class_uses_constructor_and_vars():
+    hydrator = Hydrator(Plain)
+    item = hydrator.to_item({'id': 1, 'name': 'x'})
+    assert hydrator.to_dict(item) == {'id': 1, 'name': 'x'}
+
+
+def test_hydrator_is_cached_per_class():
+    assert hydrator_for(User) is hydrator_for(User)
+
+
+def test_user_uses_slots():
+    assert not hasattr(User(1, 'A', 'a', 'pw'), '__dict__')
+
+
+def test_lazy_record_reads_fields_without_building_object():
+    record = LazyRecord({'id': 1}, hydrator_for(Item))
+    assert record.id == 1
+    assert record.label == 'item'
+    assert object.__getattribute__(record, '_item') is None
+    record.label = 'changed'
+    assert record.materialize().label == 'changed'
+    assert record == Item(1, label='changed')
+
+
+def test_repository_iter_lazy(tmp_path):
+    repository = UserRepository(str(tmp_path / 'users.json'))
+    repository.add(User(1, 'Bob', 'bob', 'pw'))
+    repository.add(User(2, 'alice', 'alice', 'pw'))
+    records = list(repository.iter_lazy())
+    assert [record.login for record in records] == ['bob', 'alice']
+    assert sorted(records)[0].login == 'alice'
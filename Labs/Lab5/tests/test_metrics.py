@@ -0,0 +1,44 @@
+import logging
+
+from models.user import User
+from repositories.instrumentation import LatencyHistogram, RepositoryMetrics
+from repositories.user_repository import UserRepository
+
+
+def test_operations_are_counted(tmp_path):
+    metrics = RepositoryMetrics(slow_threshold=None)
+    repository = UserRepository(str(tmp_path / 'users.json'), metrics=metrics)
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    repository.get_by_id(1)
+    repository.get_all()
+    report = metrics.report()
+    assert {'add', 'get_by_id', 'get_all'} <= set(report['operations'])
+    assert report['operations']['get_by_id']['count'] == 1
+    assert report['bytes_written'] > 0
+
+
+def test_slow_operations_are_logged(caplog):
+    metrics = RepositoryMetrics(slow_threshold=0.0, name='users')
+    with caplog.at_level(logging.WARNING, logger='repositories.slow'):
+        with metrics.operation('get_all'):
+            pass
+    assert 'users.get_all' in caplog.text
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    assert histogram.count == 100
+    # Граница корзины - степень двойки, поэтому не дальше чем в 2 раза от точного значения
+    assert 0.050 <= histogram.percentile(0.5) < 0.100
+    assert 0.099 <= histogram.percentile(0.99) <= histogram.max == 0.1
+
+
+def test_cache_hit_ratio():
+    metrics = RepositoryMetrics()
+    assert metrics.cache_hit_ratio == 0.0
+    metrics.cache_hit()
+    metrics.cache_hit()
+    metrics.cache_miss()
+    assert metrics.cache_hit_ratio == 2 / 3
@@ -0,0 +1,62 @@
+import pytest
+
+from models.user import User
+from repositories.instrumentation import RepositoryMetrics
+from repositories.user_repository import UserRepository
+
+NAMES = ['carol', 'Alice', 'bob', 'Dave', 'eve']
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = UserRepository(str(tmp_path / 'users.json'), metrics=RepositoryMetrics(slow_threshold=None))
+    for i, name in enumerate(NAMES):
+        repository.add(User(i, name, name.lower(), 'pw', email=f'{name.lower()}@example.com' if i % 2 else None))
+    return repository
+
+
+def test_where_by_value_and_predicate(repository):
+    assert [user.id for user in repository.where('login', 'bob')] == [2]
+    assert sorted(user.id for user in repository.where('id', lambda id: id >= 3)) == [3, 4]
+    assert repository.where('email', None).count() == 3
+
+
+def test_indexed_equality_does_not_scan_everything(repository):
+    repository.where('login', 'dave').all()
+    assert repository.metrics.scanned['query'] == 1
+
+
+def test_order_uses_repository_sort_keys(repository):
+    assert [user.name for user in repository.order_by('name')] == ['Alice', 'bob', 'carol', 'Dave', 'eve']
+    assert repository.order_by('name', reverse=True).first().name == 'eve'
+
+
+def test_none_sorts_last_and_mixed_directions(repository):
+    ordered = repository.query().order_by('email').order_by('id', reverse=True).select('id').all()
+    assert ordered == [{'id': 1}, {'id': 3}, {'id': 4}, {'id': 2}, {'id': 0}]
+
+
+def test_none_sorts_last_in_reverse_order(repository):
+    assert [user.id for user in repository.order_by('email', reverse=True)] == [3, 1, 0, 2, 4]
+    assert [user.id for user in repository.order_by('email', reverse=True).limit(3)] == [3, 1, 0]
+    mixed = repository.query().order_by('email', reverse=True).order_by('id').select('id').all()
+    assert mixed == [{'id': 3}, {'id': 1}, {'id': 0}, {'id': 2}, {'id': 4}]
+
+
+def test_first_does_not_change_query(repository):
+    query = repository.order_by('name')
+    assert query.first().name == 'Alice'
+    assert len(query.all()) == 5
+    assert repository.limit(0).first() is None
+
+
+def test_limit_with_and_without_order(repository):
+    assert len(repository.limit(2).all()) == 2
+    assert [user.id for user in repository.order_by('id', reverse=True).limit(2)] == [4, 3]
+    with pytest.raises(ValueError):
+        repository.limit(-1)
+
+
+def test_select_projects_fields(repository):
+    assert repository.where('id', 1).select('name', 'email').all() == [
+        {'name': 'Alice', 'email': 'alice@example.com'}]
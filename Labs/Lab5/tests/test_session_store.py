@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from models.user import User
+from repositories.user_repository import UserRepository
+from services.auth_service import AuthService
+from services.password_hasher import PasswordHasher
+from services.session_store import JournalSessionBackend, Session, SessionCache
+
+
+def _session(token: str, ttl: float = 3600) -> Session:
+    return Session(token, 1, time.time() + ttl)
+
+
+def test_delete_from_other_instance_is_journaled(tmp_path):
+    path = str(tmp_path / 'sessions.jsonl')
+    first, second = JournalSessionBackend(path), JournalSessionBackend(path)
+    first.save(_session('t1'))
+    assert first.load('t1') is not None
+    # Второй экземпляр токен не загружал, но удаление все равно должно дойти до первого
+    second.delete('t1')
+    assert first.load('t1') is None
+
+
+def test_current_token_survives_restart(tmp_path):
+    path = str(tmp_path / 'sessions.jsonl')
+    backend = JournalSessionBackend(path)
+    backend.save(_session('t1'))
+    backend.set_current('t1')
+    assert JournalSessionBackend(path).get_current() == 't1'
+    backend.delete('t1')
+    assert JournalSessionBackend(path).get_current() is None
+
+
+def test_compaction_keeps_sessions_and_current(tmp_path):
+    path = str(tmp_path / 'sessions.jsonl')
+    backend = JournalSessionBackend(path, compact_ratio=1)
+    for i in range(200):
+        backend.save(_session(f't{i}'))
+        if i:
+            backend.delete(f't{i - 1}')
+    backend.set_current('t199')
+    backend.load('missing')
+    reopened = JournalSessionBackend(path)
+    assert reopened.load('t199') is not None
+    assert reopened.load('t0') is None
+    assert reopened.get_current() == 't199'
+
+
+def test_expired_session_is_not_returned_from_cache():
+    cache = SessionCache()
+    cache.put(_session('old', ttl=-1))
+    assert cache.get('old') is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SessionCache(capacity=2)
+    for token in ('a', 'b'):
+        cache.put(_session(token))
+    cache.get('a')
+    cache.put(_session('c'))
+    assert cache.get('b') is None and cache.get('a') is not None
+
+
+@pytest.fixture
+def make_auth(tmp_path):
+    repo = UserRepository(str(tmp_path / 'users.json'))
+    repo.add(User(1, 'Alice', 'alice', 'secret'))
+    services = []
+
+    def make():
+        service = AuthService(repo, backend=JournalSessionBackend(str(tmp_path / 'sessions.jsonl')),
+                              password_hasher=PasswordHasher(n=2 ** 4))
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.close()
+
+
+def test_sign_in_is_restored_through_backend(tmp_path, make_auth):
+    auth = make_auth()
+    auth.sign_in(auth.user_repo.get_by_id(1))
+    assert not (tmp_path / 'session.json').exists()
+    restored = make_auth()
+    assert restored.is_authorized and restored.token == auth.token
+    restored.sign_out()
+    assert not make_auth().is_authorized
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from models.user import User
+from repositories.base_repository import ConcurrencyError
+from repositories.user_repository import ShardedUserRepository, UserRepository
+
+
+def _shards(tmp_path, prefix, count, shard_class=UserRepository):
+    return [shard_class(str(tmp_path / f'{prefix}_{i}.json')) for i in range(count)]
+
+
+def _fill(sharded, count=20):
+    for i in range(count):
+        sharded.add(User(i, f'User {i}', f'user{i}', 'pw'))
+
+
+class FlakyRepository(UserRepository):
+    """Шард, удаление из которого падает после заданного числа успешных вызовов"""
+    fail_after = None
+
+    def delete(self, item):
+        if FlakyRepository.fail_after is not None:
+            if FlakyRepository.fail_after == 0:
+                raise OSError("диск недоступен")
+            FlakyRepository.fail_after -= 1
+        super().delete(item)
+
+
+class SlowAddRepository(UserRepository):
+    """Шард, добавление в который сообщает о начале и идет медленно"""
+    adding = None
+
+    def add(self, item):
+        if SlowAddRepository.adding is not None:
+            SlowAddRepository.adding.set()
+            time.sleep(0.05)
+        super().add(item)
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    repository = ShardedUserRepository(_shards(tmp_path, 'old', 2))
+    yield repository
+    repository.close()
+
+
+def test_add_and_find(sharded):
+    _fill(sharded)
+    assert len(sharded.get_all()) == 20
+    assert sharded.get_by_id(7).login == 'user7'
+    assert sharded.get_by_login('user13').id == 13
+
+
+def test_reshard_after_update_keeps_versions(tmp_path, sharded):
+    _fill(sharded)
+    user = sharded.get_by_id(3)
+    user.name = 'Renamed'
+    sharded.update(user)
+    sharded.update(user)
+
+    moved = sharded.reshard(_shards(tmp_path, 'new', 3))
+    assert moved > 0
+    assert len(sharded.get_all()) == 20
+    moved_user = sharded.get_by_id(3)
+    assert moved_user.name == 'Renamed' and moved_user.version == user.version == 3
+    # Объект, прочитанный до переноса, по-прежнему можно обновить
+    user.email = 'renamed@example.com'
+    sharded.update(user)
+    assert sharded.get_by_id(3).email == 'renamed@example.com'
+
+
+def test_stale_update_is_still_rejected_after_reshard(tmp_path, sharded):
+    _fill(sharded)
+    stale = sharded.get_by_id(5)
+    fresh = sharded.get_by_id(5)
+    sharded.update(fresh)
+    sharded.reshard(_shards(tmp_path, 'new', 3))
+    with pytest.raises(ConcurrencyError):
+        sharded.update(stale)
+
+
+def test_update_during_migration_moves_record(tmp_path):
+    sharded = ShardedUserRepository(_shards(tmp_path, 'old', 2, FlakyRepository))
+    _fill(sharded)
+    for i in range(20):
+        user = sharded.get_by_id(i)
+        sharded.update(user)
+    FlakyRepository.fail_after = 0
+    try:
+        with pytest.raises(OSError):
+            sharded.reshard(_shards(tmp_path, 'new', 3))
+    finally:
+        FlakyRepository.fail_after = None
+
+    # Перенос прерван: все записи видны, обновление переносит запись в новый шард
+    assert len(sharded.get_all()) == 20
+    for i in range(20):
+        user = sharded.get_by_id(i)
+        user.name = f'Updated {i}'
+        sharded.update(user)
+    assert all(user.name.startswith('Updated') for user in sharded.get_all())
+    sharded.close()
+
+
+def test_failed_reshard_can_be_resumed(tmp_path):
+    sharded = ShardedUserRepository(_shards(tmp_path, 'old', 2, FlakyRepository))
+    _fill(sharded)
+    FlakyRepository.fail_after = 3
+    try:
+        with pytest.raises(OSError):
+            sharded.reshard(_shards(tmp_path, 'new', 3))
+    finally:
+        FlakyRepository.fail_after = None
+
+    assert len(sharded.get_all()) == 20
+    assert all(sharded.get_by_id(i) is not None for i in range(20))
+    with pytest.raises(ValueError):
+        sharded.reshard(_shards(tmp_path, 'other', 2))
+
+    sharded.resume_reshard()
+    assert len(sharded.get_all()) == 20
+    old_records = sum(len(shard.get_all()) for shard in _shards(tmp_path, 'old', 2))
+    assert old_records == 0
+    sharded.close()
+
+
+def test_add_during_reshard_is_not_stranded(tmp_path):
+    sharded = ShardedUserRepository(_shards(tmp_path, 'old', 2, SlowAddRepository))
+    _fill(sharded)
+    old = sharded.shards
+    SlowAddRepository.adding = threading.Event()
+    errors = []
+
+    def add():
+        try:
+            sharded.add(User(100, 'User 100', 'user100', 'pw'))
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=add)
+    try:
+        writer.start()
+        # Шард для записи уже выбран по старому кольцу, а решардинг начинается
+        assert SlowAddRepository.adding.wait(5)
+        sharded.reshard(_shards(tmp_path, 'new', 3))
+        writer.join(5)
+    finally:
+        SlowAddRepository.adding = None
+
+    assert errors == []
+    assert sharded.get_by_id(100) is not None
+    assert sorted(user.id for user in sharded.get_all()) == list(range(20)) + [100]
+    assert all(shard.get_all() == [] for shard in old)
+    sharded.close()
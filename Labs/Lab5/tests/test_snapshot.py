@@ -0,0 +1,70 @@
+import os
+
+from models.user import User
+from repositories.snapshot import SnapshotRecords, read_snapshot, write_snapshot
+from repositories.user_repository import UserRepository
+
+
+def _fill(repository, count=5):
+    for i in range(count):
+        repository.add(User(i, f'User {i}', f'user{i}', 'pw', email=f'user{i}@example.com'))
+
+
+def test_columns_and_rows_roundtrip(tmp_path):
+    path = str(tmp_path / 'records.snap')
+    records = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b', 'email': 'b@example.com'}]
+    write_snapshot(path, records)
+    with read_snapshot(path) as snapshot:
+        assert snapshot[1]['email'] == 'b@example.com'
+        assert snapshot[0]['email'] is None
+        assert snapshot.column('id') == [1, 2]
+        assert snapshot.reader.source is None
+
+
+def test_fresh_snapshot_is_used_on_load(tmp_path):
+    path = str(tmp_path / 'users.json')
+    _fill(UserRepository(path, snapshot=True))
+    repository = UserRepository(path)
+    assert isinstance(repository._load_state().records, SnapshotRecords)
+    assert repository.get_by_login('user3').id == 3
+    repository.close()
+
+
+def test_stale_snapshot_is_ignored_even_with_newer_mtime(tmp_path):
+    path = str(tmp_path / 'users.json')
+    _fill(UserRepository(path, snapshot=True))
+    # Другой экземпляр без снимков меняет JSON; грубое mtime делает снимок "не старше" файла
+    UserRepository(path).add(User(99, 'Late', 'late', 'pw'))
+    json_mtime = os.stat(path).st_mtime_ns
+    os.utime(path + '.snap', ns=(json_mtime, json_mtime))
+
+    repository = UserRepository(path)
+    assert not isinstance(repository._load_state().records, SnapshotRecords)
+    assert repository.get_by_id(99) is not None
+    assert len(repository.get_all()) == 6
+
+
+def test_replaced_state_closes_mmap_but_keeps_handed_out_rows(tmp_path):
+    path = str(tmp_path / 'users.json')
+    _fill(UserRepository(path, snapshot=True))
+    repository = UserRepository(path, snapshot=True)
+    old_records = repository._load_state().records
+    lazy = list(repository.iter_lazy())
+    with repository.transaction(read_only=True) as tx:
+        repository.add(User(10, 'New', 'new', 'pw'))
+        assert old_records.reader.closed
+        assert tx.get_by_id(2).login == 'user2'
+    assert [user.login for user in lazy] == [f'user{i}' for i in range(5)]
+    assert repository.get_by_id(10).login == 'new'
+    repository.close()
+
+
+def test_export_and_import_snapshot(tmp_path):
+    source = UserRepository(str(tmp_path / 'source.json'))
+    _fill(source)
+    snapshot_path = str(tmp_path / 'export.snap')
+    source.export_snapshot(snapshot_path)
+
+    target = UserRepository(str(tmp_path / 'target.json'))
+    assert target.import_snapshot(snapshot_path) == 5
+    assert target.get_by_login('user4').email == 'user4@example.com'
@@ -0,0 +1,91 @@
+import pytest
+
+from models.user import User
+from repositories.base_repository import ConcurrencyError
+from repositories.transaction import TransactionError, UniqueConstraintError
+from repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = UserRepository(str(tmp_path / 'users.json'))
+    repository.add(User(1, 'Alice', 'alice', 'pw'))
+    repository.add(User(2, 'Bob', 'bob', 'pw'))
+    yield repository
+    repository.close()
+
+
+def test_writes_are_applied_on_commit(repository):
+    with repository.transaction() as transaction:
+        transaction.add(User(3, 'Carol', 'carol', 'pw'))
+        transaction.delete(repository.get_by_id(2))
+        assert transaction.get_by_id(3).login == 'carol'
+        assert transaction.get_by_id(2) is None
+        assert repository.get_by_id(3) is None
+    assert repository.get_by_id(3).login == 'carol'
+    assert repository.get_by_id(2) is None
+
+
+def test_exception_rolls_back(repository):
+    with pytest.raises(RuntimeError):
+        with repository.transaction() as transaction:
+            transaction.add(User(3, 'Carol', 'carol', 'pw'))
+            raise RuntimeError
+    assert repository.get_by_id(3) is None
+
+
+def test_reads_see_snapshot_not_later_commits(repository):
+    with repository.transaction(read_only=True) as transaction:
+        repository.add(User(3, 'Carol', 'carol', 'pw'))
+        assert transaction.get_by_id(3) is None
+        assert sorted(user.id for user in transaction.iter_all()) == [1, 2]
+
+
+def test_read_only_transaction_rejects_writes(repository):
+    with repository.transaction(read_only=True) as transaction:
+        with pytest.raises(TransactionError):
+            transaction.add(User(3, 'Carol', 'carol', 'pw'))
+
+
+def test_first_committer_wins(repository):
+    first = repository.transaction()
+    second = repository.transaction()
+    alice = first.get_by_id(1)
+    alice.name = 'Alice A'
+    first.update(alice)
+    other = second.get_by_id(1)
+    other.name = 'Alice B'
+    second.update(other)
+    first.commit()
+    with pytest.raises(ConcurrencyError):
+        second.commit()
+    assert repository.get_by_id(1).name == 'Alice A'
+
+
+def test_unique_login_is_checked_on_commit(repository):
+    with pytest.raises(UniqueConstraintError):
+        with repository.transaction() as transaction:
+            transaction.add(User(3, 'Other Alice', 'alice', 'pw'))
+    assert repository.get_by_id(3) is None
+
+
+def test_add_then_delete_is_a_no_op(repository):
+    with repository.transaction() as transaction:
+        carol = User(3, 'Carol', 'carol', 'pw')
+        transaction.add(carol)
+        transaction.delete(carol)
+    assert repository.get_by_id(3) is None
+
+
+def test_on_commit_runs_only_after_commit(repository):
+    calls = []
+    with repository.transaction() as transaction:
+        transaction.on_commit(lambda: calls.append('committed'))
+        assert calls == []
+    assert calls == ['committed']
+    transaction = repository.transaction()
+    transaction.on_commit(lambda: calls.append('again'))
+    transaction.rollback()
+    assert calls == ['committed']
+    with pytest.raises(TransactionError):
+        transaction.commit()
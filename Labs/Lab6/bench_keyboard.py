@@ -0,0 +1,143 @@
+"""Нагрузочный тест клавиатуры: результаты в JSON для отслеживания регрессий
+
+Измеряет:
+  keys_per_second   - нажатия через Keyboard.press_key (символы и привязки)
+  undo_redo         - задержка undo/redo при глубине истории от 10 до 1M шагов
+  output_io         - время OutputManager на запись в файл в режимах full и diff
+  text_model        - печать с отменой напрямую в TextBuffer
+
+Консольный вывод везде отключен (echo=False), сообщения Keyboard подавляются.
+Запуск: python bench_keyboard.py [--keys 200000] [--depths 10 1000 100000 1000000] [--output FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import bench_text
+from keyboard import Keyboard
+from output_manager import NullSink, OutputManager
+from text_buffer import TextBuffer
+
+
+def _keyboard(log_mode: str = "diff", sink=None, filename: str = "output.txt") -> Keyboard:
+    output_manager = OutputManager(filename, echo=False, log_mode=log_mode, sink=sink)
+    return Keyboard(history_capacity=2_000_000, output_manager=output_manager)
+
+
+def _keys(count: int) -> List[str]:
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return ['ctrl+plus' if i % 100 == 99 else letters[i % 26] for i in range(count)]
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'p50_us': statistics.median(samples) * 1e6,
+        'p99_us': samples[int(len(samples) * 0.99) - 1] * 1e6 if len(samples) >= 100 else samples[-1] * 1e6,
+        'max_us': samples[-1] * 1e6,
+    }
+
+
+def bench_keys(count: int) -> Dict[str, float]:
+    keyboard = _keyboard(sink=NullSink())
+    keys = _keys(count)
+    press_key = keyboard.press_key
+    started = time.perf_counter()
+    for key in keys:
+        press_key(key)
+    elapsed = time.perf_counter() - started
+    return {'keys': count, 'seconds': elapsed, 'keys_per_second': count / elapsed}
+
+
+def bench_undo_redo(depth: int, samples: int) -> Dict[str, object]:
+    keyboard = _keyboard(sink=NullSink())
+    for key in _keys(depth):
+        keyboard.press_key(key)
+    samples = min(samples, depth)
+
+    undo, redo = [], []
+    for _ in range(samples):
+        started = time.perf_counter()
+        keyboard.undo()
+        undo.append(time.perf_counter() - started)
+    for _ in range(samples):
+        started = time.perf_counter()
+        keyboard.redo()
+        redo.append(time.perf_counter() - started)
+    return {'depth': keyboard.history.steps, 'samples': samples,
+            'undo': _latency_summary(undo), 'redo': _latency_summary(redo)}
+
+
+def bench_output_io(count: int) -> Dict[str, object]:
+    """Время печати с файлом минус время с NullSink - стоимость записи вывода"""
+    keys = _keys(count)
+    results = {}
+    for log_mode in ("full", "diff"):
+        timings = {}
+        for name, sink in (('null', NullSink()), ('file', None)):
+            keyboard = _keyboard(log_mode, sink, filename=f"output_{log_mode}.txt")
+            keyboard.output_manager.clear_file()
+            started = time.perf_counter()
+            for i, key in enumerate(keys):
+                keyboard.press_key(key)
+                if i % 10 == 9:
+                    keyboard.undo()
+            keyboard.output_manager.close()
+            timings[name] = time.perf_counter() - started
+        results[log_mode] = {
+            'keys': count,
+            'total_seconds': timings['file'],
+            'io_seconds': max(timings['file'] - timings['null'], 0.0),
+            'file_bytes': os.path.getsize(f"output_{log_mode}.txt"),
+        }
+    return results
+
+
+def bench_text_model(count: int) -> Dict[str, float]:
+    elapsed = bench_text.run(TextBuffer(), count, undo_every=10, snapshot_every=1000)
+    return {'chars': count, 'seconds': elapsed, 'chars_per_second': count / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=200_000, help="нажатий для keys_per_second и text_model")
+    parser.add_argument('--depths', type=int, nargs='+', default=[10, 1000, 100_000, 1_000_000])
+    parser.add_argument('--samples', type=int, default=1000, help="замеров undo и redo на глубину")
+    parser.add_argument('--io-keys', type=int, default=20_000,
+                        help="нажатий для output_io (режим full пишет весь текст на каждое)")
+    parser.add_argument('--output', help="записать JSON в файл, а не в stdout")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        # Keyboard пишет файлы привязок и вывода в текущий каталог
+        os.chdir(directory)
+        try:
+            report = {
+                'python': platform.python_version(),
+                'keys_per_second': bench_keys(args.keys),
+                'undo_redo': [bench_undo_redo(depth, args.samples) for depth in args.depths],
+                'output_io': bench_output_io(args.io_keys),
+                'text_model': bench_text_model(args.keys),
+            }
+        finally:
+            os.chdir(cwd)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload + '\n')
+    else:
+        sys.stdout.write(payload + '\n')
+
+
+if __name__ == '__main__':
+    main()
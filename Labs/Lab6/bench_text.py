@@ -0,0 +1,60 @@
+"""Сравнение модели текста OutputManager: строка против TextBuffer
+
+Печатает N символов, отменяя каждый undo_every-й символ, и каждые clear_every символов
+делает снимок для очистки экрана. Строковая модель копирует весь текст на каждое
+изменение, поэтому для нее N ограничен --str-limit.
+
+Запуск: python bench_text.py [--chars 1000000] [--str-limit 100000]
+"""
+import argparse
+import time
+
+from text_buffer import TextBuffer
+
+
+class StringText:
+    """Прежняя модель: self.text += char и срез при удалении"""
+
+    def __init__(self):
+        self.text = ""
+
+    def append(self, char):
+        self.text += char
+
+    def delete(self, count=1):
+        removed = self.text[-count:]
+        self.text = self.text[:-count]
+        return removed
+
+    def snapshot(self):
+        return self.text
+
+
+def run(model, chars: int, undo_every: int, snapshot_every: int) -> float:
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    started = time.perf_counter()
+    for i in range(chars):
+        model.append(letters[i % 26])
+        if i % undo_every == 0:
+            model.delete(1)
+        if i % snapshot_every == 0:
+            model.snapshot()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, default=1_000_000)
+    parser.add_argument('--str-limit', type=int, default=100_000)
+    parser.add_argument('--undo-every', type=int, default=10)
+    parser.add_argument('--snapshot-every', type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, factory in (('str', StringText), ('TextBuffer', TextBuffer)):
+        chars = min(args.chars, args.str_limit) if factory is StringText else args.chars
+        elapsed = run(factory(), chars, args.undo_every, args.snapshot_every)
+        print(f"{name:<12}{chars:>10} символов  {elapsed:8.3f} с  {chars / elapsed:12.0f} символов/с")
+
+
+if __name__ == '__main__':
+    main()
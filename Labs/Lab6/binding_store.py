@@ -0,0 +1,116 @@
+import atexit
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from memento import KeyboardMemento, KeyboardStateSaver
+
+
+class BindingStore:
+    """Привязки клавиш с отложенной загрузкой и пакетным сохранением
+
+    Файл читается при первом обращении к bindings. Изменения копятся в памяти и в commit()
+    одной записью дописываются в журнал <filename>.log (JSON lines). Если журнал длиннее
+    compact_after записей, он сворачивается в основной файл через KeyboardStateSaver.
+    """
+
+    def __init__(self, state_saver: KeyboardStateSaver, batch_size: int = 100,
+                 flush_interval: float = 1.0, compact_after: int = 1000):
+        self.state_saver = state_saver
+        self.log_filename = f"{state_saver.filename}.log"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self._bindings: Optional[Dict[str, str]] = None
+        self._pending: List[list] = []
+        self._first_pending_at = 0.0
+        self._log_entries = 0
+        self._exit_hook = False
+
+    @property
+    def bindings(self) -> Dict[str, str]:
+        if self._bindings is None:
+            self._load()
+        return self._bindings
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._bindings is not None
+
+    def set(self, key: str, command_type: str):
+        """Добавляет или изменяет привязку; сохранение - при commit()"""
+        self.bindings[key] = command_type
+        self._record(["set", key, command_type])
+
+    def remove(self, key: str) -> bool:
+        """Удаляет привязку, возвращает False, если ее не было"""
+        bindings = self.bindings
+        if key not in bindings:
+            return False
+        del bindings[key]
+        self._record(["del", key])
+        return True
+
+    def commit(self):
+        """Дописывает накопленные изменения в журнал"""
+        if not self._pending:
+            return
+        lines = ''.join(json.dumps(delta, ensure_ascii=False) + '\n' for delta in self._pending)
+        try:
+            with open(self.log_filename, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except Exception as e:
+            print(f"Error saving key bindings: {e}")
+            return
+        self._log_entries += len(self._pending)
+        self._pending.clear()
+        if self._log_entries >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Сохраняет все привязки в основной файл и очищает журнал"""
+        if self._bindings is None:
+            return
+        if not self.state_saver.save_state(KeyboardMemento(self._bindings)):
+            return
+        # Повтор журнала поверх нового файла дает тот же результат,
+        # поэтому сбой между сохранением и удалением журнала ничего не портит
+        self._pending.clear()
+        self._log_entries = 0
+        try:
+            os.remove(self.log_filename)
+        except FileNotFoundError:
+            pass
+
+    def _record(self, delta: list):
+        self._pending.append(delta)
+        now = time.monotonic()
+        if len(self._pending) == 1:
+            self._first_pending_at = now
+            if not self._exit_hook:
+                atexit.register(self.commit)
+                self._exit_hook = True
+        if len(self._pending) >= self.batch_size or now - self._first_pending_at >= self.flush_interval:
+            self.commit()
+
+    def _load(self):
+        bindings = dict(self.state_saver.load_state().get_state())
+        self._log_entries = 0
+        if os.path.exists(self.log_filename):
+            try:
+                with open(self.log_filename, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            delta = json.loads(line)
+                        except ValueError:
+                            # Оборванная последняя строка после сбоя при записи
+                            break
+                        if delta[0] == "set":
+                            bindings[delta[1]] = delta[2]
+                        else:
+                            bindings.pop(delta[1], None)
+                        self._log_entries += 1
+            except Exception as e:
+                print(f"Error loading key binding changes: {e}")
+        self._bindings = bindings
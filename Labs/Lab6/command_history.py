@@ -0,0 +1,134 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from command import Command
+from key_command import KeyCommand, TypedTextCommand
+
+
+class CommandHistory:
+    """История команд для undo/redo, ограниченная capacity шагами
+
+    Подряд напечатанные символы сливаются в записи TypedTextCommand (не длиннее run_limit),
+    поэтому символ в истории - элемент массива, а не отдельный объект команды; push_char
+    дописывает символ в серию, не создавая команду вовсе. Отмененные
+    записи при новой команде снимаются с конца deque, без копирования всей истории;
+    при переполнении отбрасываются самые старые записи.
+    """
+
+    def __init__(self, capacity: int = 100_000, run_limit: int = 4096):
+        self.capacity = capacity
+        self.run_limit = run_limit
+        self._entries = deque()
+        self._cursor = 0  # записи [0, cursor) применены хотя бы частично
+        self._steps = 0  # шагов undo в истории всего
+        self._position = 0  # шагов применено сейчас
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    @property
+    def position(self) -> int:
+        """Индекс текущей записи (-1, если отменено все)"""
+        return self._cursor - 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Command]:
+        return iter(self._entries)
+
+    def can_undo(self) -> bool:
+        return self._position > 0
+
+    def can_redo(self) -> bool:
+        return self._position < self._steps
+
+    def push(self, command: Command):
+        """Добавляет уже выполненную команду, отбрасывая отмененные"""
+        if type(command) is KeyCommand:
+            self.push_char(command.char, command.output_manager)
+            return
+        self._drop_redo()
+        self._entries.append(command)
+        self._advance()
+
+    def push_char(self, char: str, output_manager):
+        """Добавляет уже напечатанный символ в текущую серию, отбрасывая отмененные"""
+        self._drop_redo()
+        entries = self._entries
+        top = entries[-1] if entries else None
+        if (isinstance(top, TypedTextCommand) and top.output_manager is output_manager
+                and len(top) < self.run_limit):
+            top.append(char)
+        else:
+            entries.append(TypedTextCommand(char, output_manager))
+        self._advance()
+
+    def _advance(self):
+        entries = self._entries
+        self._steps += 1
+        self._position += 1
+        self._cursor = len(entries)
+
+        while self._steps > self.capacity and len(entries) > 1:
+            size = self._size(entries.popleft())
+            self._steps -= size
+            self._position -= size
+            self._cursor -= 1
+
+    def undo(self) -> Optional[Tuple[Command, Any]]:
+        """Отменяет один шаг, возвращает (команда, результат) или None"""
+        if not self._position:
+            return None
+        command = self._entries[self._cursor - 1]
+        result = command.undo()
+        self._position -= 1
+        if not isinstance(command, TypedTextCommand) or not command.applied:
+            self._cursor -= 1
+        return command, result
+
+    def redo(self) -> Optional[Tuple[Command, Any]]:
+        """Повторяет один отмененный шаг, возвращает (команда, результат) или None"""
+        if self._position == self._steps:
+            return None
+        index = self._cursor - 1
+        if index < 0 or not self._is_partial(self._entries[index]):
+            index = self._cursor
+        command = self._entries[index]
+        result = command.execute()
+        self._position += 1
+        self._cursor = index + 1
+        return command, result
+
+    def clear(self):
+        self._entries.clear()
+        self._cursor = self._steps = self._position = 0
+
+    def load(self, entries: Iterable[Command], cursor: int):
+        """Заменяет историю восстановленными записями; cursor - число примененных записей"""
+        self._entries = deque(entries)
+        self._cursor = cursor
+        self._steps = sum(self._size(command) for command in self._entries)
+        self._position = sum(command.applied if isinstance(command, TypedTextCommand) else 1
+                             for command in islice(self._entries, cursor))
+
+    def _drop_redo(self):
+        if self._position == self._steps:
+            return
+        entries = self._entries
+        while len(entries) > self._cursor:
+            self._steps -= self._size(entries.pop())
+        if entries and self._is_partial(entries[-1]):
+            top = entries[-1]
+            self._steps -= len(top) - top.applied
+            top.truncate()
+
+    @staticmethod
+    def _size(command: Command) -> int:
+        return len(command) if isinstance(command, TypedTextCommand) else 1
+
+    @staticmethod
+    def _is_partial(command: Command) -> bool:
+        return isinstance(command, TypedTextCommand) and command.applied < len(command)
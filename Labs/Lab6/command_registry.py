@@ -0,0 +1,53 @@
+from typing import Callable, Dict, List, Optional, Union
+
+from command import Command
+
+CommandFactory = Callable[[], Command]
+
+
+class CommandRegistry:
+    """Типы команд по именам для привязок клавиш
+
+    Тип регистрируется готовым экземпляром (одна команда на все нажатия) или фабрикой
+    (новая команда на каждое нажатие). version растет при каждом изменении, по нему
+    клавиатура понимает, что таблицу клавиш пора пересобрать.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, CommandFactory] = {}
+        self.version = 0
+
+    def register(self, name: str, command: Union[Command, CommandFactory]):
+        """Регистрирует или заменяет тип команды"""
+        # command_type на команде нужен, чтобы сохранить историю и макросы по именам
+        if isinstance(command, Command):
+            instance = command
+            instance.command_type = name
+            self._factories[name] = lambda: instance
+        else:
+            def create():
+                created = command()
+                if created is not None:
+                    created.command_type = name
+                return created
+            self._factories[name] = create
+        self.version += 1
+
+    def unregister(self, name: str) -> bool:
+        if self._factories.pop(name, None) is None:
+            return False
+        self.version += 1
+        return True
+
+    def resolve(self, name: str) -> Optional[CommandFactory]:
+        return self._factories.get(name)
+
+    def create(self, name: str) -> Optional[Command]:
+        factory = self._factories.get(name)
+        return factory() if factory is not None else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def names(self) -> List[str]:
+        return list(self._factories)
@@ -0,0 +1,213 @@
+import asyncio
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+
+# Строка "exit" в любом источнике завершает обработку
+EXIT_EVENT = "exit"
+
+
+class EventSource(ABC):
+    """Источник нажатий: асинхронно отдает пачки событий (строк) по порядку"""
+
+    @abstractmethod
+    def batches(self) -> AsyncIterator[List[str]]:
+        """Асинхронный генератор пачек событий"""
+        pass
+
+
+class StdinSource(EventSource):
+    """Строки стандартного ввода
+
+    Читает фоновый daemon-поток и передает строки в цикл через очередь. asyncio.to_thread
+    не подходит: asyncio.run при завершении ждет потоки своего пула, и после "exit"
+    программа висела бы в readline до следующей строки ввода.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    async def batches(self) -> AsyncIterator[List[str]]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stream = self.stream or sys.stdin
+
+        def put(line) -> bool:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, line)
+                return True
+            except RuntimeError:
+                # Цикл уже закрыт: обработка закончена, поток просто завершается
+                return False
+
+        def read():
+            try:
+                for line in iter(stream.readline, ''):
+                    if not put(line):
+                        return
+            except (OSError, ValueError):
+                pass
+            put(None)
+
+        threading.Thread(target=read, name="stdin-reader", daemon=True).start()
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+            event = line.strip()
+            if event:
+                yield [event]
+
+
+class ReplayFileSource(EventSource):
+    """Записанный поток нажатий: одно событие на строку"""
+
+    def __init__(self, path: str, batch_size: int = 4096):
+        self.path = path
+        self.batch_size = batch_size
+
+    async def batches(self) -> AsyncIterator[List[str]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            batch = []
+            for line in f:
+                event = line.rstrip('\r\n')
+                if event:
+                    batch.append(event)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+
+class SocketSource(EventSource):
+    """Локальный TCP-сокет: клиенты шлют события строками, порядок сохраняется внутри соединения"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self.ready = asyncio.Event()
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def batches(self) -> AsyncIterator[List[str]]:
+        self._queue = asyncio.Queue()
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # При port=0 порт выбирает система
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with server:
+            while True:
+                yield await self._queue.get()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = b''
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b'\n')
+                events = [line.decode('utf-8').rstrip('\r') for line in lines if line.strip()]
+                if events:
+                    await self._queue.put(events)
+            if pending.strip():
+                await self._queue.put([pending.decode('utf-8').rstrip('\r')])
+        finally:
+            writer.close()
+
+
+class ConsoleRenderer:
+    """Строка состояния в консоли: счетчики и конец текста"""
+
+    def __init__(self, stream=None, width: int = 60):
+        self.stream = stream or sys.stdout
+        self.width = width
+
+    def render(self, keyboard, processed: int, rate: float):
+        output_manager = keyboard.output_manager
+        tail = output_manager.get_text()[-self.width:] if output_manager.text_length() else ""
+        self.stream.write(f"\r[{processed} events, {rate:,.0f}/s] {tail!r}\x1b[K")
+        self.stream.flush()
+
+
+class KeyboardDispatcher:
+    """Асинхронный цикл клавиатуры: источники -> очередь -> команды, отрисовка отдельно
+
+    События выполняются строго по порядку поступления в одной задаче; источники кладут
+    в очередь пачки событий, поэтому на событие не приходится ни одного await. Отрисовка -
+    отдельная задача, которая раз в render_interval показывает состояние, а не вывод
+    каждой команды; поэтому у OutputManager клавиатуры стоит выключить echo.
+    """
+
+    def __init__(self, keyboard, renderer: Optional[ConsoleRenderer] = None,
+                 render_interval: float = 0.1, queue_size: int = 64, yield_every: int = 4096):
+        self.keyboard = keyboard
+        self.renderer = renderer
+        self.render_interval = render_interval
+        self.queue_size = queue_size
+        self.yield_every = yield_every
+        self.processed = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def handle(self, event: str) -> bool:
+        keyboard = self.keyboard
+        if event == "undo":
+            return keyboard.undo()
+        if event == "redo":
+            return keyboard.redo()
+        if event.startswith("type "):
+            return keyboard.type_string(event[5:])
+        return keyboard.press_key(event)
+
+    async def run(self, *sources: EventSource) -> int:
+        """Обрабатывает события, пока источники не закончатся или не придет "exit" """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        producers = [asyncio.create_task(self._produce(source, queue)) for source in sources]
+        render_task = asyncio.create_task(self._render_loop()) if self.renderer else None
+        started = time.perf_counter()
+        remaining = len(producers)
+        handle = self.handle
+        try:
+            while remaining:
+                batch = await queue.get()
+                if batch is None:
+                    remaining -= 1
+                    continue
+                for event in batch:
+                    if event == EXIT_EVENT:
+                        return self.processed
+                    handle(event)
+                    self.processed += 1
+                    if not self.processed % self.yield_every:
+                        self.elapsed = time.perf_counter() - started
+                        await asyncio.sleep(0)
+            return self.processed
+        finally:
+            # Начатая последовательность клавиш не теряется в конце ввода
+            self.keyboard.flush_sequence()
+            self.elapsed = time.perf_counter() - started
+            for task in producers + ([render_task] if render_task else []):
+                task.cancel()
+            await asyncio.gather(*producers, *([render_task] if render_task else []), return_exceptions=True)
+            if self.renderer:
+                self.renderer.render(self.keyboard, self.processed, self.rate)
+
+    @staticmethod
+    async def _produce(source: EventSource, queue: asyncio.Queue):
+        try:
+            async for batch in source.batches():
+                await queue.put(batch)
+        except Exception as e:
+            print(f"\nEvent source {type(source).__name__} failed: {e}")
+        await queue.put(None)
+
+    async def _render_loop(self):
+        while True:
+            await asyncio.sleep(self.render_interval)
+            self.renderer.render(self.keyboard, self.processed, self.rate)
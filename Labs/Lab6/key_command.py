@@ -1,3 +1,5 @@
+from array import array
+
 from command import Command
 
 
@@ -22,3 +24,54 @@ class KeyCommand(Command):
 
     def get_description(self):
         return f"Print '{self.char}'"
+
+
+class TypedTextCommand(KeyCommand):
+    """Подряд напечатанные символы одной записью истории вместо KeyCommand на каждый
+
+    Символы хранятся кодами в array('I'): 4 байта на символ, без объекта на нажатие.
+    Отмена и повтор идут по одному символу: applied - сколько символов сейчас напечатано.
+    """
+
+    def __init__(self, chars, output_manager):
+        self.codes = array('I', map(ord, chars))
+        self.applied = len(self.codes)
+        self.output_manager = output_manager
+
+    @property
+    def char(self):
+        return chr(self.codes[self.applied - 1]) if self.applied else ""
+
+    @property
+    def text(self):
+        return ''.join(map(chr, self.codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, char):
+        """Добавляет уже напечатанный символ в конец серии"""
+        self.codes.append(ord(char))
+        self.applied += 1
+
+    def truncate(self):
+        """Отбрасывает отмененные символы"""
+        del self.codes[self.applied:]
+
+    def execute(self):
+        """Печатает следующий отмененный символ"""
+        char = chr(self.codes[self.applied])
+        self.output_manager.add_text(char)
+        self.applied += 1
+        return char
+
+    def undo(self):
+        """Стирает последний напечатанный символ серии"""
+        self.applied -= 1
+        return super().undo()
+
+    def get_description(self):
+        text = self.text
+        if self.applied < len(self.codes):
+            return f"Type '{text}' ({self.applied}/{len(self.codes)} applied)"
+        return f"Type '{text}'"
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from command_registry import CommandFactory
+
+MODIFIERS = ("ctrl", "alt", "shift", "meta")
+
+
+@lru_cache(maxsize=4096)
+def normalize_chord(chord: str) -> str:
+    """'Shift+Ctrl+A' -> 'ctrl+shift+a': модификаторы в постоянном порядке"""
+    parts = chord.lower().split('+')
+    if len(parts) == 1:
+        return parts[0]
+    # 'ctrl++' - сама клавиша '+'
+    key = parts[-1] or '+'
+    modifiers = set(part for part in parts[:-1] if part)
+    ordered = [modifier for modifier in MODIFIERS if modifier in modifiers]
+    ordered += sorted(modifiers.difference(MODIFIERS))
+    return '+'.join(ordered + [key])
+
+
+def parse_sequence(combination: str) -> Tuple[str, ...]:
+    """'ctrl+k ctrl+c' -> ('ctrl+k', 'ctrl+c')"""
+    return tuple(normalize_chord(chord) for chord in combination.split())
+
+
+class SequenceNode:
+    __slots__ = ('children', 'factory')
+
+    def __init__(self):
+        self.children: Dict[str, 'SequenceNode'] = {}
+        self.factory: Optional[CommandFactory] = None
+
+
+class KeySequenceTrie:
+    """Префиксное дерево привязок из нескольких нажатий подряд"""
+
+    def __init__(self):
+        self.root = SequenceNode()
+
+    def insert(self, chords: Tuple[str, ...], factory: CommandFactory):
+        node = self.root
+        for chord in chords:
+            child = node.children.get(chord)
+            if child is None:
+                child = node.children[chord] = SequenceNode()
+            node = child
+        node.factory = factory
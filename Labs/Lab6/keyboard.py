@@ -1,98 +1,305 @@
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Optional, Union
 from command import Command
 from key_command import KeyCommand
 from volume_commands import VolumeUpCommand, VolumeDownCommand
 from media_command import MediaPlayerCommand, ClearScreenCommand
 from output_manager import OutputManager
-from memento import KeyboardStateSaver, KeyboardMemento
+from memento import KeyboardStateSaver
+from command_history import CommandHistory
+from binding_store import BindingStore
+from macro import CompositeCommand, Macro, MacroRecorder, TypeStringCommand
+from command_registry import CommandFactory, CommandRegistry
+from session_store import OP_CLEAR_HISTORY, OP_COMMAND, OP_KEY, OP_REDO, OP_STRING, OP_UNDO
+from key_sequences import KeySequenceTrie, SequenceNode, normalize_chord, parse_sequence
 
 
 class Keyboard:
     """Виртуальная клавиатура с поддержкой команд"""
 
-    def __init__(self):
-        self.output_manager = OutputManager()
+    def __init__(self, history_capacity: int = 100_000, output_manager: Optional[OutputManager] = None,
+                 sequence_timeout: Optional[float] = None):
+        self.output_manager = output_manager or OutputManager()
         self.state_saver = KeyboardStateSaver()
 
         # История команд для undo/redo
-        self.command_history: List[Command] = []
-        self.history_position = -1
-
-        self.key_bindings: Dict[str, str] = {}
+        self.history = CommandHistory(history_capacity)
+
+        # Привязки загружаются при первом обращении, а сохраняются пакетами
+        self.binding_store = BindingStore(self.state_saver)
+
+        self._recorder: Optional[MacroRecorder] = None
+        # KeyboardSessionStore, если текст и история сохраняются между запусками
+        self.session = None
+
+        # Таблица клавиша -> фабрика команды собирается из привязок при первом нажатии
+        # и пересобирается после изменения привязок или реестра команд
+        self.registry = CommandRegistry()
+        self._dispatch: Dict[str, CommandFactory] = {}
+        self._sequences = KeySequenceTrie()
+        self._sequence_node: Optional[SequenceNode] = None
+        # Нажатия начатой последовательности; sequence_timeout - через сколько секунд
+        # она разбирается при следующем нажатии (None - ждать продолжения или flush_sequence)
+        self._pending_keys: List[str] = []
+        self._sequence_started = 0.0
+        self.sequence_timeout = sequence_timeout
+        self._compiled_version: Optional[int] = None
 
         self._init_commands()
 
-        # Загружаем сохраненные привязки
-        self._load_key_bindings()
+    @property
+    def key_bindings(self) -> Dict[str, str]:
+        return self.binding_store.bindings
+
+    @property
+    def command_history(self) -> List[Command]:
+        return list(self.history)
+
+    @property
+    def history_position(self) -> int:
+        return self.history.position
 
     def _init_commands(self):
         """Инициализирует доступные команды"""
         self.volume_up_cmd = VolumeUpCommand(20)
         self.volume_down_cmd = VolumeDownCommand(20)
         self.media_player_cmd = MediaPlayerCommand()
-        self.clear_screen_cmd = ClearScreenCommand(self.output_manager)
+
+        self.registry.register("volume_up", self.volume_up_cmd)
+        self.registry.register("volume_down", self.volume_down_cmd)
+        self.registry.register("media_player", self.media_player_cmd)
+        # Своя команда на каждое нажатие: у каждой очистки свой снимок текста для отмены
+        self.registry.register("clear_screen", lambda: ClearScreenCommand(self.output_manager))
+
+    def register_command(self, command_type: str, command: Union[Command, CommandFactory]):
+        """Добавляет тип команды для привязок: экземпляр или фабрику без аргументов"""
+        self.registry.register(command_type, command)
 
     def add_key_binding(self, key_combination: str, command_type: str):
         """Добавляет или изменяет привязку клавиши к команде"""
-        self.key_bindings[key_combination.lower()] = command_type
+        self.binding_store.set(key_combination.lower(), command_type)
+        self._compiled_version = None
         print(f"Key binding added: {key_combination} -> {command_type}")
-        self._save_key_bindings()
 
     def remove_key_binding(self, key_combination: str):
         """Удаляет привязку клавиши"""
-        key = key_combination.lower()
-        if key in self.key_bindings:
-            del self.key_bindings[key]
+        if self.binding_store.remove(key_combination.lower()):
+            self._compiled_version = None
             print(f"Key binding removed: {key_combination}")
-            self._save_key_bindings()
         else:
             print(f"Key binding not found: {key_combination}")
 
     def press_key(self, key: str) -> bool:
         """Обрабатывает нажатие клавиши"""
 
+        if self._compiled_version != self.registry.version:
+            # Набранное начало последовательности разбирается по старым привязкам
+            self.flush_sequence()
+            self._compile_bindings()
+        elif self._pending_keys and self.sequence_timeout is not None \
+                and time.monotonic() - self._sequence_started >= self.sequence_timeout:
+            self.flush_sequence()
+        chord = normalize_chord(key)
+
+        # Последовательность из нескольких нажатий
+        node = self._sequence_node or self._sequences.root
+        child = node.children.get(chord)
+        if child is not None:
+            if child.children:
+                if not self._pending_keys:
+                    self._sequence_started = time.monotonic()
+                self._pending_keys.append(key)
+                self._sequence_node = child
+                return True
+            self._pending_keys = []
+            self._sequence_node = None
+            return bool(self._run_factory(child.factory))
+        if self._sequence_node is not None:
+            # Последовательность прервана: набранное разбирается, а это нажатие
+            # обрабатывается заново от корня и может начать новую последовательность
+            self.flush_sequence()
+            return self.press_key(key)
+        return self._press_single(key, chord)
+
+    def flush_sequence(self) -> bool:
+        """Разбирает начатую последовательность, не дожидаясь следующего нажатия
+
+        Срабатывает самая длинная набранная привязка, остальные нажатия обрабатываются
+        заново; если привязки нет, первое нажатие обрабатывается как одиночное
+        (печатный символ печатается). Вызывается при обрыве последовательности,
+        по sequence_timeout и перед undo/redo/вводом строки.
+        """
+        keys = self._pending_keys
+        if not keys:
+            return False
+        self._pending_keys = []
+        self._sequence_node = None
+
+        node = self._sequences.root
+        matched, factory = 0, None
+        for position, key in enumerate(keys, 1):
+            node = node.children[normalize_chord(key)]
+            if node.factory is not None:
+                matched, factory = position, node.factory
+        if factory is not None:
+            executed = bool(self._run_factory(factory))
+        else:
+            matched = 1
+            executed = self._press_single(keys[0], normalize_chord(keys[0]))
+        for key in keys[matched:]:
+            self.press_key(key)
+        return executed
+
+    def _press_single(self, key: str, chord: str) -> bool:
         # Комбинация клавиш
-        key_lower = key.lower()
-        if key_lower in self.key_bindings:
-            command_type = self.key_bindings[key_lower]
-            command = self._create_command(command_type)
-            if command:
-                return self._execute_command(command)
+        factory = self._dispatch.get(chord)
+        if factory is not None:
+            executed = self._run_factory(factory)
+            if executed is not None:
+                return executed
 
         # Обычный символ
         if len(key) == 1 and key.isprintable():
-            command = KeyCommand(key, self.output_manager)
-            return self._execute_command(command)
+            return self.type_char(key)
 
         print(f"Unknown key or combination: {key}")
         return False
 
+    def type_char(self, char: str) -> bool:
+        """Печатает символ: он дописывается в серию истории без отдельного объекта команды"""
+        try:
+            self.output_manager.add_text(char)
+            self.history.push_char(char, self.output_manager)
+            self.output_manager.log_current_state()
+        except Exception as e:
+            print(f"Error executing command: {e}")
+            return False
+        if self._recorder is not None:
+            self._recorder.record_text(char)
+        if self.session is not None:
+            self.session.record(OP_KEY, char)
+        return True
+
+    def type_string(self, text: str) -> bool:
+        """Печатает строку одной командой: один вывод и один шаг отмены"""
+        self.flush_sequence()
+        if not text:
+            return False
+        executed = self._execute_command(TypeStringCommand(text, self.output_manager))
+        if executed:
+            if self._recorder is not None:
+                self._recorder.record_text(text)
+            if self.session is not None:
+                self.session.record(OP_STRING, text)
+        return executed
+
+    def start_recording(self):
+        """Начинает запись макроса из последующих нажатий"""
+        self._recorder = MacroRecorder()
+        print("Macro recording started")
+
+    def stop_recording(self) -> Optional[Macro]:
+        """Завершает запись и возвращает макрос"""
+        if self._recorder is None:
+            print("Macro recording is not active")
+            return None
+        macro = self._recorder.finish()
+        self._recorder = None
+        print(f"Macro recorded: {len(macro)} steps")
+        return macro
+
+    @property
+    def is_recording(self) -> bool:
+        return self._recorder is not None
+
+    def replay(self, macro: Macro) -> bool:
+        """Выполняет макрос как одну составную команду с одним шагом отмены
+
+        Команды создаются через реестр заново на каждое воспроизведение, поэтому
+        шаги истории от разных воспроизведений не делят состояние для отмены.
+        """
+        self.flush_sequence()
+        if not macro.steps:
+            print("Macro is empty")
+            return False
+        commands = []
+        for step in macro.steps:
+            command = (TypeStringCommand(step, self.output_manager) if isinstance(step, str)
+                       else self._create_command(step.command_type))
+            if command is not None:
+                commands.append(command)
+        if not commands:
+            return False
+        if len(commands) == 1:
+            command = commands[0]
+        else:
+            command = CompositeCommand(commands, f"Macro ({len(commands)} steps)")
+        executed = self._execute_command(command)
+        if executed and self._recorder is not None:
+            for step in macro.steps:
+                if isinstance(step, str):
+                    self._recorder.record_text(step)
+                else:
+                    self._recorder.record_command(step.command_type)
+        if executed and self.session is not None:
+            self.session.record_macro(macro)
+        return executed
+
     def _create_command(self, command_type: str) -> Optional[Command]:
         """Создает команду по типу"""
-        if command_type == "volume_up":
-            return self.volume_up_cmd
-        elif command_type == "volume_down":
-            return self.volume_down_cmd
-        elif command_type == "media_player":
-            return self.media_player_cmd
-        elif command_type == "clear_screen":
-            return self.clear_screen_cmd
-        else:
+        command = self.registry.create(command_type)
+        if command is None:
+            print(f"Unknown command type: {command_type}")
+        return command
+
+    def _compile_bindings(self):
+        """Собирает таблицу клавиша -> фабрика и дерево последовательностей из привязок"""
+        dispatch: Dict[str, CommandFactory] = {}
+        sequences = KeySequenceTrie()
+        for combination, command_type in self.key_bindings.items():
+            factory = self.registry.resolve(command_type) or self._unknown_command(command_type)
+            chords = parse_sequence(combination)
+            if len(chords) == 1:
+                dispatch[chords[0]] = factory
+            elif chords:
+                sequences.insert(chords, factory)
+        # Одиночная привязка, с которой начинается последовательность, срабатывает,
+        # если последовательность не продолжена (см. flush_sequence)
+        for chord, node in sequences.root.children.items():
+            node.factory = dispatch.get(chord)
+        self._dispatch = dispatch
+        self._sequences = sequences
+        self._sequence_node = None
+        self._pending_keys = []
+        self._compiled_version = self.registry.version
+
+    @staticmethod
+    def _unknown_command(command_type: str) -> Callable[[], None]:
+        def factory():
             print(f"Unknown command type: {command_type}")
             return None
+        return factory
+
+    def _run_factory(self, factory: CommandFactory) -> Optional[bool]:
+        """Выполняет команду из фабрики; None - фабрика команду не дала"""
+        command = factory()
+        if command is None:
+            return None
+        executed = self._execute_command(command)
+        if executed:
+            if self._recorder is not None:
+                self._recorder.record_command(command.command_type)
+            if self.session is not None:
+                self.session.record(OP_COMMAND, command.command_type)
+        return executed
 
     def _execute_command(self, command: Command) -> bool:
         """Выполняет команду и добавляет в историю"""
         try:
             result = command.execute()
 
-            # Очищаем историю после текущей позиции (для redo)
-            if self.history_position < len(self.command_history) - 1:
-                self.command_history = self.command_history[:self.history_position + 1]
-
-            # Добавляем команду в историю
-            self.command_history.append(command)
-            self.history_position = len(self.command_history) - 1
+            # Добавляем команду в историю, отмененные команды отбрасываются
+            self.history.push(command)
 
             # Логируем результат
             if isinstance(command, KeyCommand):
@@ -108,11 +315,12 @@ class Keyboard:
 
     def undo(self) -> bool:
         """Отменяет последнюю команду"""
-        if self.history_position >= 0:
-            command = self.command_history[self.history_position]
+        self.flush_sequence()
+        if self.history.can_undo():
             try:
-                result = command.undo()
-                self.history_position -= 1
+                command, result = self.history.undo()
+                if self.session is not None:
+                    self.session.record(OP_UNDO)
 
                 if isinstance(command, KeyCommand):
                     self.output_manager.log_command("undo")
@@ -130,11 +338,12 @@ class Keyboard:
 
     def redo(self) -> bool:
         """Повторяет отмененную команду"""
-        if self.history_position < len(self.command_history) - 1:
-            self.history_position += 1
-            command = self.command_history[self.history_position]
+        self.flush_sequence()
+        if self.history.can_redo():
             try:
-                result = command.execute()
+                command, result = self.history.redo()
+                if self.session is not None:
+                    self.session.record(OP_REDO)
 
                 if isinstance(command, KeyCommand):
                     self.output_manager.log_command(" redo")
@@ -150,15 +359,9 @@ class Keyboard:
             print("Nothing to redo")
             return False
 
-    def _save_key_bindings(self):
-        """Сохраняет привязки клавиш"""
-        memento = KeyboardMemento(self.key_bindings)
-        self.state_saver.save_state(memento)
-
-    def _load_key_bindings(self):
-        """Загружает привязки клавиш"""
-        memento = self.state_saver.load_state()
-        self.key_bindings = memento.get_state()
+    def commit_key_bindings(self):
+        """Сохраняет накопленные изменения привязок, не дожидаясь пакета"""
+        self.binding_store.commit()
 
     def show_bindings(self):
         """Показывает текущие привязки клавиш"""
@@ -172,21 +375,22 @@ class Keyboard:
     def show_history(self):
         """Показывает историю команд"""
         print(f"\nCommand history (position: {self.history_position}):")
-        for i, cmd in enumerate(self.command_history):
+        for i, cmd in enumerate(self.history):
             marker = " <-- current" if i == self.history_position else ""
             print(f"  {i}: {cmd.get_description()}{marker}")
 
     def clear_history(self):
         """Очищает историю команд"""
-        self.command_history.clear()
-        self.history_position = -1
+        self.history.clear()
+        if self.session is not None:
+            self.session.record(OP_CLEAR_HISTORY)
         print("Command history cleared")
 
     def get_stats(self):
         """Возвращает статистику использования"""
         return {
-            "total_commands": len(self.command_history),
+            "total_commands": self.history.steps,
             "current_position": self.history_position,
             "key_bindings": len(self.key_bindings),
-            "current_text_length": len(self.output_manager.get_text())
+            "current_text_length": self.output_manager.text_length()
         }
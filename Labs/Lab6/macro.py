@@ -0,0 +1,102 @@
+from typing import List, NamedTuple, Tuple, Union
+
+from command import Command
+from key_command import KeyCommand
+
+
+class CommandStep(NamedTuple):
+    """Шаг макроса - команда по имени типа; объект команды создается заново при каждом воспроизведении"""
+    command_type: str
+
+
+MacroStep = Union[str, CommandStep]
+
+
+class TypeStringCommand(KeyCommand):
+    """Печать строки целиком: одна запись в вывод и один шаг отмены"""
+
+    def __init__(self, text, output_manager):
+        super().__init__(text, output_manager)
+        self.text = text
+
+    def undo(self):
+        """Стирает всю напечатанную строку"""
+        self.output_manager.backspace(len(self.text))
+        return "undo"
+
+    def get_description(self):
+        return f"Type '{self.text}'"
+
+
+class CompositeCommand(Command):
+    """Последовательность команд, которая выполняется и отменяется как одна"""
+
+    def __init__(self, commands: List[Command], description: str):
+        self.commands = commands
+        self.description = description
+
+    def execute(self):
+        """Выполняет команды по порядку; при ошибке откатывает уже выполненные"""
+        results = []
+        done = []
+        try:
+            for command in self.commands:
+                result = command.execute()
+                done.append(command)
+                if not isinstance(command, KeyCommand):
+                    results.append(result)
+        except Exception:
+            for command in reversed(done):
+                command.undo()
+            raise
+        return "; ".join(results) if results else f"{self.description} done"
+
+    def undo(self):
+        """Отменяет команды в обратном порядке"""
+        for command in reversed(self.commands):
+            command.undo()
+        return f"{self.description} undone"
+
+    def get_description(self):
+        return self.description
+
+
+class Macro:
+    """Записанная последовательность: строки напечатанного текста и типы команд привязок
+
+    Живые команды не хранятся: у команды вроде очистки экрана есть состояние для отмены,
+    и общий объект в нескольких воспроизведениях делил бы его между шагами истории.
+    """
+
+    def __init__(self, steps: Tuple[MacroStep, ...]):
+        self.steps = steps
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"Macro({len(self.steps)} steps)"
+
+
+class MacroRecorder:
+    """Собирает нажатия в макрос, склеивая подряд напечатанные символы в одну строку"""
+
+    def __init__(self):
+        self._steps: List[MacroStep] = []
+        self._chars: List[str] = []
+
+    def record_text(self, text: str):
+        self._chars.append(text)
+
+    def record_command(self, command_type: str):
+        self._flush_text()
+        self._steps.append(CommandStep(command_type))
+
+    def finish(self) -> Macro:
+        self._flush_text()
+        return Macro(tuple(self._steps))
+
+    def _flush_text(self):
+        if self._chars:
+            self._steps.append(''.join(self._chars))
+            self._chars.clear()
@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import asyncio
+
+from event_loop import ConsoleRenderer, KeyboardDispatcher, ReplayFileSource, SocketSource, StdinSource
 from keyboard import Keyboard
+from output_manager import OutputManager
+from session_store import KeyboardSessionStore
 
 
 def show_menu():
@@ -22,24 +28,67 @@ def show_menu():
     print("     - bindings   : Show key bindings")
     print("     - history    : Show command history")
     print("     - stats      : Show statistics")
+    print("     - record     : Start macro recording")
+    print("     - stop       : Stop macro recording")
+    print("     - play       : Replay last macro")
+    print("     - type <text>: Type text as one command")
     print("     - clear      : Clear console")
+    print("     - help       : Show this menu")
     print("     - exit       : Exit program")
     print("=" * 50)
 
 
+def run_event_loop(args):
+    """Асинхронный режим: события из файла, сокета или stdin, вывод - строкой состояния"""
+    # Консоль отрисовывает ConsoleRenderer, в файл пишутся только правки
+    keyboard = Keyboard(output_manager=OutputManager(echo=False, log_mode="diff"))
+    keyboard.output_manager.clear_file()
+    sources = []
+    if args.replay:
+        sources.append(ReplayFileSource(args.replay))
+    if args.socket is not None:
+        sources.append(SocketSource(port=args.socket))
+        print(f"Listening for key events on 127.0.0.1:{args.socket}")
+    if args.stdin:
+        sources.append(StdinSource())
+
+    dispatcher = KeyboardDispatcher(keyboard, ConsoleRenderer())
+    try:
+        asyncio.run(dispatcher.run(*sources))
+    except KeyboardInterrupt:
+        pass
+    keyboard.output_manager.close()
+    keyboard.commit_key_bindings()
+    print(f"\nProcessed {dispatcher.processed} events in {dispatcher.elapsed:.2f} s "
+          f"({dispatcher.rate:,.0f} events/s)")
+
+
 def main():
     """Главная функция программы"""
+    parser = argparse.ArgumentParser(description="Virtual keyboard simulator")
+    parser.add_argument('--replay', metavar='FILE', help="replay key events from a file, one per line")
+    parser.add_argument('--socket', metavar='PORT', type=int, help="accept key events on a local TCP port")
+    parser.add_argument('--stdin', action='store_true', help="read key events from stdin asynchronously")
+    args = parser.parse_args()
+    if args.replay or args.socket is not None or args.stdin:
+        run_event_loop(args)
+        return
+
     keyboard = Keyboard()
+    session = KeyboardSessionStore()
+    if session.attach(keyboard):
+        print(f"Previous session restored: {keyboard.output_manager.text_length()} characters, "
+              f"{keyboard.history.steps} undo steps")
 
     print("Virtual Keyboard initialized!")
     print("Output will be written to console and 'output.txt' file")
 
     # Очищаем файл вывода при запуске
     keyboard.output_manager.clear_file()
+    macro = None
 
+    show_menu()
     while True:
-        show_menu()
-
         try:
             user_input = input("\nEnter command: ").strip()
 
@@ -48,8 +97,14 @@ def main():
 
             # Специальные команды
             if user_input.lower() == 'exit':
+                keyboard.flush_sequence()
+                keyboard.commit_key_bindings()
+                keyboard.output_manager.close()
+                session.close()
                 print("Goodbye!")
                 break
+            elif user_input.lower() == 'help':
+                show_menu()
             elif user_input.lower() == 'undo':
                 keyboard.undo()
             elif user_input.lower() == 'redo':
@@ -65,6 +120,17 @@ def main():
                 print(f"  Current history position: {stats['current_position']}")
                 print(f"  Key bindings defined: {stats['key_bindings']}")
                 print(f"  Current text length: {stats['current_text_length']}")
+            elif user_input.lower() == 'record':
+                keyboard.start_recording()
+            elif user_input.lower() == 'stop':
+                macro = keyboard.stop_recording() or macro
+            elif user_input.lower() == 'play':
+                if macro is None:
+                    print("No macro recorded")
+                else:
+                    keyboard.replay(macro)
+            elif user_input.startswith('type '):
+                keyboard.type_string(user_input[5:])
             elif user_input.lower() == 'clear':
                 keyboard.press_key('ctrl+l')
             elif user_input.startswith('bind '):
@@ -1,4 +1,5 @@
 from command import Command
+from text_buffer import TextBuffer
 
 
 class MediaPlayerCommand(Command):
@@ -34,11 +35,12 @@ class ClearScreenCommand(Command):
 
     def __init__(self, output_manager):
         self.output_manager = output_manager
-        self.backup_text = ""
+        self.backup_text = None
 
     def execute(self):
         """Очищает экран"""
-        self.backup_text = self.output_manager.get_text()
+        # Снимок разделяет куски текста с буфером, полная копия не нужна
+        self.backup_text = self.output_manager.snapshot()
         self.output_manager.clear()
         return "screen cleared"
 
@@ -47,5 +49,13 @@ class ClearScreenCommand(Command):
         self.output_manager.restore_text(self.backup_text)
         return "screen restored"
 
+    def save_state(self):
+        """Состояние для сохранения истории между сеансами"""
+        return {"backup": self.backup_text.text() if self.backup_text is not None else None}
+
+    def load_state(self, state):
+        backup = state.get("backup")
+        self.backup_text = TextBuffer(backup).snapshot() if backup is not None else None
+
     def get_description(self):
         return "Clear Screen"
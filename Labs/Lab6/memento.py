@@ -1,16 +1,204 @@
+import hashlib
 import json
 import os
-from typing import Dict, Any
+from collections.abc import Mapping as MappingABC
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional
+
+
+class BindingsView(MappingABC):
+    """Неизменяемая версия привязок: изменения и удаления поверх предыдущей версии
+
+    Новая версия не копирует старую, поэтому стоит O(измененных ключей);
+    чтение ключа проходит не больше flatten_every слоев.
+    """
+
+    __slots__ = ('_parent', '_changes', '_removed', '_depth', '_length')
+
+    def __init__(self, parent: Optional['BindingsView'], changes: Dict[str, str], removed: frozenset):
+        self._parent = parent
+        self._changes = changes
+        self._removed = removed
+        self._depth = parent._depth + 1 if parent is not None else 0
+        if parent is None:
+            self._length = len(changes)
+        else:
+            added = sum(1 for key in changes if key not in parent)
+            self._length = len(parent) + added - sum(1 for key in removed if key in parent)
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, str]) -> 'BindingsView':
+        return cls(None, dict(mapping), frozenset())
+
+    def flatten(self) -> 'BindingsView':
+        """Та же версия одним слоем: слои применяются снизу вверх, без обхода через __iter__"""
+        layers = []
+        view = self
+        while view is not None:
+            layers.append(view)
+            view = view._parent
+        state: Dict[str, str] = {}
+        for layer in reversed(layers):
+            for key in layer._removed:
+                state.pop(key, None)
+            state.update(layer._changes)
+        return BindingsView(None, state, frozenset())
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def __getitem__(self, key: str) -> str:
+        view = self
+        while view is not None:
+            if key in view._changes:
+                return view._changes[key]
+            if key in view._removed:
+                break
+            view = view._parent
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._parent is not None:
+            for key in self._parent:
+                if key not in self._removed and key not in self._changes:
+                    yield key
+        yield from self._changes
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"BindingsView({dict(self)!r})"
 
 
 class KeyboardMemento:
-    """Класс для хранения состояния клавиатуры"""
+    """Класс для хранения состояния клавиатуры
 
-    def __init__(self, key_bindings: Dict[str, str]):
-        self._key_bindings = key_bindings.copy()
+    Состояние хранится неизменяемым представлением: get_state() ничего не копирует,
+    а снимок из BindingsView или MappingProxyType не копируется и при создании.
+    """
+
+    def __init__(self, key_bindings: Mapping[str, str]):
+        if isinstance(key_bindings, (BindingsView, MappingProxyType)):
+            self._key_bindings = key_bindings
+        else:
+            self._key_bindings = MappingProxyType(dict(key_bindings))
+
+    def get_state(self) -> Mapping[str, str]:
+        """Привязки только для чтения; для изменения нужна копия dict(...)"""
+        return self._key_bindings
+
+
+def _entry_hash(key: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{key}\0{value}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def bindings_checksum(bindings: Mapping[str, str]) -> int:
+    """Сумма хешей пар ключ-значение по модулю 2**64: не зависит от порядка
+    и пересчитывается по изменившимся ключам"""
+    return sum(_entry_hash(key, value) for key, value in bindings.items()) & 0xFFFFFFFFFFFFFFFF
+
+
+class MementoStore:
+    """Версии привязок с диффами и контрольными суммами
+
+    Файл - журнал версий (JSON lines): номер, изменения, удаления и контрольная сумма
+    полного состояния. Версия дописывается в конец, старые не переписываются.
+    restore(version) собирает состояние и сверяет контрольную сумму.
+    """
+
+    def __init__(self, filename: str = "keyboard_bindings.versions", flatten_every: int = 32):
+        self.filename = filename
+        self.flatten_every = flatten_every
+        self._views: Optional[List[BindingsView]] = None
+        self._checksums: List[int] = []
 
-    def get_state(self) -> Dict[str, str]:
-        return self._key_bindings.copy()
+    @property
+    def latest_version(self) -> int:
+        return len(self._load())
+
+    def versions(self) -> List[int]:
+        return list(range(1, self.latest_version + 1))
+
+    def commit(self, bindings: Mapping[str, str]) -> int:
+        """Сохраняет новую версию, вычисляя дифф с последней"""
+        views = self._load()
+        previous = views[-1] if views else {}
+        changes = {key: value for key, value in bindings.items() if previous.get(key) != value}
+        removed = [key for key in previous if key not in bindings]
+        return self.commit_changes(changes, removed)
+
+    def commit_changes(self, changes: Mapping[str, str], removed: Iterable[str] = ()) -> int:
+        """Сохраняет новую версию по известным изменениям за O(числа изменений)"""
+        views = self._load()
+        previous = views[-1] if views else None
+        changes = dict(changes)
+        removed = frozenset(key for key in removed if key not in changes and previous is not None and key in previous)
+
+        checksum = self._checksums[-1] if self._checksums else 0
+        for key in removed:
+            checksum -= _entry_hash(key, previous[key])
+        for key, value in changes.items():
+            if previous is not None and key in previous:
+                checksum -= _entry_hash(key, previous[key])
+            checksum += _entry_hash(key, value)
+        checksum &= 0xFFFFFFFFFFFFFFFF
+
+        record = {"v": len(views) + 1, "set": changes, "del": sorted(removed), "sum": f"{checksum:016x}"}
+        with open(self.filename, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._append(changes, removed, checksum)
+        return len(views)
+
+    def get(self, version: Optional[int] = None) -> KeyboardMemento:
+        """Версия без проверки; None - последняя"""
+        return KeyboardMemento(self._view(version))
+
+    def restore(self, version: Optional[int] = None) -> KeyboardMemento:
+        """Версия с проверкой контрольной суммы (ValueError при несовпадении)"""
+        view = self._view(version)
+        number = version or len(self._views)
+        if bindings_checksum(view) != self._checksums[number - 1]:
+            raise ValueError(f"Checksum mismatch in {self.filename}, version {number}")
+        return KeyboardMemento(view)
+
+    def _view(self, version: Optional[int]) -> BindingsView:
+        views = self._load()
+        if not views:
+            raise ValueError(f"No saved versions in {self.filename}")
+        number = version or len(views)
+        if not 1 <= number <= len(views):
+            raise ValueError(f"Unknown version {number}, available 1..{len(views)}")
+        return views[number - 1]
+
+    def _append(self, changes: Dict[str, str], removed: frozenset, checksum: int):
+        views = self._views
+        previous = views[-1] if views else None
+        if previous is None:
+            view = BindingsView(None, changes, frozenset())
+        else:
+            view = BindingsView(previous, changes, removed)
+            if view.depth >= self.flatten_every:
+                # Глубокие слои замедляют чтение: раз в flatten_every версий состояние собирается целиком
+                view = view.flatten()
+        views.append(view)
+        self._checksums.append(checksum)
+
+    def _load(self) -> List[BindingsView]:
+        if self._views is not None:
+            return self._views
+        self._views = []
+        if os.path.exists(self.filename):
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self._append(record["set"], frozenset(record["del"]), int(record["sum"], 16))
+        return self._views
 
 
 class KeyboardStateSaver:
@@ -18,13 +206,14 @@ class KeyboardStateSaver:
 
     def __init__(self, filename="keyboard_bindings.json"):
         self.filename = filename
+        self.versions = MementoStore(f"{filename}.versions")
 
     def save_state(self, memento: KeyboardMemento) -> bool:
         """Сохраняет состояние клавиатуры в файл JSON"""
         try:
             state_data = {
                 "version": "1.0",
-                "key_bindings": memento.get_state(),
+                "key_bindings": dict(memento.get_state()),
                 "metadata": {
                     "saved_at": self._get_current_timestamp()
                 }
@@ -64,27 +253,24 @@ class KeyboardStateSaver:
             return KeyboardMemento(self._get_default_bindings())
 
     def backup_state(self, memento: KeyboardMemento) -> bool:
-        """Создает резервную копию состояния"""
-        backup_filename = f"{self.filename}.backup"
+        """Создает резервную копию состояния: новую версию с изменениями относительно прошлой"""
         try:
-            state_data = {
-                "version": "1.0",
-                "key_bindings": memento.get_state(),
-                "metadata": {
-                    "backed_up_at": self._get_current_timestamp()
-                }
-            }
-
-            with open(backup_filename, 'w', encoding='utf-8') as f:
-                json.dump(state_data, f, indent=2, ensure_ascii=False)
-
-            print(f"Backup created: {backup_filename}")
+            version = self.versions.commit(memento.get_state())
+            print(f"Backup created: {self.versions.filename} (version {version})")
             return True
 
         except Exception as e:
             print(f"Error creating backup: {e}")
             return False
 
+    def restore_backup(self, version: Optional[int] = None) -> Optional[KeyboardMemento]:
+        """Загружает версию резервной копии (по умолчанию последнюю) с проверкой контрольной суммы"""
+        try:
+            return self.versions.restore(version)
+        except Exception as e:
+            print(f"Error restoring backup: {e}")
+            return None
+
     def _get_default_bindings(self) -> Dict[str, str]:
         """Возвращает стандартные привязки клавиш"""
         return {
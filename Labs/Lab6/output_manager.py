@@ -1,82 +1,164 @@
+from contextlib import contextmanager
+
+from output_sink import OutputSink
+from text_buffer import TextBuffer, TextSnapshot
+
+LOG_MODES = ("full", "diff")
+
+
+class NullSink:
+    """Приемник вывода без ввода-вывода: тихий режим и база для оценки стоимости записи в файл"""
+
+    def write(self, message):
+        pass
+
+    def flush(self):
+        pass
+
+    def truncate(self):
+        pass
+
+    def close(self):
+        pass
+
+
 class OutputManager:
-    """Управляет выводом текста в консоль и файл"""
+    """Управляет выводом текста в консоль и файл
 
-    def __init__(self, filename="output.txt"):
-        self.text = ""
+    log_mode="full" после каждого символа пишет в файл весь текст, log_mode="diff" -
+    только правку: "+<символы>" или "-<число удаленных>". Очистка пишется как удаление
+    всего текста, восстановление - как удаление старого и добавление нового, поэтому
+    read_diff_log() по такому файлу собирает текущий текст. echo=False отключает консоль.
+    """
+
+    def __init__(self, filename="output.txt", echo=True, log_mode="full", sink=None):
+        if log_mode not in LOG_MODES:
+            raise ValueError(f"Unknown log mode: {log_mode}")
+        self.buffer = TextBuffer()
         self.filename = filename
+        self.echo = echo
+        self.log_mode = log_mode
+        self.sink = sink or OutputSink(filename)
         self.console_log = []
 
+    @property
+    def text(self):
+        return self.buffer.text()
+
+    @text.setter
+    def text(self, value):
+        self.restore_text(value)
+
     def add_text(self, char):
-        """Добавляет символ к тексту"""
-        self.text += char
+        """Добавляет символ (или строку) к тексту"""
+        self.buffer.append(char)
         self._log_to_console_and_file(char)
 
-    def backspace(self):
-        """Удаляет последний символ"""
-        if self.text:
-            removed_char = self.text[-1]
-            self.text = self.text[:-1]
-            return removed_char
-        return ""
+    def backspace(self, count=1):
+        """Удаляет последний символ (или count последних)"""
+        removed = self.buffer.delete(count)
+        if removed and self.log_mode == "diff":
+            self.sink.write(f"-{len(removed)}\n")
+        return removed
 
     def can_backspace(self):
         """Проверяет, можно ли удалить символ"""
-        return len(self.text) > 0
+        return len(self.buffer) > 0
 
     def get_text(self):
         """Возвращает текущий текст"""
-        return self.text
+        return self.buffer.text()
+
+    def text_length(self):
+        """Длина текста без сборки строки"""
+        return len(self.buffer)
 
     def clear(self):
         """Очищает текст"""
-        self.text = ""
+        removed = len(self.buffer)
+        self.buffer.clear()
+        if removed and self.log_mode == "diff":
+            self.sink.write(f"-{removed}\n")
+
+    def snapshot(self) -> TextSnapshot:
+        """Дешевый снимок текста для отмены"""
+        return self.buffer.snapshot()
 
     def restore_text(self, text):
-        """Восстанавливает текст"""
-        self.text = text
+        """Восстанавливает текст из строки или снимка"""
+        removed = len(self.buffer)
+        if isinstance(text, TextSnapshot):
+            self.buffer.restore(text)
+        else:
+            self.buffer.clear()
+            self.buffer.append(text)
+        if self.log_mode == "diff":
+            if removed:
+                self.sink.write(f"-{removed}\n")
+            if len(self.buffer):
+                self.sink.write(f"+{self.buffer.text()}\n")
 
     def _log_to_console_and_file(self, message):
         """Записывает сообщение в консоль и файл"""
-        # Вывод в консоль
-        print(message, end='', flush=True)
-
-        # Запись в файл
-        try:
-            with open(self.filename, 'a', encoding='utf-8') as f:
-                f.write(message)
-        except Exception as e:
-            print(f"\nError writing to file: {e}")
+        if self.echo:
+            print(message, end='')
+        self.sink.write(message if self.log_mode == "full" else f"+{message}\n")
 
     def log_command(self, message):
         """Логирует выполнение команды"""
-        print(message)
-        try:
-            with open(self.filename, 'a', encoding='utf-8') as f:
-                f.write(f"{message}\n")
-        except Exception as e:
-            print(f"Error writing to file: {e}")
+        if self.echo:
+            print(message)
+        self.sink.write(f"{message}\n")
 
     def log_current_state(self):
         """Логирует текущее состояние текста"""
-        if self.text:
-            print(f"\nCurrent text: {self.text}")
-            try:
-                with open(self.filename, 'a', encoding='utf-8') as f:
-                    f.write(f" {self.text}\n")
-            except Exception as e:
-                print(f"Error writing to file: {e}")
-        else:
-            print("\nCurrent text: (empty)")
-            try:
-                with open(self.filename, 'a', encoding='utf-8') as f:
-                    f.write(" (empty)\n")
-            except Exception as e:
-                print(f"Error writing to file: {e}")
+        if self.echo:
+            print(f"\nCurrent text: {self.text or '(empty)'}")
+        # В режиме diff правка уже записана, весь текст в файл не пишется
+        if self.log_mode == "full":
+            self.sink.write(f" {self.text or '(empty)'}\n")
 
     def clear_file(self):
         """Очищает файл вывода"""
+        self.sink.truncate()
+
+    @contextmanager
+    def quiet(self):
+        """Отключает вывод в консоль и файл, например на время восстановления сеанса"""
+        echo, sink = self.echo, self.sink
+        self.echo, self.sink = False, NullSink()
         try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                f.write("")
-        except Exception as e:
-            print(f"Error clearing file: {e}")
+            yield self
+        finally:
+            self.echo, self.sink = echo, sink
+
+    def flush(self):
+        """Сбрасывает буфер вывода в файл"""
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+
+def read_diff_log(filename) -> str:
+    """Собирает текст по файлу вывода в режиме diff; строки сообщений команд пропускаются"""
+    parts = []
+    length = 0
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('+'):
+                parts.append(line[1:])
+                length += len(line) - 1
+            elif line.startswith('-') and line[1:].isdigit():
+                # Удаление с конца: отрезаем от собранных частей count символов
+                count = min(int(line[1:]), length)
+                length -= count
+                while count:
+                    last = parts.pop()
+                    if len(last) > count:
+                        parts.append(last[:-count])
+                        count = 0
+                    else:
+                        count -= len(last)
+    return ''.join(parts)
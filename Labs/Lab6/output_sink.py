@@ -0,0 +1,64 @@
+import atexit
+import time
+
+
+class OutputSink:
+    """Буферизованная запись в файл вывода через один открытый дескриптор
+
+    Сообщения копятся в памяти и сбрасываются в файл, если с прошлого сброса прошло
+    flush_interval секунд, в буфере набралось buffer_size символов, при flush()
+    и при завершении программы.
+    """
+
+    def __init__(self, filename, flush_interval=0.5, buffer_size=64 * 1024):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self._file = None
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._exit_hook = False
+
+    def write(self, message):
+        self._buffer.append(message)
+        self._buffered += len(message)
+        if not self._exit_hook:
+            atexit.register(self.close)
+            self._exit_hook = True
+        if self._buffered >= self.buffer_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленное в файл"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        try:
+            if self._file is None:
+                self._file = open(self.filename, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+        except Exception as e:
+            print(f"\nError writing to file: {e}")
+
+    def truncate(self):
+        """Очищает файл и отбрасывает несброшенные сообщения"""
+        self._buffer.clear()
+        self._buffered = 0
+        try:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.filename, 'w', encoding='utf-8')
+        except Exception as e:
+            self._file = None
+            print(f"Error clearing file: {e}")
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
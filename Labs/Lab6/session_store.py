@@ -0,0 +1,260 @@
+import atexit
+import contextlib
+import io
+import json
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple
+
+from key_command import TypedTextCommand
+from macro import CommandStep, CompositeCommand, Macro, TypeStringCommand
+
+OP_KEY = b'K'
+OP_STRING = b'S'
+OP_COMMAND = b'C'
+OP_MACRO = b'M'
+OP_UNDO = b'U'
+OP_REDO = b'R'
+OP_CLEAR_HISTORY = b'X'
+
+LOG_MAGIC = b'KBLOG\x00\x01'
+_GENERATION = struct.Struct('<I')
+
+
+def _encode_length(length: int) -> bytes:
+    """Длина переменной ширины (LEB128): для одного символа - один байт"""
+    out = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        if length:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _decode_length(data: bytes, position: int) -> Tuple[int, int]:
+    length, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return length, position
+        shift += 7
+
+
+class KeyboardSessionStore:
+    """Текст и история undo/redo клавиатуры между запусками
+
+    <path>.snap - снимок (JSON): текст и записи истории; <path>.log - двоичный журнал
+    операций после снимка: байт операции, длина, данные. Каждые snapshot_every операций
+    пишется новый снимок и журнал начинается заново, поэтому восстановление - это
+    чтение снимка и повтор не более snapshot_every операций. Журнал пишется буфером
+    и сбрасывается раз в flush_interval секунд и при выходе.
+    """
+
+    def __init__(self, path: str = "keyboard_session", snapshot_every: int = 5000,
+                 flush_interval: float = 0.5):
+        self.snapshot_path = f"{path}.snap"
+        self.log_path = f"{path}.log"
+        self.snapshot_every = snapshot_every
+        self.flush_interval = flush_interval
+        self._keyboard = None
+        self._generation = 0
+        self._buffer = bytearray()
+        self._operations = 0
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._log_current = False
+
+    def attach(self, keyboard) -> bool:
+        """Восстанавливает сохраненный сеанс в keyboard и начинает записывать его операции"""
+        restored = self.restore(keyboard)
+        self._keyboard = keyboard
+        keyboard.session = self
+        atexit.register(self.close)
+        return restored
+
+    def record(self, op: bytes, payload: str = ""):
+        data = payload.encode('utf-8')
+        self._buffer += op + _encode_length(len(data)) + data
+        self._operations += 1
+        if self._operations >= self.snapshot_every:
+            self.snapshot()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_macro(self, macro: Macro):
+        steps = [step if isinstance(step, str) else {"c": step.command_type} for step in macro.steps]
+        self.record(OP_MACRO, json.dumps(steps, ensure_ascii=False))
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        try:
+            if self._file is None:
+                if not self._log_current:
+                    self._replace(self.log_path, LOG_MAGIC + _GENERATION.pack(self._generation))
+                    self._log_current = True
+                self._file = open(self.log_path, 'ab')
+            self._file.write(self._buffer)
+            self._file.flush()
+        except Exception as e:
+            print(f"Error writing session log: {e}")
+        self._buffer.clear()
+
+    def snapshot(self):
+        """Сохраняет текст и историю целиком и начинает новый журнал"""
+        keyboard = self._keyboard
+        if keyboard is None:
+            return
+        history = keyboard.history
+        state = {
+            "version": 1,
+            "generation": self._generation + 1,
+            "text": keyboard.output_manager.get_text(),
+            "history": [self._dump_command(command) for command in history],
+            "cursor": history.position + 1,
+        }
+        try:
+            self._replace(self.snapshot_path, json.dumps(state, ensure_ascii=False).encode('utf-8'))
+            # Если сбой случится здесь, у журнала останется старое поколение и он не будет
+            # повторен поверх снимка, который уже содержит его операции
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._replace(self.log_path, LOG_MAGIC + _GENERATION.pack(state["generation"]))
+        except Exception as e:
+            print(f"Error saving session snapshot: {e}")
+            return
+        self._generation = state["generation"]
+        self._log_current = True
+        self._buffer.clear()
+        self._operations = 0
+
+    def restore(self, keyboard) -> bool:
+        """Загружает снимок и повторяет журнал; возвращает False, если сохраненного сеанса нет"""
+        state = self._load_snapshot()
+        operations = list(self._read_log())
+        if state is None and not operations:
+            return False
+
+        output_manager = keyboard.output_manager
+        with output_manager.quiet(), contextlib.redirect_stdout(io.StringIO()):
+            if state is not None:
+                output_manager.restore_text(state["text"])
+                entries = [self._load_command(data, keyboard) for data in state["history"]]
+                entries = [entry for entry in entries if entry is not None]
+                keyboard.history.load(entries, min(state["cursor"], len(entries)))
+            for op, payload in operations:
+                self._apply(keyboard, op, payload)
+        self._operations = len(operations)
+        return True
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load_snapshot(self) -> Optional[dict]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Error loading session snapshot: {e}")
+            return None
+        self._generation = state.get("generation", 0)
+        return state
+
+    def _read_log(self) -> Iterator[Tuple[bytes, str]]:
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        header = len(LOG_MAGIC) + _GENERATION.size
+        if len(data) < header or not data.startswith(LOG_MAGIC):
+            return
+        generation, = _GENERATION.unpack_from(data, len(LOG_MAGIC))
+        if generation != self._generation:
+            return
+        self._log_current = True
+        position = header
+        while position < len(data):
+            op = data[position:position + 1]
+            try:
+                length, start = _decode_length(data, position + 1)
+            except IndexError:
+                length, start = 0, len(data) + 1
+            end = start + length
+            if end > len(data):
+                # Последняя запись оборвана при сбое: отрезаем ее, чтобы новые записи шли следом
+                os.truncate(self.log_path, position)
+                break
+            yield op, data[start:end].decode('utf-8')
+            position = end
+
+    @staticmethod
+    def _apply(keyboard, op: bytes, payload: str):
+        if op == OP_KEY:
+            keyboard.type_char(payload)
+        elif op == OP_STRING:
+            keyboard.type_string(payload)
+        elif op == OP_COMMAND:
+            command = keyboard.registry.create(payload)
+            if command is not None:
+                keyboard._execute_command(command)
+        elif op == OP_MACRO:
+            steps = [step if isinstance(step, str) else CommandStep(step["c"]) for step in json.loads(payload)]
+            keyboard.replay(Macro(tuple(steps)))
+        elif op == OP_UNDO:
+            keyboard.undo()
+        elif op == OP_REDO:
+            keyboard.redo()
+        elif op == OP_CLEAR_HISTORY:
+            keyboard.clear_history()
+
+    @classmethod
+    def _dump_command(cls, command) -> dict:
+        if isinstance(command, TypedTextCommand):
+            return {"t": command.text, "applied": command.applied}
+        if isinstance(command, TypeStringCommand):
+            return {"s": command.text}
+        if isinstance(command, CompositeCommand):
+            return {"m": [cls._dump_command(part) for part in command.commands], "d": command.description}
+        data = {"c": getattr(command, "command_type", None)}
+        if hasattr(command, "save_state"):
+            data["state"] = command.save_state()
+        return data
+
+    @classmethod
+    def _load_command(cls, data: dict, keyboard):
+        output_manager = keyboard.output_manager
+        if "t" in data:
+            command = TypedTextCommand(data["t"], output_manager)
+            command.applied = data["applied"]
+            return command
+        if "s" in data:
+            return TypeStringCommand(data["s"], output_manager)
+        if "m" in data:
+            parts = [cls._load_command(part, keyboard) for part in data["m"]]
+            return CompositeCommand([part for part in parts if part is not None], data["d"])
+        command = keyboard.registry.create(data["c"]) if data["c"] else None
+        if command is not None and "state" in data:
+            command.load_state(data["state"])
+        return command
+
+    @staticmethod
+    def _replace(path: str, payload: bytes):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
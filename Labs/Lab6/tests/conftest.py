@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+# Модули лабораторной импортируются по имени файла, как в main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyboard import Keyboard  # noqa: E402
+from output_manager import OutputManager  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Keyboard пишет привязки и вывод в текущий каталог
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_keyboard():
+    # Вывод и привязки сбрасываются до возврата из каталога теста, иначе atexit допишет их в чужой каталог
+    keyboards = []
+
+    def make():
+        keyboard = Keyboard(output_manager=OutputManager(echo=False, log_mode="diff"))
+        keyboards.append(keyboard)
+        return keyboard
+
+    yield make
+    for keyboard in keyboards:
+        keyboard.commit_key_bindings()
+        keyboard.output_manager.close()
+
+
+@pytest.fixture
+def keyboard(make_keyboard):
+    return make_keyboard()
+
+
+def type_keys(keyboard, text):
+    for char in text:
+        keyboard.press_key(char)
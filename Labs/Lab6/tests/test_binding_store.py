@@ -0,0 +1,54 @@
+from binding_store import BindingStore
+from memento import KeyboardStateSaver
+
+
+def _store(**options):
+    return BindingStore(KeyboardStateSaver(), **options)
+
+
+def test_bindings_load_lazily():
+    store = _store()
+    assert not store.is_loaded
+    assert store.bindings["ctrl+l"] == "clear_screen"
+    assert store.is_loaded
+
+
+def test_changes_are_journaled_on_commit(workdir):
+    store = _store()
+    store.set("ctrl+k", "media_player")
+    assert store.remove("ctrl+l")
+    assert not store.remove("ctrl+missing")
+    assert not (workdir / "keyboard_bindings.json.log").exists()
+    store.commit()
+    assert len((workdir / "keyboard_bindings.json.log").read_text().splitlines()) == 2
+
+    reloaded = _store().bindings
+    assert reloaded["ctrl+k"] == "media_player"
+    assert "ctrl+l" not in reloaded
+
+
+def test_batch_size_triggers_commit(workdir):
+    store = _store(batch_size=2)
+    store.set("a", "media_player")
+    assert not (workdir / "keyboard_bindings.json.log").exists()
+    store.set("b", "media_player")
+    assert (workdir / "keyboard_bindings.json.log").exists()
+
+
+def test_journal_is_compacted_into_main_file(workdir):
+    store = _store(compact_after=3)
+    for key in "abc":
+        store.set(key, "media_player")
+    store.commit()
+    assert not (workdir / "keyboard_bindings.json.log").exists()
+    assert _store().bindings["c"] == "media_player"
+
+
+def test_torn_last_journal_line_is_ignored(workdir):
+    store = _store()
+    store.set("a", "media_player")
+    store.commit()
+    with open(workdir / "keyboard_bindings.json.log", "a", encoding="utf-8") as f:
+        f.write('["set", "b", "vol')
+    bindings = _store().bindings
+    assert bindings["a"] == "media_player" and "b" not in bindings
@@ -0,0 +1,74 @@
+from command_history import CommandHistory
+from conftest import type_keys
+from key_command import TypedTextCommand
+from output_manager import OutputManager
+
+
+def test_typed_characters_merge_into_one_run(keyboard):
+    type_keys(keyboard, "hello")
+    entries = list(keyboard.history)
+    assert len(entries) == 1 and isinstance(entries[0], TypedTextCommand)
+    assert entries[0].text == "hello"
+    assert keyboard.history.steps == 5
+
+
+def test_undo_and_redo_step_by_character(keyboard):
+    type_keys(keyboard, "abc")
+    keyboard.undo()
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == "a"
+    keyboard.redo()
+    assert keyboard.output_manager.get_text() == "ab"
+
+
+def test_typing_after_undo_drops_redo_tail(keyboard):
+    type_keys(keyboard, "abc")
+    keyboard.undo()
+    type_keys(keyboard, "x")
+    assert keyboard.output_manager.get_text() == "abx"
+    assert not keyboard.history.can_redo()
+    assert [entry.text for entry in keyboard.history] == ["abx"]
+
+
+def test_command_splits_runs(keyboard):
+    type_keys(keyboard, "ab")
+    keyboard.press_key("ctrl+plus")
+    type_keys(keyboard, "cd")
+    assert len(keyboard.history) == 3
+    while keyboard.undo():
+        pass
+    assert keyboard.output_manager.get_text() == ""
+
+
+def test_run_limit_and_capacity():
+    output_manager = OutputManager(echo=False, log_mode="diff")
+    history = CommandHistory(capacity=10, run_limit=4)
+    for char in "abcdefghijklmn":
+        output_manager.add_text(char)
+        history.push_char(char, output_manager)
+    assert history.steps <= 10
+    assert all(len(entry) <= 4 for entry in history)
+    assert ''.join(entry.text for entry in history).endswith("klmn")
+    output_manager.close()
+
+
+def test_runs_store_code_points_compactly():
+    run = TypedTextCommand("héllo", output_manager=None)
+    assert run.codes.itemsize == 4 and run.text == "héllo"
+
+
+def test_runs_survive_session_restore(workdir, make_keyboard):
+    from session_store import KeyboardSessionStore
+
+    first = make_keyboard()
+    session = KeyboardSessionStore(str(workdir / "session"), snapshot_every=3)
+    session.attach(first)
+    type_keys(first, "abcd")
+    first.undo()
+    session.close()
+
+    second = make_keyboard()
+    assert KeyboardSessionStore(str(workdir / "session")).restore(second)
+    assert second.output_manager.get_text() == "abc"
+    second.redo()
+    assert second.output_manager.get_text() == "abcd"
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import os
+import threading
+
+import pytest
+
+from event_loop import (ConsoleRenderer, EventSource, KeyboardDispatcher, ReplayFileSource, SocketSource,
+                        StdinSource)
+
+
+class ListSource(EventSource):
+    def __init__(self, *batches):
+        self._batches = batches
+
+    async def batches(self):
+        for batch in self._batches:
+            yield list(batch)
+
+
+def test_events_run_in_order(keyboard):
+    dispatcher = KeyboardDispatcher(keyboard)
+    processed = asyncio.run(dispatcher.run(ListSource(["a", "b", "undo"], ["redo", "type cd", "ctrl+l", "undo"])))
+    assert processed == 7
+    assert keyboard.output_manager.get_text() == "abcd"
+
+
+def test_exit_stops_processing(keyboard):
+    processed = asyncio.run(KeyboardDispatcher(keyboard).run(ListSource(["a", "exit", "b"])))
+    assert processed == 1
+    assert keyboard.output_manager.get_text() == "a"
+
+
+def test_replay_file_is_read_in_batches(workdir, keyboard):
+    (workdir / "events.txt").write_text("x\n\ny\r\nz\n", encoding="utf-8")
+    source = ReplayFileSource(str(workdir / "events.txt"), batch_size=2)
+
+    async def collect():
+        return [batch async for batch in source.batches()]
+
+    assert asyncio.run(collect()) == [["x", "y"], ["z"]]
+    asyncio.run(KeyboardDispatcher(keyboard).run(source))
+    assert keyboard.output_manager.get_text() == "xyz"
+
+
+def test_socket_events_are_handled(keyboard):
+    source = SocketSource(port=0)
+
+    async def scenario():
+        dispatcher = KeyboardDispatcher(keyboard)
+        run = asyncio.create_task(dispatcher.run(source))
+        await source.ready.wait()
+        reader, writer = await asyncio.open_connection(source.host, source.port)
+        writer.write(b"a\nb\nexit\n")
+        await writer.drain()
+        writer.close()
+        return await asyncio.wait_for(run, 5)
+
+    assert asyncio.run(scenario()) == 2
+    assert keyboard.output_manager.get_text() == "ab"
+
+
+def test_renderer_shows_counters_and_tail(keyboard):
+    stream = io.StringIO()
+    renderer = ConsoleRenderer(stream, width=3)
+    asyncio.run(KeyboardDispatcher(keyboard, renderer).run(ListSource(["a", "b", "c", "d"])))
+    assert "[4 events" in stream.getvalue()
+    assert "'bcd'" in stream.getvalue()
+
+
+def test_event_source_is_abstract():
+    with pytest.raises(TypeError):
+        EventSource()
+
+
+def test_stdin_exit_does_not_wait_for_next_line(keyboard):
+    read_fd, write_fd = os.pipe()
+    stream = os.fdopen(read_fd, "r", encoding="utf-8")
+    # Конец записи остается открытым: читающий поток ждет следующую строку
+    os.write(write_fd, b"a\nb\nexit\n")
+    results = []
+    runner = threading.Thread(
+        target=lambda: results.append(asyncio.run(KeyboardDispatcher(keyboard).run(StdinSource(stream)))),
+        daemon=True)
+    runner.start()
+    runner.join(5)
+    try:
+        assert not runner.is_alive()
+        assert results == [2]
+        assert keyboard.output_manager.get_text() == "ab"
+    finally:
+        os.close(write_fd)
+
+
+def test_stdin_eof_ends_source(keyboard):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"x\n\ny\n")
+    os.close(write_fd)
+    with os.fdopen(read_fd, "r", encoding="utf-8") as stream:
+        assert asyncio.run(KeyboardDispatcher(keyboard).run(StdinSource(stream))) == 2
+    assert keyboard.output_manager.get_text() == "xy"
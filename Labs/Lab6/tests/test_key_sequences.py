@@ -0,0 +1,101 @@
+import asyncio
+
+from conftest import type_keys
+from event_loop import EventSource, KeyboardDispatcher
+
+
+def _text(keyboard):
+    return keyboard.output_manager.get_text()
+
+
+def test_sequence_runs_its_command(keyboard):
+    keyboard.add_key_binding("ctrl+k ctrl+c", "clear_screen")
+    type_keys(keyboard, "ab")
+    assert keyboard.press_key("ctrl+k")
+    assert keyboard.press_key("ctrl+c")
+    assert _text(keyboard) == ""
+
+
+def test_breaking_key_starts_a_new_sequence(keyboard):
+    keyboard.add_key_binding("ctrl+k ctrl+c", "clear_screen")
+    type_keys(keyboard, "ab")
+    for key in ("ctrl+k", "ctrl+k", "ctrl+c"):
+        keyboard.press_key(key)
+    assert _text(keyboard) == ""
+
+
+def test_breaking_key_is_handled_from_the_root(keyboard):
+    keyboard.add_key_binding("ctrl+k ctrl+c", "clear_screen")
+    type_keys(keyboard, "ab")
+    keyboard.press_key("ctrl+k")
+    keyboard.press_key("ctrl+l")
+    assert _text(keyboard) == ""
+    keyboard.press_key("ctrl+k")
+    keyboard.press_key("x")
+    assert _text(keyboard) == "x"
+
+
+def test_printable_prefix_is_typed_when_sequence_breaks(keyboard):
+    keyboard.add_key_binding("g g", "clear_screen")
+    type_keys(keyboard, "agx")
+    assert _text(keyboard) == "agx"
+    type_keys(keyboard, "gg")
+    assert _text(keyboard) == ""
+
+
+def test_single_binding_that_is_a_prefix_runs_on_flush(keyboard):
+    keyboard.add_key_binding("ctrl+l ctrl+p", "media_player")
+    type_keys(keyboard, "ab")
+    keyboard.press_key("ctrl+l")
+    assert _text(keyboard) == "ab"
+    assert keyboard.flush_sequence()
+    assert _text(keyboard) == ""
+    assert not keyboard.flush_sequence()
+
+
+def test_single_binding_that_is_a_prefix_runs_before_breaking_key(keyboard):
+    keyboard.add_key_binding("ctrl+l ctrl+p", "media_player")
+    type_keys(keyboard, "ab")
+    keyboard.press_key("ctrl+l")
+    keyboard.press_key("x")
+    assert _text(keyboard) == "x"
+
+
+def test_longest_typed_binding_wins_and_rest_is_replayed(keyboard):
+    keyboard.add_key_binding("ctrl+k ctrl+c", "clear_screen")
+    keyboard.add_key_binding("ctrl+k ctrl+c ctrl+d", "media_player")
+    type_keys(keyboard, "ab")
+    for key in ("ctrl+k", "ctrl+c", "z"):
+        keyboard.press_key(key)
+    assert _text(keyboard) == "z"
+
+
+def test_sequence_timeout_resolves_prefix(make_keyboard):
+    keyboard = make_keyboard()
+    keyboard.sequence_timeout = 0
+    keyboard.add_key_binding("g g", "clear_screen")
+    type_keys(keyboard, "gg")
+    # Первое "g" разобрано по тайм-ауту, второе снова ждет продолжения
+    assert _text(keyboard) == "g"
+    keyboard.flush_sequence()
+    assert _text(keyboard) == "gg"
+
+
+def test_undo_resolves_pending_sequence_first(keyboard):
+    keyboard.add_key_binding("g g", "clear_screen")
+    type_keys(keyboard, "abg")
+    assert keyboard.undo()
+    assert _text(keyboard) == "ab"
+    assert keyboard.redo()
+    assert _text(keyboard) == "abg"
+
+
+def test_dispatcher_flushes_sequence_at_end_of_input(keyboard):
+    keyboard.add_key_binding("g g", "clear_screen")
+
+    class ListSource(EventSource):
+        async def batches(self):
+            yield ["a", "g"]
+
+    asyncio.run(KeyboardDispatcher(keyboard).run(ListSource()))
+    assert _text(keyboard) == "ag"
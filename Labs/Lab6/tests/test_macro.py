@@ -0,0 +1,74 @@
+from conftest import type_keys
+from macro import CommandStep
+
+
+def _record(keyboard, *keys):
+    keyboard.start_recording()
+    for key in keys:
+        keyboard.press_key(key)
+    return keyboard.stop_recording()
+
+
+def test_recorder_merges_text_and_stores_command_types(keyboard):
+    macro = _record(keyboard, "a", "b", "ctrl+l", "c")
+    assert macro.steps == ("ab", CommandStep("clear_screen"), "c")
+
+
+def test_replay_is_one_undo_step(keyboard):
+    macro = _record(keyboard, "x", "y")
+    keyboard.replay(macro)
+    assert keyboard.output_manager.get_text() == "xyxy"
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == "xy"
+
+
+def test_replays_do_not_share_command_state(keyboard):
+    macro = _record(keyboard, "ctrl+l")
+    type_keys(keyboard, "AAA")
+    keyboard.replay(macro)
+    type_keys(keyboard, "BB")
+    keyboard.replay(macro)
+    assert keyboard.output_manager.get_text() == ""
+
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == "BB"
+    keyboard.undo()
+    keyboard.undo()
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == "AAA"
+
+
+def test_type_string_is_one_undo_step(keyboard):
+    keyboard.type_string("hello")
+    keyboard.press_key("!")
+    keyboard.undo()
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == ""
+
+
+def test_macro_with_unknown_command_type_skips_it(keyboard):
+    from macro import Macro
+    assert keyboard.replay(Macro(("ok", CommandStep("missing"))))
+    assert keyboard.output_manager.get_text() == "ok"
+
+
+def test_replayed_macro_survives_session_restore(workdir, make_keyboard):
+    from session_store import KeyboardSessionStore
+
+    first = make_keyboard()
+    session = KeyboardSessionStore(str(workdir / "session"))
+    session.attach(first)
+    type_keys(first, "AAA")
+    macro = _record(first, "ctrl+l")
+    type_keys(first, "BB")
+    first.replay(macro)
+    session.close()
+
+    second = make_keyboard()
+    KeyboardSessionStore(str(workdir / "session")).restore(second)
+    assert second.output_manager.get_text() == ""
+    second.undo()
+    assert second.output_manager.get_text() == "BB"
+    for _ in range(3):
+        second.undo()
+    assert second.output_manager.get_text() == "AAA"
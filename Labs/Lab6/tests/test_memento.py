@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from memento import MementoStore, bindings_checksum
+
+
+def test_versions_store_only_changes(workdir):
+    store = MementoStore("bindings.versions")
+    assert store.commit({"a": "x", "b": "y"}) == 1
+    assert store.commit({"a": "x", "b": "z", "c": "w"}) == 2
+    assert store.commit({"a": "x"}) == 3
+    records = [json.loads(line) for line in open("bindings.versions", encoding="utf-8")]
+    assert records[1]["set"] == {"b": "z", "c": "w"}
+    assert records[2]["del"] == ["b", "c"]
+
+
+def test_restore_any_version_after_reload(workdir):
+    store = MementoStore("bindings.versions")
+    states = [{"a": "x"}, {"a": "y", "b": "z"}, {"b": "z"}]
+    for state in states:
+        store.commit(state)
+    reloaded = MementoStore("bindings.versions")
+    assert reloaded.versions() == [1, 2, 3]
+    for number, state in enumerate(states, 1):
+        assert dict(reloaded.restore(number).get_state()) == state
+    assert dict(reloaded.restore().get_state()) == states[-1]
+
+
+def test_checksum_is_order_independent_and_incremental(workdir):
+    assert bindings_checksum({"a": "x", "b": "y"}) == bindings_checksum({"b": "y", "a": "x"})
+    store = MementoStore("bindings.versions")
+    store.commit({"a": "x"})
+    store.commit_changes({"b": "y"}, removed=["a"])
+    assert dict(store.restore().get_state()) == {"b": "y"}
+
+
+def test_corrupted_version_fails_checksum(workdir):
+    store = MementoStore("bindings.versions")
+    store.commit({"a": "x"})
+    lines = open("bindings.versions", encoding="utf-8").read().replace('"x"', '"tampered"')
+    with open("bindings.versions", "w", encoding="utf-8") as f:
+        f.write(lines)
+    with pytest.raises(ValueError):
+        MementoStore("bindings.versions").restore()
+
+
+def test_deep_history_is_flattened(workdir):
+    store = MementoStore("bindings.versions", flatten_every=4)
+    for i in range(10):
+        store.commit_changes({f"key{i}": "x"})
+    assert len(store.restore().get_state()) == 10
+    assert store._view(None).depth < 4
+
+
+def test_unknown_version_raises(workdir):
+    store = MementoStore("bindings.versions")
+    with pytest.raises(ValueError):
+        store.restore()
+    store.commit({"a": "x"})
+    with pytest.raises(ValueError):
+        store.restore(2)
@@ -0,0 +1,53 @@
+from conftest import type_keys
+from output_manager import OutputManager, read_diff_log
+
+
+def _diff_keyboard_text(keyboard):
+    keyboard.output_manager.flush()
+    return read_diff_log(keyboard.output_manager.filename)
+
+
+def test_diff_log_replays_typing_and_undo(keyboard):
+    keyboard.output_manager.clear_file()
+    type_keys(keyboard, "hello")
+    keyboard.undo()
+    keyboard.type_string(" world")
+    assert _diff_keyboard_text(keyboard) == keyboard.output_manager.get_text() == "hell world"
+
+
+def test_diff_log_records_clear_and_its_undo(keyboard):
+    keyboard.output_manager.clear_file()
+    type_keys(keyboard, "abc")
+    keyboard.press_key("ctrl+l")
+    assert _diff_keyboard_text(keyboard) == ""
+    type_keys(keyboard, "x")
+    keyboard.undo()
+    keyboard.undo()
+    assert keyboard.output_manager.get_text() == "abc"
+    assert _diff_keyboard_text(keyboard) == "abc"
+
+
+def test_diff_log_records_restore_text(workdir):
+    output_manager = OutputManager(echo=False, log_mode="diff")
+    output_manager.add_text("old text")
+    output_manager.restore_text("new")
+    output_manager.clear()
+    output_manager.add_text("!")
+    output_manager.close()
+    assert read_diff_log(output_manager.filename) == "!"
+
+
+def test_quiet_mode_writes_nothing(workdir):
+    output_manager = OutputManager(echo=False, log_mode="diff")
+    with output_manager.quiet():
+        output_manager.restore_text("restored")
+    output_manager.close()
+    assert not (workdir / "output.txt").exists() or read_diff_log("output.txt") == ""
+
+
+def test_full_mode_writes_whole_text(workdir):
+    output_manager = OutputManager(echo=False, log_mode="full")
+    output_manager.add_text("ab")
+    output_manager.log_current_state()
+    output_manager.close()
+    assert (workdir / "output.txt").read_text(encoding="utf-8").endswith(" ab\n")
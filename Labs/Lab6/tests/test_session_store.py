@@ -0,0 +1,90 @@
+from conftest import type_keys
+from session_store import KeyboardSessionStore
+
+
+def _session(workdir, **options):
+    return KeyboardSessionStore(str(workdir / "session"), **options)
+
+
+def _restart(workdir, make_keyboard, session):
+    session.close()
+    second = make_keyboard()
+    restored = _session(workdir).attach(second)
+    return second, restored
+
+
+def test_nothing_to_restore(workdir, keyboard):
+    assert not _session(workdir).restore(keyboard)
+
+
+def test_text_strings_and_commands_survive_restart(workdir, make_keyboard):
+    first = make_keyboard()
+    session = _session(workdir)
+    session.attach(first)
+    type_keys(first, "ab")
+    first.type_string("cd")
+    first.press_key("ctrl+l")
+    second, restored = _restart(workdir, make_keyboard, session)
+    assert restored
+    assert second.output_manager.get_text() == ""
+    second.undo()
+    assert second.output_manager.get_text() == "abcd"
+    second.undo()
+    assert second.output_manager.get_text() == "ab"
+
+
+def test_snapshot_and_log_give_same_state(workdir, make_keyboard):
+    first = make_keyboard()
+    session = _session(workdir, snapshot_every=4)
+    session.attach(first)
+    type_keys(first, "abcdefg")
+    first.press_key("ctrl+l")
+    first.undo()
+    first.undo()
+    second, _ = _restart(workdir, make_keyboard, session)
+    assert second.output_manager.get_text() == "abcdef"
+    second.redo()
+    assert second.output_manager.get_text() == "abcdefg"
+
+
+def test_torn_log_tail_is_dropped(workdir, make_keyboard):
+    first = make_keyboard()
+    session = _session(workdir)
+    session.attach(first)
+    type_keys(first, "abc")
+    session.close()
+    with open(workdir / "session.log", "ab") as f:
+        f.write(b"K\x05x")
+    second = make_keyboard()
+    session = _session(workdir)
+    session.attach(second)
+    assert second.output_manager.get_text() == "abc"
+    type_keys(second, "d")
+    third, _ = _restart(workdir, make_keyboard, session)
+    assert third.output_manager.get_text() == "abcd"
+
+
+def test_log_of_older_generation_is_not_replayed(workdir, make_keyboard):
+    first = make_keyboard()
+    session = _session(workdir)
+    session.attach(first)
+    type_keys(first, "abc")
+    session.flush()
+    old_log = (workdir / "session.log").read_bytes()
+    session.snapshot()
+    session.close()
+    (workdir / "session.log").write_bytes(old_log)
+    second = make_keyboard()
+    _session(workdir).attach(second)
+    assert second.output_manager.get_text() == "abc"
+
+
+def test_cleared_history_stays_cleared(workdir, make_keyboard):
+    first = make_keyboard()
+    session = _session(workdir)
+    session.attach(first)
+    type_keys(first, "ab")
+    first.clear_history()
+    second, _ = _restart(workdir, make_keyboard, session)
+    assert second.output_manager.get_text() == "ab"
+    assert not second.undo()
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from text_buffer import TextBuffer
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Маленькие куски, чтобы короткий текст проходил через сворачивание хвоста
+    monkeypatch.setattr(TextBuffer, 'CHUNK_SIZE', 4)
+
+
+def test_append_and_delete_match_string(small_chunks):
+    buffer, expected = TextBuffer(), ""
+    rng = random.Random(1)
+    for _ in range(500):
+        if rng.random() < 0.6:
+            text = ''.join(rng.choice('abcxyz') for _ in range(rng.randint(1, 9)))
+            buffer.append(text)
+            expected += text
+        else:
+            count = rng.randint(1, 12)
+            removed = buffer.delete(count)
+            assert removed == expected[len(expected) - min(count, len(expected)):]
+            expected = expected[:len(expected) - len(removed)]
+        assert len(buffer) == len(expected)
+    assert buffer.text() == expected
+
+
+def test_delete_more_than_length(small_chunks):
+    buffer = TextBuffer("hello world")
+    assert buffer.delete(100) == "hello world"
+    assert buffer.text() == "" and len(buffer) == 0
+    assert buffer.delete() == ""
+
+
+def test_snapshot_is_unaffected_by_later_edits(small_chunks):
+    buffer = TextBuffer("abcdefghijkl")
+    snapshot = buffer.snapshot()
+    buffer.delete(10)
+    buffer.append("XYZ")
+    assert snapshot.text() == "abcdefghijkl"
+    buffer.restore(snapshot)
+    assert buffer.text() == "abcdefghijkl"
+    buffer.append("m")
+    assert snapshot.text() == "abcdefghijkl"
+    assert buffer.text() == "abcdefghijklm"
+
+
+def test_clear(small_chunks):
+    buffer = TextBuffer("abcdefghij")
+    buffer.clear()
+    assert buffer.text() == "" and len(buffer) == 0
+    buffer.append("z")
+    assert buffer.text() == "z"
@@ -0,0 +1,113 @@
+from typing import List, Optional
+
+
+class _Chunk:
+    """Неизменяемый кусок текста; куски связаны в список от конца к началу"""
+
+    __slots__ = ('text', 'previous')
+
+    def __init__(self, text: str, previous: Optional['_Chunk']):
+        self.text = text
+        self.previous = previous
+
+
+class TextSnapshot:
+    """Снимок текста: ссылается на те же куски, что и буфер, копируется только хвост"""
+
+    __slots__ = ('chunks', 'tail', 'length')
+
+    def __init__(self, chunks: Optional[_Chunk], tail: str, length: int):
+        self.chunks = chunks
+        self.tail = tail
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def text(self) -> str:
+        parts = [self.tail]
+        chunk = self.chunks
+        while chunk is not None:
+            parts.append(chunk.text)
+            chunk = chunk.previous
+        return ''.join(reversed(parts))
+
+
+class TextBuffer:
+    """Текст, который редактируется с конца: добавление и удаление за амортизированное O(1)
+
+    Начало текста хранится неизменяемыми кусками по CHUNK_SIZE символов, конец - списком
+    символов не длиннее 2 * CHUNK_SIZE. Снимок разделяет куски с буфером, поэтому стоит
+    O(CHUNK_SIZE) независимо от длины текста.
+    """
+
+    CHUNK_SIZE = 1024
+
+    def __init__(self, text: str = ""):
+        self._chunks: Optional[_Chunk] = None
+        self._tail: List[str] = []
+        self._length = 0
+        self._text: Optional[str] = ""
+        if text:
+            self.append(text)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, text: str):
+        tail = self._tail
+        tail.extend(text)
+        self._length += len(text)
+        self._text = None
+        size = self.CHUNK_SIZE
+        # Хвост сворачивается только при удвоении, чтобы печать и удаление на границе куска
+        # не разворачивали и не сворачивали один и тот же кусок
+        while len(tail) >= 2 * size:
+            self._chunks = _Chunk(''.join(tail[:size]), self._chunks)
+            del tail[:size]
+
+    def delete(self, count: int = 1) -> str:
+        """Удаляет count последних символов, возвращает удаленное"""
+        removed = []
+        while count and self._length:
+            if not self._tail:
+                chunk = self._chunks
+                self._tail = list(chunk.text)
+                self._chunks = chunk.previous
+            tail = self._tail
+            take = min(count, len(tail))
+            removed.append(''.join(tail[-take:]))
+            del tail[-take:]
+            count -= take
+            self._length -= take
+        if removed:
+            self._text = None
+        return ''.join(reversed(removed))
+
+    def clear(self):
+        self._chunks = None
+        self._tail = []
+        self._length = 0
+        self._text = ""
+
+    def text(self) -> str:
+        """Весь текст; собирается заново только после изменений"""
+        if self._text is None:
+            parts = []
+            chunk = self._chunks
+            while chunk is not None:
+                parts.append(chunk.text)
+                chunk = chunk.previous
+            parts.reverse()
+            parts.append(''.join(self._tail))
+            self._text = ''.join(parts)
+        return self._text
+
+    def snapshot(self) -> TextSnapshot:
+        return TextSnapshot(self._chunks, ''.join(self._tail), self._length)
+
+    def restore(self, snapshot: TextSnapshot):
+        self._chunks = snapshot.chunks
+        self._tail = list(snapshot.tail)
+        self._length = snapshot.length
+        self._text = None
@@ -0,0 +1,90 @@
+"""Нагрузочный тест DI контейнера: разрешения get_instance в секунду
+
+Граф зависимостей - цепочка сервисов глубины depth, в которой каждый сервис
+получает в конструкторе предыдущий и строковый параметр из регистрации.
+Замеряются три раскладки жизненных циклов:
+  per_request - все звенья PER_REQUEST, каждый вызов строит всю цепочку
+  scoped      - верхнее звено PER_REQUEST, остальные SCOPED (внутри одного scope)
+  singleton   - верхнее звено PER_REQUEST, остальные SINGLETON
+
+Запуск: python bench_container.py [--depths 1 5 20 50] [--resolutions 20000] [--json]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Type
+
+from container import DIContainer, LifeStyle
+
+LAYOUTS = ('per_request', 'scoped', 'singleton')
+
+
+def build_chain(depth: int) -> List[Type]:
+    """Интерфейсы и реализации звеньев: Service{i}(previous: IService{i-1}, name: str)"""
+    interfaces = []
+    for i in range(depth):
+        interface = type(f"IService{i}", (), {})
+        if interfaces:
+            def __init__(self, previous, name: str = "", label: str = "service"):
+                self.previous = previous
+                self.name = name
+                self.label = label
+            __init__.__annotations__ = {'previous': interfaces[-1], 'name': str, 'label': str}
+        else:
+            def __init__(self, name: str = "", label: str = "service"):
+                self.name = name
+                self.label = label
+        implementation = type(f"Service{i}", (interface,), {'__init__': __init__})
+        interface.implementation = implementation
+        interfaces.append(interface)
+    return interfaces
+
+
+def configure(container: DIContainer, interfaces: List[Type], layout: str):
+    inner = {
+        'per_request': LifeStyle.PER_REQUEST,
+        'scoped': LifeStyle.SCOPED,
+        'singleton': LifeStyle.SINGLETON,
+    }[layout]
+    for i, interface in enumerate(interfaces):
+        lifestyle = LifeStyle.PER_REQUEST if i == len(interfaces) - 1 else inner
+        container.register(interface, interface.implementation, lifestyle, name=f"service{i}")
+
+
+def bench(depth: int, layout: str, resolutions: int) -> float:
+    interfaces = build_chain(depth)
+    container = DIContainer()
+    configure(container, interfaces, layout)
+    top = interfaces[-1]
+    get_instance = container.get_instance
+    with container.create_scope():
+        get_instance(top)
+        started = time.perf_counter()
+        for _ in range(resolutions):
+            get_instance(top)
+        elapsed = time.perf_counter() - started
+    return resolutions / elapsed if elapsed else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 5, 20, 50])
+    parser.add_argument('--resolutions', type=int, default=2000, help="вызовов get_instance на замер")
+    parser.add_argument('--json', action='store_true', help="вывести результаты в JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[int, float]] = {
+        layout: {depth: bench(depth, layout, args.resolutions) for depth in args.depths}
+        for layout in LAYOUTS
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'layout / depth':<16}" + ''.join(f"{depth:>12}" for depth in args.depths))
+    for layout in LAYOUTS:
+        print(f"{layout:<16}" + ''.join(f"{results[layout][depth]:>12.0f}" for depth in args.depths))
+
+
+if __name__ == '__main__':
+    main()
@@ -43,6 +43,7 @@ def setup_release_configuration(container):
         IDataService, 
         ReleaseDataService, 
         LifeStyle.SINGLETON, 
+        lazy=True,
         connection_string="prod_main_db"
     )
     container.register(
@@ -1,9 +1,15 @@
 from enum import Enum
 from typing import Dict, Any, Type, Callable, Optional, List
+import contextvars
+import functools
 import inspect
 import threading
 
 
+# Отметка "singleton еще не создан": сам экземпляр может быть и None
+_MISSING = object()
+
+
 class LifeStyle(Enum):
     PER_REQUEST = "per_request"
     SCOPED = "scoped"
@@ -16,13 +22,23 @@ class DIContainer:
     def __init__(self):
         self._registrations: Dict[Type, Dict] = {}
         self._singletons: Dict[Type, Any] = {}
-        self._scoped_instances: Dict[Type, Any] = {}
-        self._scope_active = False
+        # Текущий scope свой у каждого потока и каждой asyncio-задачи
+        self._current_scope: contextvars.ContextVar = contextvars.ContextVar(
+            f"di_scope_{id(self)}", default=None)
+        # Стек входов в scope текущего контекста: (scope, токен текущего scope, токен стека).
+        # Выход сбрасывает оба токена, поэтому закрытый scope не оставляет записей в контексте
+        self._scope_entries: contextvars.ContextVar = contextvars.ContextVar(
+            f"di_scope_entries_{id(self)}", default=())
+        # Защищает только создание блокировок регистраций
         self._lock = threading.Lock()
+        # Блокировки создания singleton: медленный конструктор одного не задерживает другие
+        self._singleton_locks: Dict[Type, threading.Lock] = {}
+        # Скомпилированные планы разрешения: интерфейс -> функция без аргументов
+        self._plans: Dict[Type, Callable[[], Any]] = {}
 
     def register(self, interface_type: Type, implementation_type: Type = None,
                  lifestyle: LifeStyle = LifeStyle.PER_REQUEST,
-                 factory_method: Callable = None, **params):
+                 factory_method: Callable = None, lazy: bool = False, **params):
         """
         Регистрация зависимости
 
@@ -31,6 +47,7 @@ class DIContainer:
             implementation_type: Тип реализации (если не указан factory_method)
             lifestyle: Жизненный цикл объекта
             factory_method: Фабричный метод для создания объекта
+            lazy: Выдавать LazyProxy, который создаст объект при первом обращении
             **params: Дополнительные параметры для конструктора
         """
         if factory_method and implementation_type:
@@ -43,8 +60,11 @@ class DIContainer:
             'implementation_type': implementation_type,
             'factory_method': factory_method,
             'lifestyle': lifestyle,
+            'lazy': lazy,
             'params': params
         }
+        # Планы зависимых интерфейсов ссылаются на план этого, поэтому сбрасываются все
+        self._plans.clear()
 
     def get_instance(self, interface_type: Type):
         """
@@ -56,51 +76,61 @@ class DIContainer:
         Returns:
             Экземпляр класса, реализующего интерфейс
         """
+        plan = self._plans.get(interface_type)
+        if plan is None:
+            plan = self._compile(interface_type)
+        return plan()
+
+    def _compile(self, interface_type: Type, path: tuple = ()) -> Callable[[], Any]:
+        """
+        Построение плана разрешения интерфейса
+
+        Сигнатура конструктора разбирается один раз: явные параметры и значения
+        по умолчанию становятся константами, зарегистрированные зависимости -
+        ссылками на их собственные планы. План учитывает жизненный цикл и
+        кэшируется до следующего вызова register.
+        """
         if interface_type not in self._registrations:
             raise ValueError(f"Интерфейс {interface_type.__name__} не зарегистрирован")
+        if interface_type in path:
+            chain = path[path.index(interface_type):] + (interface_type,)
+            raise ValueError("Циклическая зависимость: " + " -> ".join(t.__name__ for t in chain))
 
         registration = self._registrations[interface_type]
+        create = self._compile_constructor(registration, path + (interface_type,))
+        if registration['lazy']:
+            create = functools.partial(LazyProxy, create, interface_type.__name__)
+
         lifestyle = registration['lifestyle']
 
         # Singleton - всегда один экземпляр
         if lifestyle == LifeStyle.SINGLETON:
-            return self._get_singleton(interface_type, registration)
+            plan = self._singleton_plan(interface_type, create)
 
         # Scoped - один экземпляр в пределах scope
         elif lifestyle == LifeStyle.SCOPED:
-            return self._get_scoped(interface_type, registration)
+            def plan():
+                return self._get_scoped(interface_type, create)
 
         # PerRequest - новый экземпляр каждый раз
         else:
-            return self._create_instance(registration)
+            plan = create
 
-    def _get_singleton(self, interface_type: Type, registration: Dict):
-        """Получение singleton экземпляра"""
-        with self._lock:
-            if interface_type not in self._singletons:
-                self._singletons[interface_type] = self._create_instance(registration)
-            return self._singletons[interface_type]
+        self._plans[interface_type] = plan
+        return plan
 
-    def _get_scoped(self, interface_type: Type, registration: Dict):
-        """Получение scoped экземпляра"""
-        if not self._scope_active:
-            raise ValueError("Scoped экземпляр может быть получен только внутри scope")
-
-        if interface_type not in self._scoped_instances:
-            self._scoped_instances[interface_type] = self._create_instance(registration)
-        return self._scoped_instances[interface_type]
-
-    def _create_instance(self, registration: Dict):
-        """Создание нового экземпляра"""
+    def _compile_constructor(self, registration: Dict, path: tuple) -> Callable[[], Any]:
+        """Функция создания нового экземпляра по регистрации"""
         if registration['factory_method']:
-            return registration['factory_method']()
+            return registration['factory_method']
 
         implementation_type = registration['implementation_type']
         params = registration['params']
 
         # Получаем параметры конструктора
         constructor_signature = inspect.signature(implementation_type.__init__)
-        constructor_params = {}
+        constants = {}
+        dependencies = []
 
         # Автоматическое внедрение зависимостей
         for param_name, param in constructor_signature.parameters.items():
@@ -109,32 +139,244 @@ class DIContainer:
 
             # Если параметр явно передан
             if param_name in params:
-                constructor_params[param_name] = params[param_name]
+                constants[param_name] = params[param_name]
             # Если параметр - зарегистрированный интерфейс
             elif param.annotation in self._registrations:
-                constructor_params[param_name] = self.get_instance(param.annotation)
+                dependency_plan = self._plans.get(param.annotation) or self._compile(param.annotation, path)
+                dependencies.append((param_name, dependency_plan))
             # Если параметр имеет значение по умолчанию
             elif param.default is not inspect.Parameter.empty:
-                constructor_params[param_name] = param.default
+                constants[param_name] = param.default
+
+        if not dependencies:
+            return functools.partial(implementation_type, **constants)
+
+        def create():
+            kwargs = constants.copy()
+            for name, dependency_plan in dependencies:
+                kwargs[name] = dependency_plan()
+            return implementation_type(**kwargs)
+
+        return create
+
+    def _singleton_plan(self, interface_type: Type, create: Callable[[], Any]) -> Callable[[], Any]:
+        """
+        План singleton с двойной проверкой
 
-        return implementation_type(**constructor_params)
+        Готовый экземпляр читается из замыкания без блокировки. Создание идет под
+        блокировкой своей регистрации: она общая для всех планов интерфейса и
+        переживает перекомпиляцию, а экземпляр сохраняется в _singletons, поэтому
+        повторная регистрация его не пересоздает.
+        """
+        with self._lock:
+            lock = self._singleton_locks.setdefault(interface_type, threading.Lock())
+        singletons = self._singletons
+        instance = singletons.get(interface_type, _MISSING)
+
+        def plan():
+            nonlocal instance
+            if instance is _MISSING:
+                with lock:
+                    instance = singletons.get(interface_type, _MISSING)
+                    if instance is _MISSING:
+                        instance = singletons[interface_type] = create()
+            return instance
+
+        return plan
+
+    def _get_scoped(self, interface_type: Type, create: Callable[[], Any]):
+        """Получение scoped экземпляра"""
+        scope = self._current_scope.get()
+        if scope is None:
+            raise ValueError("Scoped экземпляр может быть получен только внутри scope")
+
+        # _MISSING, а не None: фабрика может законно вернуть None. Если scope делят
+        # несколько потоков, setdefault оставит в кэше первый созданный экземпляр
+        instances = scope._instances
+        instance = instances.get(interface_type, _MISSING)
+        if instance is _MISSING:
+            instance = instances.setdefault(interface_type, create())
+        return instance
 
     def create_scope(self):
         """Создание нового scope для scoped объектов"""
-        return DIScope(self)
+        return DIScope(self, self._current_scope.get())
+
+    @property
+    def current_scope(self) -> Optional['DIScope']:
+        """Активный scope текущего потока или задачи"""
+        return self._current_scope.get()
 
 
 class DIScope:
-    """Контекстный менеджер для scoped объектов"""
+    """
+    Scope со своим кэшем scoped объектов
 
-    def __init__(self, container: DIContainer):
+    Вход в scope делает его текущим только в своем контексте (contextvars):
+    другие потоки и asyncio-задачи его не видят, а задача, созданная внутри
+    scope, наследует его. Вложенный scope получает собственный кэш, после
+    выхода из него текущим снова становится внешний. Через get_instance scope
+    можно использовать и без with, например передав его в другой поток.
+    """
+
+    def __init__(self, container: DIContainer, parent: Optional['DIScope'] = None):
         self.container = container
+        self.parent = parent
+        self._instances: Dict[Type, Any] = {}
+        # Кэш очищается, когда закрыт последний вход во всех контекстах
+        self._entered = 0
+        self._lock = threading.Lock()
+
+    def get_instance(self, interface_type: Type):
+        """Получение экземпляра с этим scope в качестве текущего"""
+        token = self.container._current_scope.set(self)
+        try:
+            return self.container.get_instance(interface_type)
+        finally:
+            self.container._current_scope.reset(token)
 
     def __enter__(self):
-        self.container._scope_active = True
-        self.container._scoped_instances = {}
+        # Токены входа хранятся в контексте контейнера: выход в одном потоке или задаче
+        # не сбрасывает токен, выданный в другом
+        container = self.container
+        token = container._current_scope.set(self)
+        entries = container._scope_entries
+        entries_token = entries.set(entries.get() + ((self, token, None),))
+        # Токен стека нужен самой записи, поэтому она заменяется после set
+        entries.set(entries.get()[:-1] + ((self, token, entries_token),))
+        with self._lock:
+            self._entered += 1
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.container._scope_active = False
-        self.container._scoped_instances = {}
+        container = self.container
+        entries = container._scope_entries.get()
+        if not entries or entries[-1][0] is not self:
+            raise RuntimeError("Выход из scope, в который не входили в этом контексте")
+        _, token, entries_token = entries[-1]
+        container._scope_entries.reset(entries_token)
+        container._current_scope.reset(token)
+        with self._lock:
+            self._entered -= 1
+            if not self._entered:
+                self._instances = {}
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class LazyProxy:
+    """
+    Заместитель объекта, создаваемого при первом обращении к атрибуту
+
+    Жизненный цикл регистрации применяется к заместителю: для singleton он один,
+    а объект за ним создается ровно один раз, даже при обращениях из нескольких
+    потоков. Кроме атрибутов передаются объекту bool, сравнения, hash, len,
+    итерация, in, индексация и with/async with. Арифметика и остальные операторы
+    не передаются, isinstance по интерфейсу для заместителя не выполняется.
+    """
+
+    __slots__ = ('_factory', '_name', '_instance', '_lock')
+
+    def __init__(self, factory: Callable[[], Any], name: str = "object"):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_instance', _MISSING)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    @staticmethod
+    def is_resolved(proxy: 'LazyProxy') -> bool:
+        """Создан ли уже объект за заместителем"""
+        return object.__getattribute__(proxy, '_instance') is not _MISSING
+
+    def _resolve(self):
+        instance = object.__getattribute__(self, '_instance')
+        if instance is _MISSING:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is _MISSING:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __str__(self):
+        return str(self._resolve())
+
+    def __bool__(self):
+        return bool(self._resolve())
+
+    def __eq__(self, other):
+        return self._resolve() == other
+
+    def __ne__(self, other):
+        return self._resolve() != other
+
+    def __lt__(self, other):
+        return self._resolve() < other
+
+    def __le__(self, other):
+        return self._resolve() <= other
+
+    def __gt__(self, other):
+        return self._resolve() > other
+
+    def __ge__(self, other):
+        return self._resolve() >= other
+
+    def __hash__(self):
+        return hash(self._resolve())
+
+    def __len__(self):
+        return len(self._resolve())
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __contains__(self, item):
+        return item in self._resolve()
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __setitem__(self, key, value):
+        self._resolve()[key] = value
+
+    def __delitem__(self, key):
+        del self._resolve()[key]
+
+    # with и async with ищут методы у типа, поэтому __getattr__ их не передает
+    def __enter__(self):
+        instance = self._resolve()
+        return type(instance).__enter__(instance)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        instance = self._resolve()
+        return type(instance).__exit__(instance, exc_type, exc_val, exc_tb)
+
+    async def __aenter__(self):
+        instance = self._resolve()
+        return await type(instance).__aenter__(instance)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        instance = self._resolve()
+        return await type(instance).__aexit__(instance, exc_type, exc_val, exc_tb)
+
+    def __repr__(self):
+        if not LazyProxy.is_resolved(self):
+            return f"<LazyProxy {object.__getattribute__(self, '_name')}: не создан>"
+        return repr(object.__getattribute__(self, '_instance'))
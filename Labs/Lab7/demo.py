@@ -57,6 +57,8 @@ def demonstrate_di_container():
     logger = release_container.get_instance(ILogger)
     data_service = release_container.get_instance(IDataService)
     notification_service = release_container.get_instance(INotificationService)
+    # DataService зарегистрирован с lazy=True: подключение к БД откладывается до первого обращения
+    print(f"Lazy test: {data_service!r}")
 
     # Работаем с данными
     logger.log("Начало работы с данными")
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Модули лабораторной импортируются по имени файла, как в demo.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from container import DIContainer  # noqa: E402
+
+
+@pytest.fixture
+def container():
+    return DIContainer()
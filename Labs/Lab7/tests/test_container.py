@@ -0,0 +1,89 @@
+import pytest
+
+from container import LifeStyle
+
+
+class IRepository:
+    pass
+
+
+class Repository(IRepository):
+    def __init__(self, url: str = "memory"):
+        self.url = url
+
+
+class IService:
+    pass
+
+
+class Service(IService):
+    def __init__(self, repository: IRepository, name: str = "service"):
+        self.repository = repository
+        self.name = name
+
+
+def test_per_request_creates_new_instances(container):
+    container.register(IRepository, Repository)
+    assert container.get_instance(IRepository) is not container.get_instance(IRepository)
+
+
+def test_params_and_defaults_are_passed(container):
+    container.register(IRepository, Repository, url="db")
+    container.register(IService, Service)
+    service = container.get_instance(IService)
+    assert service.repository.url == "db"
+    assert service.name == "service"
+
+
+def test_dependencies_follow_their_lifestyle(container):
+    container.register(IRepository, Repository, LifeStyle.SINGLETON)
+    container.register(IService, Service)
+    first, second = container.get_instance(IService), container.get_instance(IService)
+    assert first is not second
+    assert first.repository is second.repository
+
+
+def test_register_invalidates_dependent_plans(container):
+    container.register(IRepository, Repository, url="old")
+    container.register(IService, Service)
+    assert container.get_instance(IService).repository.url == "old"
+    container.register(IRepository, Repository, url="new")
+    assert container.get_instance(IService).repository.url == "new"
+
+
+def test_factory_method_is_used(container):
+    container.register(IRepository, factory_method=lambda: Repository("factory"))
+    assert container.get_instance(IRepository).url == "factory"
+
+
+def test_unregistered_interface_raises(container):
+    with pytest.raises(ValueError):
+        container.get_instance(IService)
+
+
+def test_invalid_registration_raises(container):
+    with pytest.raises(ValueError):
+        container.register(IRepository)
+    with pytest.raises(ValueError):
+        container.register(IRepository, Repository, factory_method=Repository)
+
+
+def test_cycle_is_reported(container):
+    class IA:
+        pass
+
+    class IB:
+        pass
+
+    class A(IA):
+        def __init__(self, b: IB):
+            self.b = b
+
+    class B(IB):
+        def __init__(self, a: IA):
+            self.a = a
+
+    container.register(IA, A)
+    container.register(IB, B)
+    with pytest.raises(ValueError, match="IA -> IB -> IA"):
+        container.get_instance(IA)
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+from container import LazyProxy, LifeStyle
+
+
+class IService:
+    pass
+
+
+class Service(IService):
+    created = 0
+
+    def __init__(self):
+        Service.created += 1
+        self.items = [1, 2, 3]
+        self.opened = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __enter__(self):
+        self.opened = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.opened = False
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class SlowService(IService):
+    created = 0
+
+    def __init__(self):
+        time.sleep(0.05)
+        SlowService.created += 1
+
+
+def test_singleton_is_created_once_under_contention(container):
+    SlowService.created = 0
+    container.register(IService, SlowService, LifeStyle.SINGLETON)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def resolve():
+        barrier.wait()
+        results.append(container.get_instance(IService))
+
+    threads = [threading.Thread(target=resolve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SlowService.created == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_singleton_none_is_cached(container):
+    calls = []
+    container.register(IService, factory_method=lambda: calls.append(1), lifestyle=LifeStyle.SINGLETON)
+    assert container.get_instance(IService) is None
+    assert container.get_instance(IService) is None
+    assert len(calls) == 1
+
+
+def test_singleton_survives_recompilation(container):
+    class IOther:
+        pass
+
+    container.register(IService, Service, LifeStyle.SINGLETON)
+    first = container.get_instance(IService)
+    container.register(IOther, Service)
+    assert container.get_instance(IService) is first
+
+
+def test_nested_singletons_do_not_deadlock(container):
+    class IOuter:
+        pass
+
+    class Outer(IOuter):
+        def __init__(self, inner: IService):
+            self.inner = inner
+
+    container.register(IService, Service, LifeStyle.SINGLETON)
+    container.register(IOuter, Outer, LifeStyle.SINGLETON)
+    outer = container.get_instance(IOuter)
+    assert outer.inner is container.get_instance(IService)
+
+
+def test_lazy_registration_creates_object_on_first_use(container):
+    Service.created = 0
+    container.register(IService, Service, LifeStyle.SINGLETON, lazy=True)
+    proxy = container.get_instance(IService)
+    assert isinstance(proxy, LazyProxy)
+    assert not LazyProxy.is_resolved(proxy)
+    assert Service.created == 0
+    assert proxy.items == [1, 2, 3]
+    assert LazyProxy.is_resolved(proxy)
+    assert container.get_instance(IService) is proxy
+    assert Service.created == 1
+
+
+def test_lazy_proxy_forwards_protocols():
+    proxy = LazyProxy(Service, "Service")
+    assert bool(proxy)
+    assert len(proxy) == 3
+    assert list(proxy) == [1, 2, 3]
+    assert 2 in proxy
+    assert proxy[0] == 1
+    with proxy as service:
+        assert service.opened
+    assert not proxy.opened
+
+
+def test_lazy_proxy_forwards_comparison_and_hash():
+    proxy = LazyProxy(lambda: 5)
+    assert proxy == 5 and proxy != 6
+    assert proxy < 6 and proxy >= 5
+    assert hash(proxy) == hash(5)
+    assert not LazyProxy(lambda: 0)
+    assert LazyProxy(lambda: []) == []
+
+
+def test_lazy_proxy_forwards_async_with():
+    proxy = LazyProxy(Service)
+
+    async def use():
+        async with proxy as service:
+            return service.opened
+
+    assert asyncio.run(use())
+    assert not proxy.opened
+
+
+def test_lazy_proxy_resolves_once_across_threads():
+    calls = []
+    proxy = LazyProxy(lambda: calls.append(1) or "value")
+    threads = [threading.Thread(target=str, args=(proxy,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert "не создан" in repr(LazyProxy(object))
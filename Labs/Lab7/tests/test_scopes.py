@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from container import LifeStyle
+
+
+class IService:
+    pass
+
+
+class Service(IService):
+    pass
+
+
+def test_scoped_instance_is_shared_inside_scope(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    with container.create_scope():
+        first = container.get_instance(IService)
+        assert container.get_instance(IService) is first
+    with container.create_scope():
+        assert container.get_instance(IService) is not first
+
+
+def test_scoped_outside_scope_raises(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    with pytest.raises(ValueError):
+        container.get_instance(IService)
+
+
+def test_scoped_none_is_cached(container):
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return None
+
+    container.register(IService, factory_method=factory, lifestyle=LifeStyle.SCOPED)
+    with container.create_scope():
+        assert container.get_instance(IService) is None
+        assert container.get_instance(IService) is None
+    assert len(calls) == 1
+
+
+def test_nested_scope_has_own_cache_and_restores_outer(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    with container.create_scope() as outer:
+        first = container.get_instance(IService)
+        with container.create_scope() as inner:
+            assert inner.parent is outer
+            assert container.get_instance(IService) is not first
+        assert container.current_scope is outer
+        assert container.get_instance(IService) is first
+    assert container.current_scope is None
+
+
+def test_scope_is_not_visible_to_other_threads(container):
+    seen = []
+    with container.create_scope():
+        thread = threading.Thread(target=lambda: seen.append(container.current_scope))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_shared_scope_entered_in_two_threads_exits_independently(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    scope = container.create_scope()
+    worker_entered = threading.Event()
+    main_exited = threading.Event()
+    results = {}
+
+    def worker():
+        with scope:
+            worker_entered.set()
+            # Главный поток вошел раньше, а вышел первым: здесь scope остается текущим, а кэш - общим
+            main_exited.wait(5)
+            results['current'] = container.current_scope
+            results['instance'] = container.get_instance(IService)
+        results['after'] = container.current_scope
+
+    thread = threading.Thread(target=worker)
+    try:
+        with scope:
+            instance = container.get_instance(IService)
+            thread.start()
+            worker_entered.wait(5)
+    finally:
+        main_exited.set()
+        thread.join(5)
+    assert container.current_scope is None
+
+    assert results == {'current': scope, 'instance': instance, 'after': None}
+
+
+def test_scope_exit_without_enter_raises(container):
+    scope = container.create_scope()
+    with scope:
+        pass
+    with pytest.raises(RuntimeError):
+        scope.__exit__(None, None, None)
+
+
+def test_tasks_get_own_scopes(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+
+    async def handle():
+        async with container.create_scope():
+            first = container.get_instance(IService)
+            await asyncio.sleep(0)
+            assert container.get_instance(IService) is first
+            return first
+
+    async def main():
+        return await asyncio.gather(handle(), handle())
+
+    first, second = asyncio.run(main())
+    assert first is not second
+
+
+def test_task_inherits_enclosing_scope(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+
+    async def main():
+        async with container.create_scope():
+            instance = container.get_instance(IService)
+            child = await asyncio.create_task(asyncio.to_thread(container.get_instance, IService))
+            return instance, child
+
+    instance, child = asyncio.run(main())
+    assert child is instance
+
+
+def test_scope_get_instance_works_without_with(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    scope = container.create_scope()
+    assert scope.get_instance(IService) is scope.get_instance(IService)
+    assert container.current_scope is None
+
+
+def test_closed_scopes_leave_nothing_in_context(container):
+    container.register(IService, Service, LifeStyle.SCOPED)
+    before = len(contextvars.copy_context())
+    for _ in range(1000):
+        with container.create_scope():
+            with container.create_scope():
+                container.get_instance(IService)
+    assert len(contextvars.copy_context()) == before